@@ -8,24 +8,36 @@ Version: 3.0.0
 import customtkinter as ctk
 import tkinter as tk
 from tkinter import messagebox, filedialog, colorchooser
+from tkinter import font as tkfont
 import json
 import os
 import sys
-from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageOps
+from PIL import Image, ImageDraw, ImageOps
 import threading
 import subprocess
-import configparser
 from functools import lru_cache
 import io
 import base64
 from pathlib import Path
-import hashlib
-from datetime import datetime
 import logging
 from typing import Dict, List, Optional, Tuple
 import asyncio
 import aiofiles
 import platform
+import multiprocessing
+
+from icon_assets import FontResolver, LogoIndex
+from icon_batch import BatchIconGenerator
+from icon_export import EXPORT_FORMATS, FORMAT_SIZES, required_sizes
+from icon_fills import PATTERN_TYPES
+from icon_renderer import IconRenderer, LayerCache, RenderSpec, draw_rounded_rectangle, is_light_color, profile_color
+from icon_glyphs import GlyphCache
+from icon_text import TextLayout, ellipsize
+from profile_discovery import ParseCache, ProfileCatalog, ProfileDiscovery, ProfileDelta
+from profile_metadata import BACKGROUND_PRIORITY, VISIBLE_PRIORITY, MetadataLoader, ProfileMetadata, describe_metadata
+from profile_record import profiles_from_json, profiles_to_json
+from profile_watch import ProfileWatcher
+from render_cache import RenderCache
 
 # Configure logging
 logging.basicConfig(
@@ -67,14 +79,34 @@ class ModernProfilePop(ctk.CTk):
         self.current_browser: Optional[str] = None
         self.selected_profile_index: Optional[int] = None
         self.theme_mode = "dark"
+        self.max_workers: Optional[int] = None  # None = one worker per CPU core
+        self.export_formats: List[str] = ["ico"]
+        self._generating = False  # One icon batch at a time
+        self.format_vars: Dict[str, tk.BooleanVar] = {}  # Export format checkboxes
         
         # Browser paths
         self.browser_paths = self._detect_browser_paths()
         
+        # Every browser's profiles, scanned once at startup
+        self.catalog = ProfileCatalog()
+        self.parse_cache = ParseCache()  # Profile lists of unchanged browser files
+        self.discovery = ProfileDiscovery(self.browser_paths, assign_color=lambda profile: self._get_random_color(),
+                                          cache=self.parse_cache)
+        self._discovery_done = threading.Event()
+        self.profile_watcher: Optional[ProfileWatcher] = None  # Started once discovery finishes
+        self._profile_cards: Dict[Tuple[str, str], Tuple] = {}  # Catalog key -> (card, name label, details label)
+        self.metadata_loader = MetadataLoader(
+            lambda profile, metadata: self.after(0, self._apply_profile_metadata, profile, metadata))
+        
         # Cache for images and performance
-        self._image_cache: Dict = {}
-        self._font_cache: Dict = {}
+        self._image_cache = LayerCache()  # Shape masks and effect layers
+        self.logo_index = LogoIndex()  # Browser logos, decoded once
+        self._font_cache = FontResolver()  # System fonts, indexed once
+        self.text_layout = TextLayout(self._font_cache)  # Label measurements and strips
+        self.glyph_cache = GlyphCache(self._font_cache)  # Template emoji rasters
         self._icon_preview_cache: Dict = {}
+        self.render_cache = RenderCache()
+        self._card_font = tkfont.Font(family="Arial", size=8)  # Profile names on mini previews
         
         # Enhanced color palette with gradients
         self.color_palette = self._generate_enhanced_palette()
@@ -82,6 +114,7 @@ class ModernProfilePop(ctk.CTk):
         # Icon shape options
         self.icon_shapes = ["rounded", "circle", "square", "hexagon", "badge"]
         self.current_shape = "rounded"
+        self.current_pattern = "stripes"
         
         # Font options
         self.font_options = ["Arial", "Segoe UI", "Helvetica", "Roboto", "Ubuntu"]
@@ -95,6 +128,8 @@ class ModernProfilePop(ctk.CTk):
         
         # Start background tasks
         self._start_background_tasks()
+        self._start_discovery()
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
         
         logger.info(f"ProfilePop Modern v{__version__} initialized successfully")
     
@@ -416,6 +451,15 @@ class ModernProfilePop(ctk.CTk):
         self.color_mode.pack(pady=10)
         self.color_mode.set("Gradient")
         
+        # Pattern selection (used in Pattern mode)
+        self.pattern_menu = ctk.CTkOptionMenu(
+            color_tab,
+            values=[p.capitalize() for p in PATTERN_TYPES],
+            command=self._update_pattern
+        )
+        self.pattern_menu.pack(pady=5)
+        self.pattern_menu.set(self.current_pattern.capitalize())
+        
         # Color palette
         palette_frame = ctk.CTkScrollableFrame(color_tab, height=300)
         palette_frame.pack(fill="both", expand=True, padx=10, pady=10)
@@ -626,9 +670,8 @@ class ModernProfilePop(ctk.CTk):
         logger.info(f"Theme switched to {self.theme_mode}")
     
     def _load_browser_profiles(self, browser: str):
-        """Load profiles for selected browser"""
+        """Show profiles for selected browser from the catalog"""
         self.current_browser = browser
-        self.profiles = []
         
         # Update header
         browser_names = {
@@ -642,85 +685,111 @@ class ModernProfilePop(ctk.CTk):
         }
         
         self.header_label.configure(text=f"{browser_names.get(browser, browser)} Profiles")
-        self._update_status(f"Loading {browser_names.get(browser)} profiles...")
         
-        # Load profiles in background thread
-        threading.Thread(target=self._load_profiles_async, args=(browser,), daemon=True).start()
+        if not self._discovery_done.is_set():
+            # Shown by _on_discovery_done once the startup scan finishes
+            self.profiles = []
+            self._update_status(f"Loading {browser_names.get(browser)} profiles...")
+            return
+        
+        self.profiles = self.catalog.by_browser(browser)
+        self._display_profiles()
+        self.metadata_loader.request(self.profiles, VISIBLE_PRIORITY)
+        self._update_status(f"Loaded {len(self.profiles)} profiles")
     
-    def _load_profiles_async(self, browser: str):
-        """Load browser profiles asynchronously"""
+    def _start_discovery(self):
+        """Scan every browser's profiles in the background"""
+        threading.Thread(target=self._discover_profiles_async, daemon=True).start()
+    
+    def _discover_profiles_async(self):
+        """Load all browser profiles concurrently into the catalog"""
         try:
-            if browser == "firefox":
-                self._load_firefox_profiles()
-            else:
-                self._load_chromium_profiles(browser)
-            
-            # Update UI in main thread
-            self.after(0, self._display_profiles)
-            self.after(0, lambda: self._update_status(f"Loaded {len(self.profiles)} profiles"))
-            
+            self.discovery.scan(self.catalog)
         except Exception as e:
             logger.error(f"Error loading profiles: {e}")
             self.after(0, lambda: messagebox.showerror("Error", f"Failed to load profiles: {str(e)}"))
+        finally:
+            self._discovery_done.set()
+            self.after(0, self._on_discovery_done)
     
-    def _load_chromium_profiles(self, browser: str):
-        """Load Chromium-based browser profiles"""
-        browser_path = self.browser_paths.get(browser)
-        if not browser_path:
-            return
-        
-        # Load Local State file
-        local_state_path = os.path.join(browser_path, "Local State")
-        if not os.path.exists(local_state_path):
-            return
-        
-        with open(local_state_path, 'r', encoding='utf-8') as f:
-            local_state = json.load(f)
-        
-        # Get profile info
-        profile_info = local_state.get('profile', {}).get('info_cache', {})
-        
-        for profile_id, profile_data in profile_info.items():
-            self.profiles.append({
-                'id': profile_id,
-                'name': profile_data.get('name', profile_id),
-                'path': os.path.join(browser_path, profile_id),
-                'color': self._get_random_color(),
-                'browser': browser
-            })
-    
-    def _load_firefox_profiles(self):
-        """Load Firefox profiles"""
-        firefox_path = self.browser_paths.get("firefox")
-        if not firefox_path:
+    def _on_discovery_done(self):
+        """Show the selected browser's profiles once discovery finishes"""
+        self._update_status(f"Found {len(self.catalog)} profiles in {len(self.catalog.browsers())} browsers")
+        if self.current_browser:
+            self._load_browser_profiles(self.current_browser)
+        # Everything else fills in behind the grid on screen
+        self.metadata_loader.request(list(self.catalog), BACKGROUND_PRIORITY)
+        self._start_profile_watch()
+    
+    def _start_profile_watch(self):
+        """Follow profile additions, removals and renames made in the browsers"""
+        self.profile_watcher = ProfileWatcher(
+            self.discovery, self.catalog,
+            lambda browser, deltas: self.after(0, self._apply_profile_deltas, browser, deltas))
+        try:
+            self.profile_watcher.start()
+        except OSError as e:
+            logger.warning(f"Profile watching unavailable: {e}")
+            self.profile_watcher = None
+    
+    def _apply_profile_deltas(self, browser: str, deltas: List[ProfileDelta]):
+        """Update only the cards that changed; the catalog is already current"""
+        if browser != self.current_browser:
             return
-        
-        profiles_ini = os.path.join(firefox_path, "profiles.ini")
-        if not os.path.exists(profiles_ini):
+        if not self._profile_cards:
+            self._load_browser_profiles(browser)
             return
         
-        config = configparser.ConfigParser()
-        config.read(profiles_ini)
+        for delta in deltas:
+            key = ProfileCatalog.key(delta.profile)
+            if delta.kind == "added":
+                self.profiles.append(delta.profile)
+                self._create_profile_card(delta.profile, len(self.profiles) - 1)
+                self.metadata_loader.request([delta.profile], VISIBLE_PRIORITY)
+            elif delta.kind == "removed":
+                self.profiles = [p for p in self.profiles if p is not delta.profile]
+                widgets = self._profile_cards.pop(key, None)
+                if widgets is not None:
+                    widgets[0].destroy()
+            elif delta.kind == "renamed" and key in self._profile_cards:
+                self._profile_cards[key][1].configure(text=delta.profile['name'])
+        
+        if any(delta.kind == "removed" for delta in deltas):
+            if not self.profiles:
+                self._display_profiles()
+            else:
+                self._regrid_profile_cards()
         
-        for section in config.sections():
-            if section.startswith("Profile"):
-                profile_name = config.get(section, "Name", fallback="Unknown")
-                profile_path = config.get(section, "Path", fallback="")
-                
-                if profile_path:
-                    self.profiles.append({
-                        'id': section,
-                        'name': profile_name,
-                        'path': os.path.join(firefox_path, profile_path),
-                        'color': self._get_random_color(),
-                        'browser': 'firefox'
-                    })
+        counts = {}
+        for delta in deltas:
+            counts[delta.kind] = counts.get(delta.kind, 0) + 1
+        self._update_status("Profiles " + ", ".join(f"{kind}: {n}" for kind, n in counts.items()))
+    
+    def _regrid_profile_cards(self, columns: int = 3):
+        """Close gaps left by removed cards"""
+        for i, profile in enumerate(self.profiles):
+            card = self._profile_cards[ProfileCatalog.key(profile)][0]
+            card.grid(row=i // columns, column=i % columns)
+    
+    def _apply_profile_metadata(self, profile: Dict, metadata: ProfileMetadata):
+        """Fill in a card's details once its metadata has loaded"""
+        widgets = self._profile_cards.get(ProfileCatalog.key(profile))
+        if widgets is not None:
+            widgets[2].configure(text=describe_metadata(metadata))
+    
+    def _on_close(self):
+        """Stop background work and close the window"""
+        if self.profile_watcher is not None:
+            self.profile_watcher.stop()
+        self.metadata_loader.stop()
+        self.destroy()
     
     def _display_profiles(self):
         """Display loaded profiles in grid"""
         # Clear existing profile widgets
         for widget in self.profile_container.winfo_children():
             widget.destroy()
+        self._profile_cards.clear()
         
         if not self.profiles:
             no_profiles_label = ctk.CTkLabel(
@@ -733,52 +802,67 @@ class ModernProfilePop(ctk.CTk):
             return
         
         # Enable action buttons
-        self.generate_btn.configure(state="normal")
+        self.generate_btn.configure(state="disabled" if self._generating else "normal")
         self.create_shortcuts_btn.configure(state="normal")
         self.export_btn.configure(state="normal")
         
         # Create profile cards
-        columns = 3
         for i, profile in enumerate(self.profiles):
-            row = i // columns
-            col = i % columns
-            
-            # Profile card
-            card = ctk.CTkFrame(self.profile_container, corner_radius=10)
-            card.grid(row=row, column=col, padx=10, pady=10, sticky="nsew")
-            
-            # Profile icon preview
-            icon_frame = ctk.CTkFrame(card, width=100, height=100)
-            icon_frame.pack(pady=10)
-            
-            # Generate mini preview
-            self._generate_mini_preview(icon_frame, profile)
-            
-            # Profile name
-            name_label = ctk.CTkLabel(
-                card,
-                text=profile['name'],
-                font=ctk.CTkFont(size=14, weight="bold")
-            )
-            name_label.pack(pady=5)
-            
-            # Color selector
-            color_btn = ctk.CTkButton(
-                card,
-                text="Change Color",
-                command=lambda p=profile: self._change_profile_color(p),
-                height=30
-            )
-            color_btn.pack(pady=5, padx=10, fill="x")
-            
-            # Edit button
-            edit_btn = ctk.CTkButton(
-                card,
-                text="✏️ Edit",
-                command=lambda p=profile, idx=i: self._edit_profile(p, idx),
-                height=30
-            )
-            edit_btn.pack(pady=5, padx=10, fill="x")
+            self._create_profile_card(profile, i)
+    
+    def _create_profile_card(self, profile: Dict, index: int, columns: int = 3):
+        """Add one profile card at a grid position"""
+        row = index // columns
+        col = index % columns
+        
+        # Profile card
+        card = ctk.CTkFrame(self.profile_container, corner_radius=10)
+        card.grid(row=row, column=col, padx=10, pady=10, sticky="nsew")
+        
+        # Profile icon preview
+        icon_frame = ctk.CTkFrame(card, width=100, height=100)
+        icon_frame.pack(pady=10)
+        
+        # Generate mini preview
+        self._generate_mini_preview(icon_frame, profile)
+        
+        # Profile name
+        name_label = ctk.CTkLabel(
+            card,
+            text=profile['name'],
+            font=ctk.CTkFont(size=14, weight="bold")
+        )
+        name_label.pack(pady=5)
+        
+        # Account and last use, filled in by the metadata loader
+        metadata = self.metadata_loader.get(profile)
+        details_label = ctk.CTkLabel(
+            card,
+            text=describe_metadata(metadata) if metadata else "",
+            font=ctk.CTkFont(size=11),
+            text_color="gray"
+        )
+        details_label.pack()
+        
+        # Color selector
+        color_btn = ctk.CTkButton(
+            card,
+            text="Change Color",
+            command=lambda p=profile: self._change_profile_color(p),
+            height=30
+        )
+        color_btn.pack(pady=5, padx=10, fill="x")
+        
+        # Edit button
+        edit_btn = ctk.CTkButton(
+            card,
+            text="✏️ Edit",
+            command=lambda p=profile: self._edit_profile(p, self.profiles.index(p)),
+            height=30
+        )
+        edit_btn.pack(pady=5, padx=10, fill="x")
+        
+        self._profile_cards[ProfileCatalog.key(profile)] = (card, name_label, details_label)
     
     def _generate_mini_preview(self, parent, profile):
         """Generate mini icon preview for profile card"""
@@ -788,16 +872,13 @@ class ModernProfilePop(ctk.CTk):
         draw = ImageDraw.Draw(icon)
         
         # Get color
-        color = profile.get('color', '#3388de')
-        if isinstance(color, dict):
-            # Gradient support
-            color = color.get('hex', '#3388de')
+        color = profile_color(profile)
         
         # Draw shape
         if self.current_shape == "circle":
             draw.ellipse([0, 0, size-1, size-1], fill=color)
         elif self.current_shape == "rounded":
-            self._draw_rounded_rectangle(draw, [0, 0, size-1, size-1], 15, color)
+            draw_rounded_rectangle(draw, [0, 0, size-1, size-1], 15, color)
         else:
             draw.rectangle([0, 0, size-1, size-1], fill=color)
         
@@ -825,17 +906,18 @@ class ModernProfilePop(ctk.CTk):
         
         # Add browser emoji
         browser = profile.get('browser', 'chrome')
-        emoji = browser_icons.get(browser, '🌐')
+        emoji = profile.get('icon') or browser_icons.get(browser, '🌐')
         canvas.create_text(size//2, size//2 - 10, text=emoji, font=("Arial", 24))
         
         # Add profile name
         if self.show_text_var.get():
-            name = profile['name'][:8] + "..." if len(profile['name']) > 8 else profile['name']
-            canvas.create_text(size//2, size - 10, text=name, font=("Arial", 8), fill="white")
+            # Measured with the Tk font that draws it, so no font files are read here
+            name = ellipsize(profile['name'], self._card_font.measure, size - 8)
+            canvas.create_text(size//2, size - 10, text=name, font=self._card_font, fill="white")
     
     def _change_profile_color(self, profile):
         """Change color for specific profile"""
-        color = colorchooser.askcolor(initialcolor=profile.get('color', '#3388de'))
+        color = colorchooser.askcolor(initialcolor=profile_color(profile))
         if color[1]:
             profile['color'] = color[1]
             self._display_profiles()
@@ -849,7 +931,7 @@ class ModernProfilePop(ctk.CTk):
         # Show edit dialog
         dialog = ctk.CTkToplevel(self)
         dialog.title(f"Edit Profile: {profile['name']}")
-        dialog.geometry("400x300")
+        dialog.geometry("400x460")
         
         # Name field
         name_label = ctk.CTkLabel(dialog, text="Profile Name:")
@@ -859,9 +941,35 @@ class ModernProfilePop(ctk.CTk):
         name_entry = ctk.CTkEntry(dialog, textvariable=name_var)
         name_entry.pack(pady=5, padx=20, fill="x")
         
+        # Badge field: a short label, count or emoji drawn in the icon corner
+        badge_label = ctk.CTkLabel(dialog, text="Badge (optional):")
+        badge_label.pack(pady=10)
+        
+        badge_var = tk.StringVar(value=str(profile.get('badge') or ""))
+        badge_entry = ctk.CTkEntry(dialog, textvariable=badge_var)
+        badge_entry.pack(pady=5, padx=20, fill="x")
+        
+        # Icon field: a template emoji or symbol drawn in place of the browser logo
+        icon_label = ctk.CTkLabel(dialog, text="Icon emoji (optional):")
+        icon_label.pack(pady=10)
+        
+        icon_var = tk.StringVar(value=profile.get('icon', ""))
+        icon_entry = ctk.CTkEntry(dialog, textvariable=icon_var)
+        icon_entry.pack(pady=5, padx=20, fill="x")
+        
         # Save button
         def save_changes():
-            profile['name'] = name_var.get()
+            self.catalog.update(profile, name=name_var.get())
+            badge = badge_var.get().strip()
+            if badge:
+                profile['badge'] = badge
+            else:
+                profile.pop('badge', None)
+            icon = icon_var.get().strip()
+            if icon:
+                profile['icon'] = icon
+            else:
+                profile.pop('icon', None)
             self._display_profiles()
             dialog.destroy()
         
@@ -870,206 +978,115 @@ class ModernProfilePop(ctk.CTk):
     
     def _generate_all_icons(self):
         """Generate icons for all profiles"""
-        if not self.profiles:
+        if not self.profiles or self._generating:
             return
+        self._generating = True
+        self.generate_btn.configure(state="disabled")
         
-        # Create output directory
-        output_dir = f"ProfileIcons_{self.current_browser}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        # Stable output directory; its manifest lets reruns skip unchanged icons
+        output_dir = f"ProfileIcons_{self.current_browser}"
         os.makedirs(output_dir, exist_ok=True)
         
-        self._update_status(f"Generating {len(self.profiles)} icons...")
+        # Widgets and the profile list are read here on the Tk thread, once per batch
+        profiles = list(self.profiles)
+        generator = BatchIconGenerator(
+            self._create_renderer(self._build_render_spec()),
+            max_workers=self.max_workers,
+            cache=self.render_cache,
+            formats=list(self.export_formats)
+        )
+        
+        self._update_status(f"Generating {len(profiles)} icons...")
         self.progress_bar.set(0)
         
         # Generate icons in background
         threading.Thread(
             target=self._generate_icons_async,
-            args=(output_dir,),
+            args=(generator, profiles, output_dir),
             daemon=True
         ).start()
     
-    def _generate_icons_async(self, output_dir):
+    def _generate_icons_async(self, generator, profiles, output_dir):
         """Generate icons asynchronously"""
         try:
-            total = len(self.profiles)
-            for i, profile in enumerate(self.profiles):
-                # Generate icon
-                icon_path = self._generate_single_icon(profile, output_dir)
+            total = len(profiles)
+            failed = 0
+            cached = 0
+            unchanged = 0
+            results = generator.generate(profiles, output_dir, incremental=True)
+            for done, result in enumerate(results, 1):
+                if result.error:
+                    failed += 1
+                elif result.unchanged:
+                    unchanged += 1
+                elif result.cached:
+                    cached += 1
                 
-                # Update progress
-                progress = (i + 1) / total
-                self.after(0, lambda p=progress: self.progress_bar.set(p))
-                self.after(0, lambda: self._update_status(f"Generated {i+1}/{total} icons"))
+                # Update progress as each worker finishes
+                self.after(0, lambda p=done / total: self.progress_bar.set(p))
+                self.after(0, lambda n=done: self._update_status(f"Generated {n}/{total} icons"))
+            
+            if failed:
+                raise RuntimeError(f"{failed} of {total} icons could not be generated")
             
             # Complete
-            self.after(0, lambda: self._update_status(f"✅ Generated {total} icons in {output_dir}"))
+            updated = total - unchanged
+            removed = len(generator.removed)
+            saved = generator.renders_saved
+            self.after(0, lambda: self._update_status(
+                f"✅ Updated {updated} icons ({cached} from cache, {saved} duplicates, "
+                f"{unchanged} unchanged, {removed} removed) in {output_dir}"))
             self.after(0, lambda: messagebox.showinfo("Success", f"Icons generated successfully!\nLocation: {output_dir}"))
             
         except Exception as e:
             logger.error(f"Error generating icons: {e}")
             self.after(0, lambda: messagebox.showerror("Error", f"Failed to generate icons: {str(e)}"))
+        finally:
+            self.after(0, self._finish_generation)
     
-    def _generate_single_icon(self, profile, output_dir):
-        """Generate a single icon file"""
-        sizes = [16, 32, 48, 128, 256]
-        icon_images = []
-        
-        for size in sizes:
-            # Create icon image
-            img = Image.new('RGBA', (size, size), (0, 0, 0, 0))
-            draw = ImageDraw.Draw(img)
-            
-            # Get color
-            color = profile.get('color', '#3388de')
-            if isinstance(color, dict):
-                color = color.get('hex', '#3388de')
-            
-            # Draw background shape
-            if self.current_shape == "circle":
-                draw.ellipse([0, 0, size-1, size-1], fill=color)
-            elif self.current_shape == "rounded":
-                radius = int(size * 0.2)
-                self._draw_rounded_rectangle(draw, [0, 0, size-1, size-1], radius, color)
-            elif self.current_shape == "hexagon":
-                self._draw_hexagon(draw, size, color)
-            else:
-                draw.rectangle([0, 0, size-1, size-1], fill=color)
-            
-            # Add effects
-            if self.shadow_var.get():
-                img = self._add_shadow(img)
-            
-            if self.glow_var.get():
-                img = self._add_glow(img, color)
-            
-            # Add browser logo
-            logo_path = f"logos/{profile['browser']}-logo.png"
-            if os.path.exists(logo_path):
-                logo = Image.open(logo_path)
-                logo_size = int(size * 0.5)
-                logo = logo.resize((logo_size, logo_size), Image.Resampling.LANCZOS)
-                
-                # Paste logo
-                logo_pos = ((size - logo_size) // 2, (size - logo_size) // 2 - int(size * 0.1))
-                img.paste(logo, logo_pos, logo)
-            
-            # Add text
-            if self.show_text_var.get() and size >= 48:
-                self._add_text_to_icon(draw, profile['name'], size)
-            
-            icon_images.append(img)
-        
-        # Save as ICO
-        output_path = os.path.join(output_dir, f"{profile['name'].replace(' ', '_')}.ico")
-        icon_images[0].save(output_path, format='ICO', sizes=[(s, s) for s in sizes])
-        
-        return output_path
-    
-    def _draw_rounded_rectangle(self, draw, coords, radius, fill):
-        """Draw a rounded rectangle"""
-        x1, y1, x2, y2 = coords
-        
-        # Draw rectangles and circles for rounded corners
-        draw.rectangle([x1 + radius, y1, x2 - radius, y2], fill=fill)
-        draw.rectangle([x1, y1 + radius, x2, y2 - radius], fill=fill)
-        
-        draw.ellipse([x1, y1, x1 + radius * 2, y1 + radius * 2], fill=fill)
-        draw.ellipse([x2 - radius * 2, y1, x2, y1 + radius * 2], fill=fill)
-        draw.ellipse([x1, y2 - radius * 2, x1 + radius * 2, y2], fill=fill)
-        draw.ellipse([x2 - radius * 2, y2 - radius * 2, x2, y2], fill=fill)
-    
-    def _draw_hexagon(self, draw, size, fill):
-        """Draw a hexagon shape"""
-        center = size // 2
-        radius = size // 2 - 2
-        
-        points = []
-        for i in range(6):
-            angle = i * 60 * 3.14159 / 180
-            x = center + radius * cos(angle)
-            y = center + radius * sin(angle)
-            points.append((x, y))
-        
-        draw.polygon(points, fill=fill)
+    def _finish_generation(self):
+        """Allow the next icon batch once a run has ended"""
+        self._generating = False
+        if self.profiles:
+            self.generate_btn.configure(state="normal")
     
-    def _add_shadow(self, img):
-        """Add drop shadow effect"""
-        # Create shadow
-        shadow = Image.new('RGBA', img.size, (0, 0, 0, 0))
-        shadow_draw = ImageDraw.Draw(shadow)
-        
-        # Draw shadow shape (simplified)
-        size = img.size[0]
-        offset = 2
-        shadow_draw.ellipse([offset, offset, size-1, size-1], fill=(0, 0, 0, 100))
-        
-        # Blur shadow
-        shadow = shadow.filter(ImageFilter.GaussianBlur(radius=3))
-        
-        # Composite
-        result = Image.new('RGBA', img.size, (0, 0, 0, 0))
-        result.paste(shadow, (0, 0))
-        result.paste(img, (0, 0), img)
-        
-        return result
+    def _create_renderer(self, spec: RenderSpec) -> IconRenderer:
+        """Create a renderer for a spec sharing the app caches"""
+        return IconRenderer(
+            spec,
+            logos=self.logo_index,
+            layer_cache=self._image_cache,
+            fonts=self._font_cache,
+            text=self.text_layout,
+            glyphs=self.glyph_cache,
+            base_cache=self.render_cache
+        )
     
-    def _add_glow(self, img, color):
-        """Add glow effect"""
-        # Create glow
-        glow = img.copy()
-        glow = glow.filter(ImageFilter.GaussianBlur(radius=5))
-        
-        # Enhance glow color
-        enhancer = ImageEnhance.Brightness(glow)
-        glow = enhancer.enhance(1.5)
-        
-        # Composite
-        result = Image.new('RGBA', img.size, (0, 0, 0, 0))
-        result.paste(glow, (0, 0))
-        result.paste(img, (0, 0), img)
-        
-        return result
+    def _build_render_spec(self) -> RenderSpec:
+        """Snapshot the current customization widgets into a RenderSpec"""
+        return RenderSpec(
+            shape=self.current_shape,
+            radius=int(self.radius_slider.get()),
+            fill_mode=self.color_mode.get().lower(),
+            pattern=self.current_pattern,
+            font=self.current_font,
+            font_size=int(self.font_size_slider.get()),
+            text_position=self.text_position.get().lower(),
+            show_text=self.show_text_var.get(),
+            shadow=self.shadow_var.get(),
+            glow=self.glow_var.get(),
+            border=self.border_var.get(),
+            opacity=int(self.opacity_slider.get()),
+            sizes=self._export_sizes()
+        )
     
-    def _add_text_to_icon(self, draw, text, size):
-        """Add text to icon"""
-        try:
-            # Load font
-            font_size = int(size * 0.15)
-            font = ImageFont.truetype("arial.ttf", font_size)
-        except:
-            font = ImageFont.load_default()
-        
-        # Calculate text position
-        text_bbox = draw.textbbox((0, 0), text, font=font)
-        text_width = text_bbox[2] - text_bbox[0]
-        text_height = text_bbox[3] - text_bbox[1]
-        
-        x = (size - text_width) // 2
-        y = size - text_height - int(size * 0.1)
-        
-        # Draw text with outline for visibility
-        outline_color = "black" if self._is_light_color(self.profiles[0].get('color', '#ffffff')) else "white"
-        
-        # Draw outline
-        for dx, dy in [(-1, -1), (-1, 1), (1, -1), (1, 1)]:
-            draw.text((x + dx, y + dy), text, font=font, fill=outline_color)
-        
-        # Draw text
-        text_color = "white" if not self._is_light_color(self.profiles[0].get('color', '#ffffff')) else "black"
-        draw.text((x, y), text, font=font, fill=text_color)
+    def _export_sizes(self):
+        """Frame sizes needed by the selected export formats"""
+        return required_sizes(self.export_formats) or FORMAT_SIZES["ico"]
     
     def _is_light_color(self, hex_color):
         """Check if color is light or dark"""
-        if isinstance(hex_color, dict):
-            hex_color = hex_color.get('hex', '#ffffff')
-        
-        # Convert hex to RGB
-        hex_color = hex_color.lstrip('#')
-        r, g, b = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-        
-        # Calculate luminance
-        luminance = (0.299 * r + 0.587 * g + 0.114 * b) / 255
-        
-        return luminance > 0.5
+        return is_light_color(hex_color)
     
     def _create_shortcuts(self):
         """Create desktop shortcuts for profiles"""
@@ -1170,7 +1187,7 @@ class ModernProfilePop(ctk.CTk):
             export_data = {
                 "version": __version__,
                 "browser": self.current_browser,
-                "profiles": self.profiles,
+                "profiles": profiles_to_json(self.profiles),
                 "settings": {
                     "shape": self.current_shape,
                     "font": self.current_font,
@@ -1200,8 +1217,10 @@ class ModernProfilePop(ctk.CTk):
                     import_data = json.load(f)
                 
                 # Load profiles
-                self.profiles = import_data.get("profiles", [])
+                self.profiles = profiles_from_json(import_data.get("profiles", []))
                 self.current_browser = import_data.get("browser", "chrome")
+                for profile in self.profiles:
+                    self.catalog.add(profile)
                 
                 # Load settings
                 settings = import_data.get("settings", {})
@@ -1267,6 +1286,23 @@ class ModernProfilePop(ctk.CTk):
         )
         clear_cache_btn.pack(pady=10)
         
+        # Export formats
+        formats_label = ctk.CTkLabel(advanced_tab, text="Export Formats:")
+        formats_label.pack(pady=5)
+        
+        formats_frame = ctk.CTkFrame(advanced_tab, fg_color="transparent")
+        formats_frame.pack(pady=5)
+        for fmt in EXPORT_FORMATS:
+            format_var = tk.BooleanVar(value=fmt in self.export_formats)
+            self.format_vars[fmt] = format_var
+            format_check = ctk.CTkCheckBox(
+                formats_frame,
+                text=fmt.upper(),
+                variable=format_var,
+                command=lambda f=fmt, v=format_var: self._toggle_export_format(f, v.get())
+            )
+            format_check.pack(side="left", padx=5)
+        
         # Export/Import settings
         export_settings_btn = ctk.CTkButton(
             advanced_tab,
@@ -1399,6 +1435,11 @@ Report issues on GitHub
         """Update color mode"""
         self._update_preview()
     
+    def _update_pattern(self, pattern):
+        """Update fill pattern"""
+        self.current_pattern = pattern.lower()
+        self._update_preview()
+    
     def _select_color(self, color_info):
         """Select color from palette"""
         if self.selected_profile_index is not None:
@@ -1441,7 +1482,11 @@ Report issues on GitHub
     def _clear_cache(self):
         """Clear icon cache"""
         self._image_cache.clear()
+        self.text_layout.clear()
+        self.glyph_cache.clear()
+        self.parse_cache.clear()
         self._icon_preview_cache.clear()
+        self.render_cache.clear()
         messagebox.showinfo("Success", "Cache cleared successfully")
     
     def _export_settings(self):
@@ -1496,6 +1541,17 @@ Report issues on GitHub
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to import settings: {str(e)}")
     
+    def _toggle_export_format(self, fmt, enabled):
+        """Add or remove an export format, keeping at least one selected"""
+        selected = set(self.export_formats)
+        if enabled:
+            selected.add(fmt)
+        elif len(selected) > 1:
+            selected.discard(fmt)
+        else:
+            self.format_vars[fmt].set(True)  # The last format stays checked
+        self.export_formats = [f for f in EXPORT_FORMATS if f in selected]
+    
     def _load_settings(self):
         """Load saved settings from file"""
         settings_file = "profilepop_settings.json"
@@ -1504,6 +1560,17 @@ Report issues on GitHub
                 with open(settings_file, 'r') as f:
                     settings = json.load(f)
                 # Apply settings
+                self.max_workers = settings.get("max_workers", self.max_workers)
+                self.export_formats = [
+                    f for f in settings.get("export_formats", self.export_formats) if f in EXPORT_FORMATS
+                ] or ["ico"]
+                for fmt, format_var in self.format_vars.items():
+                    format_var.set(fmt in self.export_formats)
+                pattern = settings.get("pattern", self.current_pattern)
+                if pattern in PATTERN_TYPES:
+                    self.current_pattern = pattern
+                    self.pattern_menu.set(pattern.capitalize())
+                self.render_cache.max_bytes = settings.get("cache_max_bytes", self.render_cache.max_bytes)
                 # ... (implementation)
             except Exception as e:
                 logger.error(f"Error loading settings: {e}")
@@ -1515,6 +1582,10 @@ Report issues on GitHub
             "theme": self.theme_mode,
             "shape": self.current_shape,
             "font": self.current_font,
+            "pattern": self.current_pattern,
+            "max_workers": self.max_workers,
+            "export_formats": self.export_formats,
+            "cache_max_bytes": self.render_cache.max_bytes,
             # ... more settings
         }
         
@@ -1526,6 +1597,9 @@ Report issues on GitHub
     
     def _start_background_tasks(self):
         """Start background tasks for performance"""
+        # Index system fonts off the Tk thread before the first preview needs them
+        threading.Thread(target=self._font_cache.families, name="font-index", daemon=True).start()
+        
         # Auto-save timer
         self.after(60000, self._auto_save)  # Auto-save every minute
     
@@ -1534,14 +1608,11 @@ Report issues on GitHub
         self._save_settings()
         self.after(60000, self._auto_save)  # Schedule next save
 
-# Import required for math functions
-from math import cos, sin
-from PIL import ImageEnhance
-
 def main():
     """Main entry point"""
     app = ModernProfilePop()
     app.mainloop()
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Needed for worker processes in frozen builds
     main()
\ No newline at end of file
@@ -0,0 +1,19 @@
+"""
+Shared pytest fixtures for ProfilePop
+"""
+
+import pytest
+
+import icon_assets
+import profile_discovery
+import render_cache
+
+
+@pytest.fixture(scope="session", autouse=True)
+def cache_dir(tmp_path_factory):
+    """Keep default caches, such as the font index, out of the user's cache directory"""
+    path = str(tmp_path_factory.mktemp("cache"))
+    with pytest.MonkeyPatch.context() as patch:
+        for module in (render_cache, icon_assets, profile_discovery):
+            patch.setattr(module, "default_cache_dir", lambda: path)
+        yield path
@@ -0,0 +1,286 @@
+"""
+Shared render assets for ProfilePop
+Indexes browser logos and system fonts once and keeps loaded copies in memory
+"""
+
+import hashlib
+import json
+import logging
+import os
+import platform
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from PIL import Image, ImageFont
+
+from render_cache import default_cache_dir
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOGO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logos")
+
+# Shipped logo files for each browser key; other browsers are matched by name
+LOGO_FILES = {
+    "chrome": "google-chrome-logo-main-icon.png",
+    "edge": "microsoft-edge-browser-logo-blue-green-gradient-icon.png",
+    "firefox": "firefox-browser-logo-red-yellow-blue-circle-icon.png",
+}
+
+LOGO_EXTENSIONS = (".png", ".webp", ".jpg", ".jpeg")
+
+BROWSER_KEYS = ("chrome", "edge", "firefox", "brave", "opera", "vivaldi", "safari")
+
+
+class LogoIndex:
+    """Maps browser keys to logo files and serves decoded, resized logos
+
+    The logo directory is scanned once on construction. Each logo is
+    decoded on first use and every requested pixel size is resized once,
+    so a batch costs one decode per browser.
+    """
+
+    def __init__(self, logo_dir: str = DEFAULT_LOGO_DIR):
+        self.logo_dir = logo_dir
+        self.paths: Dict[str, str] = self._scan()
+        self._lock = threading.Lock()
+        self._sources: Dict[str, Image.Image] = {}
+        self._scaled: Dict[Tuple[str, int], Image.Image] = {}
+        self._digests: Dict[str, str] = {}
+
+    def __getstate__(self):
+        # Ship only the path map; worker processes decode their own copies
+        return {'logo_dir': self.logo_dir, 'paths': self.paths}
+
+    def __setstate__(self, state):
+        self.logo_dir = state['logo_dir']
+        self.paths = state['paths']
+        self._lock = threading.Lock()
+        self._sources = {}
+        self._scaled = {}
+        self._digests = {}
+
+    def _scan(self) -> Dict[str, str]:
+        """Resolve a logo file for every browser key found in logo_dir"""
+        try:
+            files = sorted(f for f in os.listdir(self.logo_dir) if f.lower().endswith(LOGO_EXTENSIONS))
+        except OSError:
+            logger.warning(f"Logo directory not found: {self.logo_dir}")
+            return {}
+
+        paths = {}
+        for browser in BROWSER_KEYS:
+            filename = LOGO_FILES.get(browser)
+            if filename not in files:
+                # Fall back to any file naming the browser, e.g. "brave-logo.png"
+                filename = next((f for f in files if browser in f.lower()), None)
+            if filename:
+                paths[browser] = os.path.join(self.logo_dir, filename)
+        return paths
+
+    def path(self, browser: str) -> Optional[str]:
+        """Return the logo file for a browser, if one is available"""
+        return self.paths.get(browser)
+
+    def digest(self, browser: str) -> str:
+        """Hash of the logo file bytes, empty when the browser has no logo"""
+        digest = self._digests.get(browser)
+        if digest is None:
+            digest = ""
+            path = self.path(browser)
+            if path:
+                try:
+                    with open(path, 'rb') as f:
+                        digest = hashlib.sha256(f.read()).hexdigest()
+                except OSError as e:
+                    logger.warning(f"Could not read logo {path}: {e}")
+            self._digests[browser] = digest
+        return digest
+
+    def get(self, browser: str, size: int) -> Optional[Image.Image]:
+        """Return the logo as RGBA scaled to size x size"""
+        key = (browser, size)
+        logo = self._scaled.get(key)
+        if logo is not None:
+            return logo
+
+        with self._lock:
+            logo = self._scaled.get(key)
+            if logo is None:
+                source = self._source(browser)
+                if source is None:
+                    return None
+                logo = source.resize((size, size), Image.Resampling.LANCZOS)
+                self._scaled[key] = logo
+        return logo
+
+    def _source(self, browser: str) -> Optional[Image.Image]:
+        source = self._sources.get(browser)
+        if source is None:
+            path = self.path(browser)
+            if not path:
+                return None
+            try:
+                with Image.open(path) as img:
+                    source = img.convert('RGBA')
+            except OSError as e:
+                logger.warning(f"Could not decode logo {path}: {e}")
+                return None
+            self._sources[browser] = source
+        return source
+
+    def preload(self, browsers: Iterable[str], sizes: Iterable[int]):
+        """Decode and scale logos ahead of a batch"""
+        sizes = list(sizes)
+        for browser in browsers:
+            for size in sizes:
+                self.get(browser, size)
+
+
+FONT_EXTENSIONS = (".ttf", ".otf", ".ttc")
+
+# Families tried in order when the requested one is not installed
+FONT_FALLBACKS = {
+    "segoe ui": ["segoe ui", "helvetica", "arial", "ubuntu", "dejavu sans"],
+    "arial": ["arial", "liberation sans", "helvetica", "dejavu sans"],
+    "helvetica": ["helvetica", "helvetica neue", "arial", "liberation sans", "dejavu sans"],
+    "roboto": ["roboto", "noto sans", "open sans", "dejavu sans"],
+    "ubuntu": ["ubuntu", "noto sans", "dejavu sans"],
+}
+GENERIC_FALLBACKS = ["dejavu sans", "liberation sans", "noto sans", "arial", "helvetica"]
+
+# Preferred faces when a family has several styles
+STYLE_RANK = ["regular", "book", "roman", "normal", "medium"]
+
+
+def system_font_dirs() -> List[str]:
+    """Return the font directories for the current OS"""
+    if platform.system() == "Windows":
+        windir = os.environ.get("WINDIR", "C:\\Windows")
+        return [
+            os.path.join(windir, "Fonts"),
+            os.path.join(os.environ.get("LOCALAPPDATA", ""), "Microsoft", "Windows", "Fonts"),
+        ]
+    if platform.system() == "Darwin":
+        return ["/System/Library/Fonts", "/Library/Fonts", os.path.expanduser("~/Library/Fonts")]
+    return [
+        "/usr/share/fonts",
+        "/usr/local/share/fonts",
+        os.path.expanduser("~/.fonts"),
+        os.path.expanduser("~/.local/share/fonts"),
+    ]
+
+
+class FontResolver:
+    """Maps font family names to installed font files and memoizes fonts
+
+    The font directories are scanned on first use. The family index is
+    stored in the cache directory and reused on later launches until a
+    font directory changes. Loaded fonts are kept per (family, size).
+    """
+
+    def __init__(self, font_dirs: Optional[List[str]] = None, index_path: Optional[str] = None):
+        self.font_dirs = font_dirs if font_dirs is not None else system_font_dirs()
+        self.index_path = index_path or os.path.join(default_cache_dir(), "fonts.json")
+        self._lock = threading.Lock()
+        self._families: Optional[Dict[str, Dict[str, str]]] = None
+        self._resolved: Dict[str, Optional[str]] = {}
+        self._fonts: Dict[Tuple[str, int], ImageFont.ImageFont] = {}
+
+    def __getstate__(self):
+        # Ship the scanned index; font objects are reloaded per process
+        state = self.__dict__.copy()
+        del state['_lock']
+        state['_fonts'] = {}
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _dir_signature(self) -> List[Tuple[str, int]]:
+        """Modification times of every font directory, to detect changes"""
+        signature = []
+        for font_dir in self.font_dirs:
+            for root, _, _ in os.walk(font_dir):
+                try:
+                    signature.append((root, os.stat(root).st_mtime_ns))
+                except OSError:
+                    pass
+        return sorted(signature)
+
+    def _scan(self) -> Dict[str, Dict[str, str]]:
+        families: Dict[str, Dict[str, str]] = {}
+        for font_dir in self.font_dirs:
+            for root, _, files in os.walk(font_dir):
+                for filename in sorted(files):
+                    if not filename.lower().endswith(FONT_EXTENSIONS):
+                        continue
+                    path = os.path.join(root, filename)
+                    try:
+                        family, style = ImageFont.truetype(path, 10).getname()
+                    except (OSError, ValueError):
+                        continue
+                    families.setdefault(family.lower(), {}).setdefault((style or "").lower(), path)
+        return families
+
+    def _load_index(self) -> Dict[str, Dict[str, str]]:
+        if self._families is not None:
+            return self._families
+
+        with self._lock:
+            if self._families is not None:
+                return self._families
+
+            signature = [list(entry) for entry in self._dir_signature()]
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    cached = json.load(f)
+                if cached.get("signature") == signature:
+                    self._families = cached["families"]
+                    return self._families
+            except (OSError, ValueError, KeyError):
+                pass
+
+            self._families = self._scan()
+            try:
+                os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+                with open(self.index_path, 'w', encoding='utf-8') as f:
+                    json.dump({"signature": signature, "families": self._families}, f)
+            except OSError as e:
+                logger.warning(f"Could not save font index: {e}")
+            return self._families
+
+    def families(self) -> List[str]:
+        """Return the installed family names (lower case)"""
+        return sorted(self._load_index())
+
+    def resolve(self, family: str) -> Optional[str]:
+        """Return the font file for a family, following fallbacks"""
+        key = family.lower()
+        if key in self._resolved:
+            return self._resolved[key]
+
+        families = self._load_index()
+        path = None
+        for candidate in [key] + FONT_FALLBACKS.get(key, []) + GENERIC_FALLBACKS:
+            styles = families.get(candidate)
+            if styles:
+                style = next((s for s in STYLE_RANK if s in styles), None)
+                path = styles[style] if style else styles[sorted(styles)[0]]
+                break
+
+        self._resolved[key] = path
+        return path
+
+    def font(self, family: str, size: int) -> ImageFont.ImageFont:
+        """Return a loaded font, parsing each (family, size) only once"""
+        key = (family, size)
+        font = self._fonts.get(key)
+        if font is None:
+            path = self.resolve(family)
+            try:
+                font = ImageFont.truetype(path, size) if path else ImageFont.load_default(size)
+            except OSError:
+                font = ImageFont.load_default(size)
+            self._fonts[key] = font
+        return font
@@ -0,0 +1,93 @@
+"""
+Badge overlays for ProfilePop icons
+Draws small corner badges (labels, counts, emoji) as layers composited over cached base icons
+"""
+
+from typing import Dict, NamedTuple, Optional, Tuple, Union
+
+from PIL import Image, ImageDraw
+
+from icon_text import TextFit, TextLayout
+
+BADGE_POSITIONS = ["top-right", "top-left", "bottom-right", "bottom-left"]
+
+# Below this icon size the badge is a plain status dot
+MIN_BADGE_TEXT_SIZE = 32
+
+# Longest badge label; counts above 99 are shown as "99+"
+MAX_BADGE_CHARS = 3
+
+
+def badge_text(value: Union[str, int, None]) -> Optional[str]:
+    """Normalize a profile badge value to its label, None when there is no badge"""
+    if value is None or value == "" or value is False:
+        return None
+    if isinstance(value, bool):
+        return ""
+    if isinstance(value, int):
+        return "99+" if value > 99 else str(value)
+    return str(value)[:MAX_BADGE_CHARS]
+
+
+class BadgeBox(NamedTuple):
+    """Geometry of a badge at one icon size"""
+    width: int
+    height: int
+    ring: int
+    fit: Optional[TextFit]
+
+
+def badge_box(text: str, size: int, scale_pct: int, layout: TextLayout, font: str) -> BadgeBox:
+    """Measure a badge: a circle, or a pill for longer labels, with a ring
+
+    An empty label, or a size below MIN_BADGE_TEXT_SIZE, gives a plain
+    status dot two thirds of the badge height.
+    """
+    diameter = max(4, size * scale_pct // 100)
+    if not text or size < MIN_BADGE_TEXT_SIZE:
+        diameter = max(4, diameter * 2 // 3)
+        return BadgeBox(diameter, diameter, max(1, diameter // 12), None)
+
+    fit = layout.fit(text, font, int(diameter * 0.6), diameter * 2, min_size=max(1, diameter // 4))
+    width = max(diameter, fit.width + diameter // 2)
+    return BadgeBox(width, diameter, max(1, diameter // 12), fit)
+
+
+def badge_layer(text: str, size: int, color: str, scale_pct: int, layout: TextLayout,
+                font: str) -> Image.Image:
+    """Render a badge for one icon size as a small RGBA layer"""
+    box = badge_box(text, size, scale_pct, layout, font)
+    width, height, ring = box.width, box.height, box.ring
+
+    layer = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(layer)
+    draw.rounded_rectangle([0, 0, width - 1, height - 1], radius=height // 2, fill="white")
+    draw.rounded_rectangle([ring, ring, width - 1 - ring, height - 1 - ring],
+                           radius=height // 2 - ring, fill=color)
+
+    if box.fit is not None:
+        strip = layout.strip(box.fit.text, font, box.fit.size, "white", color)
+        layer.alpha_composite(strip, dest=((width - strip.width) // 2, (height - strip.height) // 2))
+    return layer
+
+
+def badge_position(width: int, height: int, size: int, position: str) -> Tuple[int, int]:
+    """Top-left corner at which a badge of width x height sits in an icon"""
+    right = size - width
+    bottom = size - height
+    return {
+        "top-left": (0, 0),
+        "bottom-right": (right, bottom),
+        "bottom-left": (0, bottom),
+    }.get(position, (right, 0))
+
+
+def profile_badge(profile: Dict, shape: str) -> Optional[str]:
+    """Return the badge label for a profile
+
+    The "badge" shape always carries a badge, falling back to a dot.
+    """
+    text = badge_text(profile.get('badge'))
+    if text is None and shape == "badge":
+        return ""
+    return text
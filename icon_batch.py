@@ -0,0 +1,298 @@
+"""
+Parallel batch icon generation for ProfilePop
+Fans icon rendering across worker processes and streams results back
+"""
+
+import hashlib
+import logging
+import multiprocessing
+import os
+import shutil
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from icon_export import VECTOR_FORMATS, export_frames, unlink_existing
+from icon_manifest import OutputManifest, profile_key
+from icon_renderer import IconRenderer
+from icon_svg import copy_logos, write_svg
+from render_cache import RenderCache
+
+logger = logging.getLogger(__name__)
+
+# Batches smaller than this render in-process; spawning workers costs more
+MIN_PARALLEL_BATCH = 4
+
+
+class BatchResult(NamedTuple):
+    """Outcome of rendering one profile in a batch"""
+    index: int
+    profile: Dict
+    path: Optional[str]
+    error: Optional[str] = None
+    cached: bool = False
+    outputs: Optional[Dict[str, List[str]]] = None
+    unchanged: bool = False
+    deduplicated: bool = False
+
+    def paths(self) -> List[str]:
+        """Every file written for the profile"""
+        if self.outputs:
+            return [path for paths in self.outputs.values() for path in paths]
+        return [self.path] if self.path else []
+
+
+def icon_stem(profile: Dict) -> str:
+    """Return the base file name used for a profile's exports"""
+    return profile['name'].replace(' ', '_')
+
+
+def icon_filename(profile: Dict) -> str:
+    """Return the ICO file name used for a profile"""
+    return f"{icon_stem(profile)}.ico"
+
+
+def unique_stems(profiles: List[Dict], previous: Optional[List[Optional[str]]] = None) -> List[str]:
+    """Return a distinct file stem per profile
+
+    Profiles sharing a name get their profile id appended, so two "Work"
+    profiles no longer overwrite each other's icons. previous holds the
+    stem each profile was last written under; it is kept while it still
+    matches the profile's name, so inserting a same-name profile earlier
+    in the list does not move existing icons to other files.
+    """
+    seen = set()
+    stems: List[Optional[str]] = [None] * len(profiles)
+    for i, (profile, stem) in enumerate(zip(profiles, previous or [])):
+        base = icon_stem(profile).lower()
+        if stem and stem.lower() not in seen and (stem.lower() == base or stem.lower().startswith(base + "_")):
+            seen.add(stem.lower())
+            stems[i] = stem
+    for i, profile in enumerate(profiles):
+        if stems[i] is not None:
+            continue
+        stem = icon_stem(profile)
+        if stem.lower() in seen:
+            suffix = str(profile.get('id', '')).replace(' ', '_').replace(os.sep, '_')
+            stem = f"{stem}_{suffix}" if suffix else stem
+            base, n = stem, 2
+            while stem.lower() in seen:
+                stem, n = f"{base}_{n}", n + 1
+        seen.add(stem.lower())
+        stems[i] = stem
+    return stems
+
+
+def link_or_copy(source: str, target: str) -> str:
+    """Hard-link target to source, copying where links are unsupported"""
+    if os.path.abspath(source) == os.path.abspath(target):
+        return target
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+    unlink_existing(target)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+    return target
+
+
+def _retarget(path: str, fmt: str, new_stem: str) -> str:
+    """Map one profile's output path to the same output for another stem
+
+    Only the component named after the profile changes: the folder of a
+    favicon set, the file name for every other format.
+    """
+    folder, filename = os.path.split(path)
+    if fmt == "favicon":
+        return os.path.join(os.path.dirname(folder), new_stem, filename)
+    return os.path.join(folder, new_stem + os.path.splitext(filename)[1])
+
+
+def export_icon(renderer: IconRenderer, profile: Dict, output_dir: str, formats: Sequence[str],
+                logo_base: Optional[str] = None, stem: Optional[str] = None) -> Dict[str, List[str]]:
+    """Render a profile once and encode it into every requested format
+
+    SVG is emitted straight from the spec; the profile is only rasterized
+    when a raster format is requested.
+    """
+    stem = stem or icon_stem(profile)
+    outputs = {}
+    if "svg" in formats:
+        svg_path = os.path.join(output_dir, f"{stem}.svg")
+        outputs["svg"] = [write_svg(renderer, profile, svg_path, logo_base=logo_base)]
+    raster = [fmt for fmt in formats if fmt not in VECTOR_FORMATS]
+    if raster:
+        outputs.update(export_frames(renderer.render(profile), output_dir, stem, raster))
+    return outputs
+
+
+# Per-process renderer, installed once by the pool initializer so each task
+# only ships the small profile dict instead of re-pickling the renderer.
+_worker_renderer: Optional[IconRenderer] = None
+
+
+def _init_worker(renderer: IconRenderer, browsers: Sequence[str] = ()):
+    global _worker_renderer
+    _worker_renderer = renderer
+    renderer.preload_logos(browsers)
+
+
+def _render_task(index: int, profile: Dict, output_path: str,
+                 formats: Tuple[str, ...] = ("ico",), logo_base: Optional[str] = None) -> BatchResult:
+    try:
+        stem = os.path.splitext(os.path.basename(output_path))[0]
+        outputs = export_icon(_worker_renderer, profile, os.path.dirname(output_path), formats, logo_base, stem)
+        primary = outputs["ico"][0] if "ico" in outputs else outputs[formats[0]][0]
+        return BatchResult(index, profile, primary, outputs=outputs)
+    except Exception as e:
+        logger.error(f"Error generating icon for {profile.get('name')}: {e}")
+        return BatchResult(index, profile, None, str(e))
+
+
+def spawn_pool(**kwargs) -> ProcessPoolExecutor:
+    """Process pool whose workers start fresh instead of forking
+
+    Forking the app would copy its Tk, watcher and metadata threads'
+    locks mid-use, which can deadlock a worker; spawned workers receive
+    the renderer through its pickling hooks instead.
+    """
+    return ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn"), **kwargs)
+
+
+class BatchIconGenerator:
+    """Generates icons for many profiles across a process pool
+
+    Results are yielded in order of completion so callers can update
+    progress as soon as each icon is written. With a RenderCache, icons
+    whose inputs were rendered before are copied from disk instead.
+
+    formats selects the export formats; every format is encoded from one
+    render per profile. The render cache only covers ICO-only batches.
+
+    Profiles with identical render inputs are rendered once per batch and
+    their files hard-linked to the other destinations; renders_saved
+    counts the renders skipped this way.
+
+    With incremental generation an OutputManifest in output_dir records
+    each profile's input digest; unchanged profiles are skipped and the
+    files of profiles that disappeared are deleted (listed in removed).
+    """
+
+    def __init__(self, renderer: IconRenderer, max_workers: Optional[int] = None,
+                 executor_factory: Callable[..., Executor] = spawn_pool,
+                 cache: Optional[RenderCache] = None, formats: Sequence[str] = ("ico",)):
+        self.renderer = renderer
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.executor_factory = executor_factory
+        self.formats = tuple(formats)
+        self.cache = cache if self.formats == ("ico",) else None
+        self.removed: List[str] = []
+        self.renders_saved = 0
+
+    def input_digest(self, render_key: str, stem: str) -> str:
+        """Digest of a profile's render key, output stem and the export formats"""
+        data = f"{render_key}:{stem}:{','.join(self.formats)}"
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+    def generate(self, profiles: List[Dict], output_dir: str, incremental: bool = False) -> Iterator[BatchResult]:
+        """Render every profile into output_dir, yielding results as they finish"""
+        os.makedirs(output_dir, exist_ok=True)
+        manifest = OutputManifest(output_dir) if incremental else None
+        self.removed = []
+        self.renders_saved = 0
+        logo_base = None
+        if "svg" in self.formats:
+            # SVGs link one shared copy of each logo instead of inlining it
+            logo_base = copy_logos(self.renderer, (p.get('browser', 'chrome') for p in profiles), output_dir)
+
+        previous = [manifest.stem(profile_key(p)) for p in profiles] if manifest is not None else None
+        stems = unique_stems(profiles, previous)
+        keys = [self.renderer.cache_key(profile) for profile in profiles]
+        digests = [self.input_digest(key, stem) for key, stem in zip(keys, stems)] if manifest is not None else []
+        leaders: Dict[str, int] = {}  # Render key -> index of the profile producing it
+        finished: Dict[int, BatchResult] = {}
+        followers: Dict[int, List[Tuple[int, Dict, str]]] = {}
+        jobs = []
+
+        def completed(result: BatchResult) -> BatchResult:
+            if manifest is not None and result.path:
+                manifest.record(profile_key(result.profile), digests[result.index], result.paths(),
+                                stems[result.index])
+            return result
+
+        for i, profile in enumerate(profiles):
+            output_path = os.path.join(output_dir, f"{stems[i]}.ico")
+            if manifest is not None and manifest.is_current(profile_key(profile), digests[i]):
+                yield BatchResult(i, profile, manifest.outputs(profile_key(profile))[0], unchanged=True)
+                continue
+
+            leader = leaders.get(keys[i])
+            if leader is not None:
+                if leader in finished:
+                    yield completed(self._duplicate(finished[leader], stems, i, profile, output_path))
+                else:
+                    followers.setdefault(leader, []).append((i, profile, output_path))
+                continue
+            leaders[keys[i]] = i
+
+            if self.cache is not None:
+                data = self.cache.get(f"{keys[i]}.ico")
+                if data is not None:
+                    unlink_existing(output_path)
+                    with open(output_path, 'wb') as f:
+                        f.write(data)
+                    finished[i] = completed(BatchResult(i, profile, output_path, cached=True))
+                    yield finished[i]
+                    continue
+            jobs.append((i, profile, output_path, self.formats, logo_base))
+
+        for result in self._render_jobs(jobs):
+            if result.path and self.cache is not None:
+                with open(result.path, 'rb') as f:
+                    self.cache.put(f"{keys[result.index]}.ico", f.read())
+            yield completed(result)
+            for i, profile, output_path in followers.get(result.index, []):
+                yield completed(self._duplicate(result, stems, i, profile, output_path))
+
+        if manifest is not None:
+            self.removed = manifest.prune(profile_key(p) for p in profiles)
+            manifest.save()
+
+    def _duplicate(self, source: BatchResult, stems: List[str], index: int, profile: Dict,
+                   output_path: str) -> BatchResult:
+        """Give a profile the files already written for an identical one"""
+        if source.error:
+            return BatchResult(index, profile, None, source.error)
+
+        self.renders_saved += 1
+        new_stem = stems[index]
+        try:
+            if not source.outputs:
+                return BatchResult(index, profile, link_or_copy(source.path, output_path), deduplicated=True)
+            outputs = {
+                fmt: [link_or_copy(path, _retarget(path, fmt, new_stem)) for path in paths]
+                for fmt, paths in source.outputs.items()
+            }
+            primary = outputs["ico"][0] if "ico" in outputs else outputs[self.formats[0]][0]
+            return BatchResult(index, profile, primary, outputs=outputs, deduplicated=True)
+        except OSError as e:
+            logger.error(f"Error writing icon for {profile.get('name')}: {e}")
+            return BatchResult(index, profile, None, str(e))
+
+    def _render_jobs(self, jobs) -> Iterator[BatchResult]:
+        if not jobs:
+            return
+
+        # Logos are decoded and scaled once per worker before its first job
+        browsers = sorted({job[1].get('browser', 'chrome') for job in jobs})
+        if self.max_workers <= 1 or len(jobs) < MIN_PARALLEL_BATCH:
+            _init_worker(self.renderer, browsers)
+            for job in jobs:
+                yield _render_task(*job)
+            return
+
+        workers = min(self.max_workers, len(jobs))
+        with self.executor_factory(max_workers=workers, initializer=_init_worker,
+                                   initargs=(self.renderer, browsers)) as executor:
+            futures = [executor.submit(_render_task, *job) for job in jobs]
+            for future in as_completed(futures):
+                yield future.result()
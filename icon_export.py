@@ -0,0 +1,233 @@
+"""
+Icon file encoders for ProfilePop
+Writes pre-rendered frames to ICO, ICNS, PNG, WebP and favicon outputs
+"""
+
+import io
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from PIL import Image
+
+# Frames at or above this size are stored as PNG, smaller ones as 32-bit BMP
+ICO_PNG_MIN_SIZE = 256
+ICO_MAX_SIZE = 256
+
+
+def unlink_existing(path: str):
+    """Remove a file before rewriting it
+
+    Batches hard-link identical icons, so writers must create a new file
+    rather than truncate one another profile may share.
+    """
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _ico_bmp(frame: Image.Image) -> bytes:
+    """Encode a frame as an ICO DIB: BITMAPINFOHEADER, BGRA rows, AND mask"""
+    width, height = frame.size
+    flipped = frame.transpose(Image.Transpose.FLIP_TOP_BOTTOM)
+    pixels = flipped.tobytes('raw', 'BGRA')
+
+    # 1 bpp transparency mask, rows padded to 32 bits; set bits are transparent
+    mask = flipped.getchannel('A').point(lambda a: 255 if a == 0 else 0).convert('1', dither=Image.Dither.NONE)
+    packed = mask.tobytes()
+    packed_row = (width + 7) // 8
+    mask_row = ((width + 31) // 32) * 4
+    padding = b'\0' * (mask_row - packed_row)
+    and_mask = b''.join(packed[y * packed_row:(y + 1) * packed_row] + padding for y in range(height))
+
+    header = struct.pack('<IiiHHIIiiII', 40, width, height * 2, 1, 32, 0,
+                         len(pixels) + len(and_mask), 0, 0, 0, 0)
+    return header + pixels + and_mask
+
+
+def _ico_png(frame: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    frame.save(buffer, format='PNG', optimize=False)
+    return buffer.getvalue()
+
+
+def write_ico(frames: Sequence[Image.Image], target: Union[str, BinaryIO],
+              png_min_size: int = ICO_PNG_MIN_SIZE) -> int:
+    """Write frames into a multi-size ICO, embedding each one unchanged
+
+    Large frames are PNG compressed and small ones stored as 32-bit BMP,
+    which is what Windows Explorer and the shell expect. target may be a
+    path or a binary file object; returns the number of bytes written.
+    """
+    if not frames:
+        raise ValueError("An icon needs at least one frame")
+
+    payloads: List[bytes] = []
+    for frame in frames:
+        width, height = frame.size
+        if width > ICO_MAX_SIZE or height > ICO_MAX_SIZE:
+            raise ValueError(f"ICO frames cannot exceed {ICO_MAX_SIZE}px, got {width}x{height}")
+        frame = frame if frame.mode == 'RGBA' else frame.convert('RGBA')
+        payloads.append(_ico_png(frame) if width >= png_min_size else _ico_bmp(frame))
+
+    header = struct.pack('<HHH', 0, 1, len(frames))
+    offset = len(header) + 16 * len(frames)
+    entries = []
+    for frame, payload in zip(frames, payloads):
+        width, height = frame.size
+        # A stored dimension of 0 means 256
+        entries.append(struct.pack('<BBBBHHII', width % 256, height % 256, 0, 0, 1, 32, len(payload), offset))
+        offset += len(payload)
+
+    if isinstance(target, (str, bytes)) or hasattr(target, '__fspath__'):
+        unlink_existing(target)
+        with open(target, 'wb') as f:
+            f.writelines([header, *entries, *payloads])
+    else:
+        target.writelines([header, *entries, *payloads])
+    return offset
+
+
+def encode_ico(frames: Sequence[Image.Image], png_min_size: int = ICO_PNG_MIN_SIZE) -> bytes:
+    """Return frames encoded as ICO file bytes"""
+    buffer = io.BytesIO()
+    write_ico(frames, buffer, png_min_size)
+    return buffer.getvalue()
+
+
+EXPORT_FORMATS = ["ico", "icns", "png", "webp", "favicon", "svg"]
+
+# Formats written from the render spec by icon_svg instead of from frames
+VECTOR_FORMATS = ("svg",)
+
+# Frame sizes each output format embeds
+FORMAT_SIZES = {
+    "svg": (),
+    "ico": (16, 32, 48, 128, 256),
+    "icns": (32, 64, 128, 256, 512, 1024),  # Includes the @2x retina entries
+    "png": (16, 32, 48, 64, 128, 256, 512),  # hicolor theme sizes for .desktop files
+    "webp": (256,),
+    "favicon": (16, 32, 48, 180, 192, 512),
+}
+
+
+def required_sizes(formats: Iterable[str]) -> Tuple[int, ...]:
+    """Return every frame size needed to export the given formats"""
+    sizes = set()
+    for fmt in formats:
+        sizes.update(FORMAT_SIZES[fmt])
+    return tuple(sorted(sizes))
+
+
+class FrameSet:
+    """Rendered frames by size, deriving missing sizes by downsampling
+
+    Missing sizes are reduced from the nearest larger frame, so exporting
+    several formats never re-renders the icon.
+    """
+
+    def __init__(self, frames: Iterable[Image.Image]):
+        self.frames: Dict[int, Image.Image] = {f.size[0]: f for f in frames}
+        if not self.frames:
+            raise ValueError("A frame set needs at least one frame")
+
+    def prepare(self, sizes: Iterable[int]):
+        """Derive every size up front so encoders can share frames across threads"""
+        for size in sorted(set(sizes), reverse=True):
+            self.get(size)
+
+    def get(self, size: int) -> Image.Image:
+        frame = self.frames.get(size)
+        if frame is None:
+            larger = [s for s in self.frames if s > size]
+            source = self.frames[min(larger)] if larger else self.frames[max(self.frames)]
+            frame = source.resize((size, size), Image.Resampling.LANCZOS)
+            self.frames[size] = frame
+        return frame
+
+    def select(self, sizes: Iterable[int]) -> List[Image.Image]:
+        return [self.get(size) for size in sizes]
+
+
+def _save_png(frame: Image.Image, path: str) -> str:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    unlink_existing(path)
+    frame.save(path, format='PNG')
+    return path
+
+
+def _export_ico(frames: FrameSet, output_dir: str, name: str) -> List[str]:
+    path = os.path.join(output_dir, f"{name}.ico")
+    write_ico(frames.select(FORMAT_SIZES["ico"]), path)
+    return [path]
+
+
+def _export_icns(frames: FrameSet, output_dir: str, name: str) -> List[str]:
+    path = os.path.join(output_dir, f"{name}.icns")
+    images = frames.select(FORMAT_SIZES["icns"])
+    unlink_existing(path)
+    images[-1].save(path, format='ICNS', append_images=images[:-1])
+    return [path]
+
+
+def _export_png(frames: FrameSet, output_dir: str, name: str) -> List[str]:
+    return [
+        _save_png(frames.get(size), os.path.join(output_dir, "hicolor", f"{size}x{size}", "apps", f"{name}.png"))
+        for size in FORMAT_SIZES["png"]
+    ]
+
+
+def _export_webp(frames: FrameSet, output_dir: str, name: str) -> List[str]:
+    path = os.path.join(output_dir, f"{name}.webp")
+    unlink_existing(path)
+    frames.get(FORMAT_SIZES["webp"][0]).save(path, format='WEBP', lossless=True)
+    return [path]
+
+
+def _export_favicon(frames: FrameSet, output_dir: str, name: str) -> List[str]:
+    folder = os.path.join(output_dir, "favicon", name)
+    os.makedirs(folder, exist_ok=True)
+    ico_path = os.path.join(folder, "favicon.ico")
+    write_ico(frames.select((16, 32, 48)), ico_path)
+    return [
+        ico_path,
+        _save_png(frames.get(16), os.path.join(folder, "favicon-16x16.png")),
+        _save_png(frames.get(32), os.path.join(folder, "favicon-32x32.png")),
+        _save_png(frames.get(180), os.path.join(folder, "apple-touch-icon.png")),
+        _save_png(frames.get(192), os.path.join(folder, "android-chrome-192x192.png")),
+        _save_png(frames.get(512), os.path.join(folder, "android-chrome-512x512.png")),
+    ]
+
+
+EXPORTERS = {
+    "ico": _export_ico,
+    "icns": _export_icns,
+    "png": _export_png,
+    "webp": _export_webp,
+    "favicon": _export_favicon,
+}
+
+
+def export_frames(frames: Union[FrameSet, Iterable[Image.Image]], output_dir: str, name: str,
+                  formats: Sequence[str] = ("ico",), max_workers: Optional[int] = None) -> Dict[str, List[str]]:
+    """Encode one set of rendered frames into every requested format
+
+    Formats are encoded concurrently on threads; Pillow releases the GIL
+    while compressing, and every format reuses the same frames.
+    """
+    unknown = [fmt for fmt in formats if fmt not in EXPORTERS]
+    if unknown:
+        raise ValueError(f"Unknown export format(s): {', '.join(unknown)}")
+
+    frame_set = frames if isinstance(frames, FrameSet) else FrameSet(frames)
+    frame_set.prepare(required_sizes(formats))
+    os.makedirs(output_dir, exist_ok=True)
+
+    if len(formats) == 1:
+        return {formats[0]: EXPORTERS[formats[0]](frame_set, output_dir, name)}
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(formats)) as executor:
+        futures = {fmt: executor.submit(EXPORTERS[fmt], frame_set, output_dir, name) for fmt in formats}
+        return {fmt: future.result() for fmt, future in futures.items()}
@@ -0,0 +1,208 @@
+"""
+Fill engines for ProfilePop icons
+Builds gradient and pattern fills with bulk Pillow operations instead of per-pixel loops
+"""
+
+import hashlib
+import math
+import random
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple, Union
+
+from PIL import Image, ImageColor, ImageDraw
+
+GRADIENT_TYPES = ["linear", "radial", "angle"]
+PATTERN_TYPES = ["stripes", "dots", "checks", "hatch", "noise"]
+
+# Ramps are built at this resolution and resized per icon size
+RAMP_SIZE = 256
+
+Stop = Tuple[float, str]
+
+
+def lighten(color: str, amount: float = 0.25) -> str:
+    """Return a hex color mixed towards white by amount (0-1)"""
+    r, g, b = (round(c + (255 - c) * amount) for c in ImageColor.getrgb(color)[:3])
+    return f'#{r:02x}{g:02x}{b:02x}'
+
+
+def gradient_stops(color: Union[str, Dict, None], default: str = '#3388de') -> Tuple[str, ...]:
+    """Return the gradient colors for a profile color
+
+    Palette entries carry their own 'gradient'; plain hex colors get a
+    two-stop gradient towards a lighter shade of themselves.
+    """
+    if isinstance(color, dict):
+        if color.get('gradient'):
+            return tuple(color['gradient'])
+        color = color.get('hex')
+    color = color or default
+    return (color, lighten(color))
+
+
+def normalize_stops(stops: Sequence[Union[str, Stop]]) -> Tuple[Stop, ...]:
+    """Turn colors or (position, color) pairs into sorted, positioned stops
+
+    Bare colors are spaced evenly between 0 and 1.
+    """
+    if not stops:
+        raise ValueError("A gradient needs at least one color stop")
+    if all(isinstance(stop, str) for stop in stops):
+        if len(stops) == 1:
+            return ((0.0, stops[0]), (1.0, stops[0]))
+        last = len(stops) - 1
+        return tuple((i / last, stop) for i, stop in enumerate(stops))
+    return tuple(sorted((float(pos), color) for pos, color in stops))
+
+
+@lru_cache(maxsize=256)
+def stops_palette(stops: Tuple[Stop, ...]) -> List[int]:
+    """Interpolate stops into a 256 entry RGB palette"""
+    points = [(pos, ImageColor.getrgb(color)[:3]) for pos, color in stops]
+    palette = []
+    for i in range(256):
+        t = i / 255
+        if t <= points[0][0]:
+            rgb = points[0][1]
+        elif t >= points[-1][0]:
+            rgb = points[-1][1]
+        else:
+            for (p0, c0), (p1, c1) in zip(points, points[1:]):
+                if p0 <= t <= p1:
+                    f = (t - p0) / (p1 - p0) if p1 > p0 else 0.0
+                    rgb = tuple(round(a + (b - a) * f) for a, b in zip(c0, c1))
+                    break
+        palette.extend(rgb)
+    return palette
+
+
+def _linear_ramp(angle: int) -> Image.Image:
+    """Ramp running from 0 to 255 along the given direction
+
+    0 degrees runs left to right and 90 degrees top to bottom.
+    """
+    diagonal = math.ceil(RAMP_SIZE * math.sqrt(2))
+    ramp = Image.linear_gradient('L').resize((diagonal, diagonal))
+    ramp = ramp.rotate(90 - angle, resample=Image.Resampling.BICUBIC)
+    offset = (diagonal - RAMP_SIZE) // 2
+    ramp = ramp.crop((offset, offset, offset + RAMP_SIZE, offset + RAMP_SIZE))
+    # Stretch so the first and last stops touch the icon edges
+    lo, hi = ramp.getextrema()
+    return ramp.point(lambda v: max(0, min(255, (v - lo) * 255 // max(1, hi - lo))))
+
+
+def _radial_ramp() -> Image.Image:
+    """Ramp from 0 at the center to 255 at the inscribed circle"""
+    # Pillow's radial gradient reaches 255 at the corners, 181 at the edges
+    return Image.radial_gradient('L').point(lambda v: min(255, v * 255 // 181))
+
+
+def _angle_ramp(angle: int) -> Image.Image:
+    """Conic ramp sweeping clockwise from the given start angle"""
+    ramp = Image.new('L', (RAMP_SIZE, RAMP_SIZE), 0)
+    draw = ImageDraw.Draw(ramp)
+    reach = RAMP_SIZE  # Slices extend past the corners
+    box = [RAMP_SIZE / 2 - reach, RAMP_SIZE / 2 - reach, RAMP_SIZE / 2 + reach, RAMP_SIZE / 2 + reach]
+    step = 360 / 256
+    for i in range(256):
+        draw.pieslice(box, angle + i * step, angle + (i + 1) * step + 0.5, fill=i)
+    return ramp
+
+
+@lru_cache(maxsize=128)
+def gradient_ramp(kind: str, angle: int, size: int) -> Image.Image:
+    """Palette-mode ramp for a gradient shape at one icon size
+
+    Ramps depend only on geometry, so they are built once per
+    (kind, angle, size) and recolored per profile.
+    """
+    if kind == "radial":
+        ramp = _radial_ramp()
+    elif kind == "angle":
+        ramp = _angle_ramp(angle)
+    else:
+        ramp = _linear_ramp(angle)
+
+    if ramp.size != (size, size):
+        ramp = ramp.resize((size, size), Image.Resampling.BILINEAR)
+    return ramp.convert('P')
+
+
+def gradient_fill(stops: Sequence[Union[str, Stop]], size: int,
+                  kind: str = "linear", angle: int = 90) -> Image.Image:
+    """Render a gradient as an RGBA image of size x size
+
+    Coloring is a palette swap on a cached ramp followed by a single
+    conversion, so the per-profile cost matches a solid fill.
+    """
+    fill = gradient_ramp(kind, int(angle) % 360, size).copy()
+    fill.putpalette(stops_palette(normalize_stops(tuple(stops))))
+    return fill.convert('RGBA')
+
+
+@lru_cache(maxsize=256)
+def pattern_tile(pattern: str, scale: int, colors: Tuple[str, str]) -> Image.Image:
+    """Build one seamless RGBA tile of a pattern
+
+    scale is the feature size in pixels; tiles are 2 * scale square.
+    """
+    scale = max(1, scale)
+    side = 2 * scale
+    background, foreground = colors
+
+    if pattern == "noise":
+        # Seeded from the inputs so identical specs render identical pixels
+        seed = hashlib.sha256(f"{scale}:{background}:{foreground}".encode()).digest()
+        noise_side = 16
+        cells = Image.frombytes('L', (noise_side, noise_side), random.Random(seed).randbytes(noise_side * noise_side))
+        tile = cells.resize((noise_side * scale, noise_side * scale), Image.Resampling.NEAREST).convert('P')
+        tile.putpalette(stops_palette(normalize_stops(colors)))
+        return tile.convert('RGBA')
+
+    tile = Image.new('RGBA', (side, side), background)
+    draw = ImageDraw.Draw(tile)
+    if pattern == "dots":
+        inset = scale // 2
+        draw.ellipse([inset, inset, inset + scale - 1, inset + scale - 1], fill=foreground)
+    elif pattern == "checks":
+        draw.rectangle([0, 0, scale - 1, scale - 1], fill=foreground)
+        draw.rectangle([scale, scale, side - 1, side - 1], fill=foreground)
+    elif pattern == "hatch":
+        width = max(1, scale // 2)
+        for offset in (-side, 0, side):
+            draw.line([(offset, side), (offset + side, 0)], fill=foreground, width=width)
+    else:  # stripes
+        draw.rectangle([0, 0, side - 1, scale - 1], fill=foreground)
+    return tile
+
+
+def tile_image(tile: Image.Image, size: int) -> Image.Image:
+    """Repeat a tile across a size x size canvas
+
+    The covered area doubles with every paste, so filling the canvas
+    takes a logarithmic number of bulk copies.
+    """
+    width, height = tile.size
+    canvas = Image.new(tile.mode, (size, size))
+    canvas.paste(tile, (0, 0))
+
+    filled = width
+    while filled < size:
+        canvas.paste(canvas.crop((0, 0, filled, height)), (filled, 0))
+        filled *= 2
+    filled = height
+    while filled < size:
+        canvas.paste(canvas.crop((0, 0, size, filled)), (0, filled))
+        filled *= 2
+    return canvas
+
+
+@lru_cache(maxsize=64)
+def _pattern_canvas(pattern: str, scale: int, colors: Tuple[str, str], size: int) -> Image.Image:
+    return tile_image(pattern_tile(pattern, scale, colors), size)
+
+
+def pattern_fill(pattern: str, scale: int, colors: Sequence[str], size: int) -> Image.Image:
+    """Render a tiled pattern as an RGBA image of size x size"""
+    colors = tuple(colors)
+    return _pattern_canvas(pattern, scale, (colors[0], colors[-1]), size).copy()
@@ -0,0 +1,154 @@
+"""
+Glyph rasterizing for ProfilePop icons
+Draws template emoji and symbol glyphs, in color where an emoji font is installed, once per size
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+from icon_assets import FontResolver
+
+logger = logging.getLogger(__name__)
+
+# Color emoji families, most complete first; monochrome ones follow
+EMOJI_FAMILIES = [
+    "noto color emoji", "segoe ui emoji", "apple color emoji", "twemoji mozilla",
+    "emojione color", "noto emoji", "symbola",
+]
+
+# Bitmap emoji fonts (CBDT/sbix) only load at their embedded strike sizes
+BITMAP_STRIKES = (109, 160, 136, 96, 64, 48)
+
+# A code point no font maps, rendered as the .notdef box to detect missing glyphs
+NOTDEF_PROBE = "\U0010FFFD"
+
+DEFAULT_GLYPH_CACHE_ENTRIES = 256
+
+
+def load_font(path: str, size: int) -> Optional[ImageFont.FreeTypeFont]:
+    """Load a font file at size, or at the first bitmap strike it has"""
+    for candidate in (size,) + BITMAP_STRIKES:
+        try:
+            return ImageFont.truetype(path, candidate)
+        except OSError:
+            continue
+    logger.warning(f"Could not load glyph font {path}")
+    return None
+
+
+def draw_glyph(font: ImageFont.FreeTypeFont, glyph: str, fill: str) -> Image.Image:
+    """Draw glyph cropped to its ink box, in its own colors for color fonts"""
+    left, top, right, bottom = font.getbbox(glyph)
+    canvas = Image.new('RGBA', (max(1, right - left), max(1, bottom - top)), (0, 0, 0, 0))
+    ImageDraw.Draw(canvas).text((-left, -top), glyph, font=font, fill=fill, embedded_color=True)
+    return canvas
+
+
+class GlyphCache:
+    """Rasterizes single glyphs into square RGBA images, memoized per size
+
+    Emoji fonts are tried before the text family, and a font is only used
+    when it actually maps the glyph. Color fonts keep their own colors;
+    monochrome glyphs are drawn in fill. A batch of profiles sharing a
+    template glyph therefore rasterizes it once per size. Images are
+    shared; callers must not modify them.
+    """
+
+    def __init__(self, fonts: Optional[FontResolver] = None,
+                 max_glyphs: int = DEFAULT_GLYPH_CACHE_ENTRIES):
+        self.fonts = fonts if fonts is not None else FontResolver()
+        self.max_glyphs = max_glyphs
+        self.rasterized = 0
+        self._lock = threading.Lock()
+        self._emoji_paths: Optional[List[str]] = None
+        self._faces: Dict[str, Optional[ImageFont.FreeTypeFont]] = {}
+        self._notdef: Dict[str, bytes] = {}
+        self._mapped: Dict[Tuple[str, str], Optional[str]] = {}
+        self._glyphs: "OrderedDict[Tuple[str, int, str, str], Optional[Image.Image]]" = OrderedDict()
+
+    def __getstate__(self):
+        # Faces and rasters are rebuilt per process
+        return {'fonts': self.fonts, 'max_glyphs': self.max_glyphs}
+
+    def __setstate__(self, state):
+        self.__init__(state['fonts'], state['max_glyphs'])
+
+    def font_paths(self, family: str) -> List[str]:
+        """Font files tried for glyphs, installed emoji fonts before family"""
+        if self._emoji_paths is None:
+            installed = set(self.fonts.families())
+            self._emoji_paths = [self.fonts.resolve(f) for f in EMOJI_FAMILIES if f in installed]
+        paths = self._emoji_paths + [self.fonts.resolve(family)]
+        return [path for path in dict.fromkeys(paths) if path]
+
+    def _face(self, path: str) -> Optional[ImageFont.FreeTypeFont]:
+        # Faces are loaded once, large; glyphs are drawn at that size and scaled
+        if path not in self._faces:
+            self._faces[path] = load_font(path, BITMAP_STRIKES[0])
+        return self._faces[path]
+
+    def font_for(self, glyph: str, family: str) -> Optional[str]:
+        """Return the first font file that maps glyph, or None"""
+        key = (glyph, family)
+        if key not in self._mapped:
+            self._mapped[key] = self._find_font(glyph, family)
+        return self._mapped[key]
+
+    def _find_font(self, glyph: str, family: str) -> Optional[str]:
+        for path in self.font_paths(family):
+            font = self._face(path)
+            if font is None:
+                continue
+            try:
+                if self._notdef.get(path) is None:
+                    self._notdef[path] = draw_glyph(font, NOTDEF_PROBE, "white").tobytes()
+                if draw_glyph(font, glyph, "white").tobytes() != self._notdef[path]:
+                    return path
+            except (OSError, ValueError):
+                continue
+        return None
+
+    def get(self, glyph: str, size: int, family: str, fill: str = "white") -> Optional[Image.Image]:
+        """Return glyph as a size x size RGBA image, None when no font maps it"""
+        key = (glyph, size, family, fill)
+        if key in self._glyphs:
+            with self._lock:
+                if key in self._glyphs:
+                    self._glyphs.move_to_end(key)
+            return self._glyphs.get(key)
+
+        image = self._rasterize(glyph, size, family, fill)
+        with self._lock:
+            self._glyphs[key] = image
+            while len(self._glyphs) > self.max_glyphs:
+                self._glyphs.popitem(last=False)
+        return image
+
+    def _rasterize(self, glyph: str, size: int, family: str, fill: str) -> Optional[Image.Image]:
+        path = self.font_for(glyph, family)
+        if path is None:
+            return None
+        self.rasterized += 1
+
+        # Drawn at the face size, then fitted into the square
+        canvas = draw_glyph(self._face(path), glyph, fill)
+        width, height = canvas.size
+        scale = size / max(width, height)
+        scaled = canvas.resize((max(1, round(width * scale)), max(1, round(height * scale))),
+                               Image.Resampling.LANCZOS)
+        image = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+        image.alpha_composite(scaled, dest=((size - scaled.width) // 2, (size - scaled.height) // 2))
+        return image
+
+    def clear(self):
+        """Drop rasterized glyphs and loaded faces"""
+        with self._lock:
+            self._glyphs.clear()
+            self._faces.clear()
+            self._notdef.clear()
+            self._mapped.clear()
+            self._emoji_paths = None
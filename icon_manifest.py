@@ -0,0 +1,111 @@
+"""
+Output manifest for ProfilePop
+Tracks which inputs produced each icon in an output directory for incremental regeneration
+"""
+
+import json
+import logging
+import os
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "profilepop-manifest.json"
+MANIFEST_VERSION = 1
+
+
+def profile_key(profile: Dict) -> str:
+    """Stable identity of a profile across regenerations"""
+    return str(profile.get('id') or profile.get('name', ''))
+
+
+class OutputManifest:
+    """Input digest and output files of every profile icon in a directory
+
+    A profile whose digest is unchanged and whose files still exist can be
+    skipped on regeneration. Output paths are stored relative to the
+    directory so the folder can be moved.
+    """
+
+    def __init__(self, output_dir: str):
+        self.output_dir = os.path.abspath(output_dir)
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self.entries: Dict[str, Dict] = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable manifest {self.path}: {e}")
+            return {}
+        if data.get("version") != MANIFEST_VERSION:
+            return {}
+        return data.get("entries", {})
+
+    def outputs(self, key: str) -> List[str]:
+        """Return the absolute output paths recorded for a profile"""
+        entry = self.entries.get(key)
+        if not entry:
+            return []
+        return [os.path.join(self.output_dir, rel) for rel in entry["outputs"]]
+
+    def stem(self, key: str) -> Optional[str]:
+        """Return the file stem a profile's outputs were last written under"""
+        entry = self.entries.get(key)
+        return entry.get("stem") if entry else None
+
+    def is_current(self, key: str, digest: str) -> bool:
+        """Check a profile's outputs were built from digest and still exist"""
+        entry = self.entries.get(key)
+        if not entry or entry["digest"] != digest:
+            return False
+        return all(os.path.exists(path) for path in self.outputs(key))
+
+    def record(self, key: str, digest: str, paths: Iterable[str], stem: Optional[str] = None):
+        """Store a profile's new outputs, deleting files it no longer produces"""
+        previous = set(self.outputs(key))
+        paths = [os.path.abspath(p) for p in paths]
+        self.entries[key] = {
+            "digest": digest,
+            "outputs": [os.path.relpath(p, self.output_dir) for p in paths],
+        }
+        if stem is not None:
+            self.entries[key]["stem"] = stem
+        self._delete(previous - {os.path.join(self.output_dir, rel) for rel in self.entries[key]["outputs"]})
+
+    def prune(self, keep: Iterable[str]) -> List[str]:
+        """Drop profiles not in keep and delete their files
+
+        Returns the deleted paths.
+        """
+        keep = set(keep)
+        stale = set()
+        for key in [k for k in self.entries if k not in keep]:
+            stale.update(self.outputs(key))
+            del self.entries[key]
+        return self._delete(stale)
+
+    def _delete(self, paths: Iterable[str]) -> List[str]:
+        # Never delete a file another profile still claims
+        claimed = {path for key in self.entries for path in self.outputs(key)}
+        deleted = []
+        for path in sorted(set(paths) - claimed):
+            try:
+                os.remove(path)
+                deleted.append(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not remove stale icon {path}: {e}")
+        return deleted
+
+    def save(self):
+        """Write the manifest atomically"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": MANIFEST_VERSION, "entries": self.entries}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
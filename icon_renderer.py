@@ -0,0 +1,607 @@
+"""
+Headless icon rendering engine for ProfilePop
+Draws profile icons from an immutable render spec without needing a display
+"""
+
+import hashlib
+import io
+import json
+import logging
+import math
+import struct
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Callable, Dict, Hashable, Iterable, List, Mapping, Optional, Tuple, Union
+
+from PIL import Image, ImageChops, ImageColor, ImageDraw, ImageFilter
+
+from icon_assets import FontResolver, LogoIndex
+from icon_badge import badge_layer, badge_position, profile_badge
+from icon_compositor import Compositor, over
+from icon_fills import gradient_fill, gradient_stops, pattern_fill
+from icon_glyphs import GlyphCache
+from icon_text import MIN_FONT_PX, TextLayout
+from profile_record import Profile
+from render_cache import RenderCache
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever a change alters rendered pixels or encoded icon files
+RENDERER_VERSION = "12"
+
+DEFAULT_COLOR = '#3388de'
+DEFAULT_SIZES = (16, 32, 48, 128, 256)
+
+# Pyramid frames at or below this size get a sharpening pass when hinting
+HINT_MAX_SIZE = 32
+
+# Browser logos and glyphs span this fraction of the icon
+LOGO_SCALE = 0.5
+
+DEFAULT_LAYER_CACHE_BYTES = 64 * 1024 * 1024
+
+# A cached layer is one image or the frames of a whole icon
+Layer = Union[Image.Image, Tuple[Image.Image, ...]]
+
+
+@dataclass(frozen=True)
+class RenderSpec:
+    """Immutable description of how profile icons are drawn
+
+    radius and font_size are percentages of the icon size so one spec
+    renders consistently at every output size. With pyramid enabled the
+    icon is drawn once at the largest size (times supersample) and the
+    smaller sizes are derived by successive downsampling. fill_mode
+    "gradient" paints each profile with its palette gradient using
+    gradient_type ("linear", "radial" or "angle") and gradient_angle;
+    "pattern" tiles the given pattern, pattern_scale pixels per feature
+    at 256px. border draws an inner stroke of border_width pixels at
+    256px in border_color; opacity (0-100) fades the whole icon.
+    Profiles with a 'badge' get a corner overlay in badge_color at
+    badge_position, badge_scale percent of the icon size; the "badge"
+    shape always shows one. With show_glyph, a profile's 'icon' glyph
+    (a template emoji) replaces the browser logo when a font maps it.
+    """
+    shape: str = "rounded"
+    radius: int = 20
+    font: str = "Segoe UI"
+    font_size: int = 15
+    text_position: str = "bottom"
+    show_text: bool = True
+    min_text_size: int = 48
+    shadow: bool = True
+    glow: bool = False
+    border: bool = False
+    border_width: int = 6
+    border_color: str = "#ffffff"
+    opacity: int = 100
+    sizes: Tuple[int, ...] = DEFAULT_SIZES
+    fill_mode: str = "solid"
+    gradient_type: str = "linear"
+    gradient_angle: int = 90
+    pattern: str = "stripes"
+    pattern_scale: int = 16
+    pyramid: bool = True
+    supersample: int = 1
+    hint_small: bool = False
+    badge_color: str = "#e53935"
+    badge_position: str = "top-right"
+    badge_scale: int = 40
+    show_glyph: bool = True
+
+
+def normalize_color(color: Union[str, Dict, None]) -> str:
+    """Return the hex string for a profile color (hex string or palette dict)"""
+    if isinstance(color, dict):
+        color = color.get('hex', DEFAULT_COLOR)
+    return color or DEFAULT_COLOR
+
+
+def profile_color(profile: Mapping) -> str:
+    """Hex fill color of a profile record or dict"""
+    if isinstance(profile, Profile):
+        return profile.hex or DEFAULT_COLOR
+    return normalize_color(profile.get('color'))
+
+
+def profile_stops(profile: Mapping) -> Tuple[str, ...]:
+    """Gradient stops of a profile record or dict"""
+    if isinstance(profile, Profile):
+        return profile.stops
+    return gradient_stops(profile.get('color'))
+
+
+@lru_cache(maxsize=1024)
+def _is_light_hex(hex_color: str) -> bool:
+    r, g, b = ImageColor.getrgb(hex_color)[:3]
+    luminance = (0.299 * r + 0.587 * g + 0.114 * b) / 255
+    return luminance > 0.5
+
+
+def is_light_color(hex_color: Union[str, Dict]) -> bool:
+    """Check if color is light or dark"""
+    return _is_light_hex(normalize_color(hex_color))
+
+
+def draw_rounded_rectangle(draw: ImageDraw.ImageDraw, coords, radius: int, fill):
+    """Draw a rounded rectangle"""
+    x1, y1, x2, y2 = coords
+    radius = min(radius, (x2 - x1) // 2, (y2 - y1) // 2)  # Corners may meet but never cross
+
+    # Draw rectangles and circles for rounded corners
+    draw.rectangle([x1 + radius, y1, x2 - radius, y2], fill=fill)
+    draw.rectangle([x1, y1 + radius, x2, y2 - radius], fill=fill)
+
+    draw.ellipse([x1, y1, x1 + radius * 2, y1 + radius * 2], fill=fill)
+    draw.ellipse([x2 - radius * 2, y1, x2, y1 + radius * 2], fill=fill)
+    draw.ellipse([x1, y2 - radius * 2, x1 + radius * 2, y2], fill=fill)
+    draw.ellipse([x2 - radius * 2, y2 - radius * 2, x2, y2], fill=fill)
+
+
+def draw_hexagon(draw: ImageDraw.ImageDraw, size: int, fill):
+    """Draw a hexagon shape"""
+    center = size // 2
+    radius = size // 2 - 2
+
+    points = []
+    for i in range(6):
+        angle = math.radians(i * 60)
+        points.append((center + radius * math.cos(angle), center + radius * math.sin(angle)))
+
+    draw.polygon(points, fill=fill)
+
+
+def draw_shape(draw: ImageDraw.ImageDraw, shape: str, size: int, radius_pct: int, fill):
+    """Draw the background shape of an icon"""
+    if shape == "circle":
+        draw.ellipse([0, 0, size - 1, size - 1], fill=fill)
+    elif shape in ("rounded", "badge"):
+        radius = int(size * radius_pct / 100)
+        draw_rounded_rectangle(draw, [0, 0, size - 1, size - 1], radius, fill)
+    elif shape == "hexagon":
+        draw_hexagon(draw, size, fill)
+    else:
+        draw.rectangle([0, 0, size - 1, size - 1], fill=fill)
+
+
+def shape_mask(shape: str, size: int, radius_pct: int) -> Image.Image:
+    """Rasterize a shape as an 8-bit alpha mask"""
+    mask = Image.new('L', (size, size), 0)
+    draw_shape(ImageDraw.Draw(mask), shape, size, radius_pct, 255)
+    return mask
+
+
+def border_mask(shape: str, size: int, radius_pct: int, width: int) -> Image.Image:
+    """Coverage of an inner border stroke, as a fraction of the shape
+
+    Built from the shape drawn inset by width; 255 marks border and 0
+    the interior, so painting it over an opaque fill before the shape
+    mask is applied gives the stroke clean outer edges.
+    """
+    inner = Image.new('L', (size, size), 0)
+    inset = size - 2 * width
+    if inset > 0:
+        inner.paste(shape_mask(shape, inset, radius_pct), (width, width))
+    return ImageChops.invert(inner)
+
+
+@lru_cache(maxsize=128)
+def opacity_table(opacity: int) -> Tuple[int, ...]:
+    """Alpha lookup table scaling alpha by opacity percent"""
+    return tuple(a * opacity // 100 for a in range(256))
+
+
+def shadow_mask(size: int, scale: int = 1) -> Image.Image:
+    """Build the pre-blurred drop shadow coverage mask"""
+    offset = 2 * scale
+    alpha = Image.new('L', (size, size), 0)
+    ImageDraw.Draw(alpha).ellipse([offset, offset, size - 1, size - 1], fill=100)
+    return alpha.filter(ImageFilter.GaussianBlur(radius=3 * scale))
+
+
+def glow_mask(mask: Image.Image, scale: int = 1) -> Image.Image:
+    """Blur and boost a shape mask into a glow alpha mask"""
+    glow = mask.filter(ImageFilter.GaussianBlur(radius=5 * scale))
+    return glow.point(lambda a: min(255, int(a * 1.5)))
+
+
+def opaque_layer(image: Image.Image) -> Image.Image:
+    """Return image with full alpha in RGBa, ready for compositor.over"""
+    opaque = image.copy()
+    opaque.putalpha(255)
+    return opaque.convert('RGBa')
+
+
+def brighten(color: str, factor: float = 1.5) -> Tuple[int, int, int]:
+    """Scale an RGB color, clipping at white"""
+    return tuple(min(255, int(c * factor)) for c in ImageColor.getrgb(color)[:3])
+
+
+def pack_frames(frames: Iterable[Image.Image]) -> bytes:
+    """Serialize frames losslessly as length-prefixed PNGs"""
+    chunks = []
+    for frame in frames:
+        buf = io.BytesIO()
+        frame.save(buf, format='PNG', compress_level=1)
+        chunks.append(struct.pack('>I', buf.tell()) + buf.getvalue())
+    return b''.join(chunks)
+
+
+def unpack_frames(data: bytes) -> Tuple[Image.Image, ...]:
+    """Frames written by pack_frames"""
+    frames = []
+    offset = 0
+    while offset < len(data):
+        (length,) = struct.unpack_from('>I', data, offset)
+        offset += 4
+        with Image.open(io.BytesIO(data[offset:offset + length])) as img:
+            img.load()
+            frames.append(img)
+        offset += length
+    return tuple(frames)
+
+
+class LayerCache:
+    """Bounded in-memory cache for color-independent render layers
+
+    Holds shape masks, pre-blurred effect layers and badged icons' base
+    frames keyed by shape, size, radius and effect parameters. Least
+    recently used layers are dropped once the cached pixel data exceeds
+    max_bytes. Safe to share between threads; a layer missing in two
+    threads at once may be built twice.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_LAYER_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._layers: "OrderedDict[Hashable, Image.Image]" = OrderedDict()
+        self._bytes = 0
+
+    def __reduce__(self):
+        # Layers are rebuilt in each process
+        return LayerCache, (self.max_bytes,)
+
+    def __len__(self):
+        return len(self._layers)
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Layer]) -> Layer:
+        """Return the cached layer for key, building it on first use"""
+        with self._lock:
+            layer = self._layers.get(key)
+            if layer is not None:
+                self._layers.move_to_end(key)
+                self.hits += 1
+                return layer
+            self.misses += 1
+
+        # Built without the lock, as factories may look up other layers
+        layer = factory()
+        with self._lock:
+            previous = self._layers.pop(key, None)
+            if previous is not None:
+                self._bytes -= self._layer_bytes(previous)
+            self._layers[key] = layer
+            self._bytes += self._layer_bytes(layer)
+            while self._bytes > self.max_bytes and len(self._layers) > 1:
+                _, evicted = self._layers.popitem(last=False)
+                self._bytes -= self._layer_bytes(evicted)
+        return layer
+
+    @staticmethod
+    def _layer_bytes(layer: Layer) -> int:
+        if isinstance(layer, Image.Image):
+            return layer.width * layer.height * len(layer.getbands())
+        return sum(LayerCache._layer_bytes(item) for item in layer)
+
+    def clear(self):
+        """Drop every cached layer"""
+        with self._lock:
+            self._layers.clear()
+            self._bytes = 0
+
+
+class IconRenderer:
+    """Renders profile icons for a fixed RenderSpec
+
+    The renderer holds no Tk state, so it can run on headless machines and
+    be pickled into worker processes. Per-size resources are resolved once
+    and reused for every profile in a batch.
+    """
+
+    def __init__(self, spec: RenderSpec = RenderSpec(), logos: LogoIndex = None,
+                 layer_cache: LayerCache = None, fonts: FontResolver = None, text: TextLayout = None,
+                 glyphs: GlyphCache = None, base_cache: Optional[RenderCache] = None):
+        self.spec = spec
+        self.base_cache = base_cache  # Badged profiles' base frames, shared across processes and runs
+        self._spec_fields = asdict(spec)  # Converted once; asdict dominates cache_key otherwise
+        self.logos = logos if logos is not None else LogoIndex()
+        self.layers = layer_cache if layer_cache is not None else LayerCache()
+        self.fonts = fonts if fonts is not None else FontResolver()
+        self.text = text if text is not None else TextLayout(self.fonts)
+        self.glyphs = glyphs if glyphs is not None else GlyphCache(self.fonts)
+        self.compositor = Compositor()
+
+    def __getstate__(self):
+        # Caches are rebuilt per process rather than shipped to workers
+        state = self.__dict__.copy()
+        state['layers'] = LayerCache(self.layers.max_bytes)
+        return state
+
+    def render(self, profile: Dict) -> List[Image.Image]:
+        """Render one profile at every size in the spec, smallest first
+
+        Base frames of badged profiles are cached, in memory and in
+        base_cache when set, so a new badge only re-renders and
+        re-composites the small overlay layer.
+        """
+        badge = profile_badge(profile, self.spec.shape)
+        if badge is None:
+            frames = self._render_frames(profile)
+        else:
+            base_key = self.base_key(profile)
+            frames = [frame.copy() for frame in self.layers.get_or_create(
+                ('base', base_key), lambda: self._base_frames(profile, base_key))]
+        for frame in frames:
+            self._overlay(frame, badge)
+        return frames
+
+    def _base_frames(self, profile: Dict, base_key: str) -> Tuple[Image.Image, ...]:
+        """Base frames of a badged profile, read from base_cache when stored"""
+        if self.base_cache is not None:
+            data = self.base_cache.get(f"{base_key}.base")
+            if data is not None:
+                try:
+                    return unpack_frames(data)
+                except (OSError, ValueError, struct.error) as e:
+                    logger.warning(f"Ignoring unreadable base frames {base_key}: {e}")
+        frames = tuple(self._render_frames(profile))
+        if self.base_cache is not None:
+            self.base_cache.put(f"{base_key}.base", pack_frames(frames))
+        return frames
+
+    def _render_frames(self, profile: Dict) -> List[Image.Image]:
+        """Render the base frames of a profile, before badge and opacity"""
+        if self.spec.pyramid:
+            return self.render_pyramid(profile)
+        return [self._render_size(profile, size) for size in sorted(self.spec.sizes)]
+
+    def cache_key(self, profile: Dict) -> str:
+        """Digest of every input that affects the rendered pixels of a profile"""
+        browser = profile.get('browser', 'chrome')
+        payload = {
+            'version': RENDERER_VERSION,
+            'spec': self._spec_fields,
+            'name': profile.get('name', '') if self.spec.show_text else None,
+            'color': profile_color(profile),
+            'fill': self._fill_key(profile),
+            'browser': browser,
+            'logo': self.logos.digest(browser),
+            'font_file': self.fonts.resolve(self.spec.font) if self.spec.show_text else None,
+            'badge': profile_badge(profile, self.spec.shape),
+            'glyph': self.glyph(profile),
+        }
+        data = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        return hashlib.sha256(data).hexdigest()
+
+    def base_key(self, profile: Dict) -> str:
+        """Digest of the inputs of a profile's base frames, ignoring its badge"""
+        return self.cache_key(dict(profile, badge=None))
+
+    def glyph(self, profile: Dict) -> Optional[Tuple[str, str]]:
+        """The profile's glyph and the font file drawing it, None to draw the logo"""
+        glyph = profile.get('icon') if self.spec.show_glyph else None
+        if not glyph:
+            return None
+        path = self.glyphs.font_for(glyph, self.spec.font)
+        return (glyph, path) if path else None
+
+    def preload_logos(self, browsers: Iterable[str]):
+        """Decode and scale browser logos at every size this spec draws them"""
+        spec = self.spec
+        sizes = [max(spec.sizes) * max(1, spec.supersample)] if spec.pyramid else spec.sizes
+        self.logos.preload(sorted(set(browsers)), [int(size * LOGO_SCALE) for size in sizes])
+
+    def render_many(self, profiles: Iterable[Dict]) -> List[List[Image.Image]]:
+        """Render a batch of profiles, returning frames in input order"""
+        return [self.render(profile) for profile in profiles]
+
+    def render_size(self, profile: Dict, size: int) -> Image.Image:
+        """Render a single profile icon at one size"""
+        img = self._render_size(profile, size)
+        self._overlay(img, profile_badge(profile, self.spec.shape))
+        return img
+
+    def _render_size(self, profile: Dict, size: int) -> Image.Image:
+        color = profile_color(profile)
+        img = self._render_base(profile, color, size)
+        self._finish(img, profile, color, size)
+        return img
+
+    def render_pyramid(self, profile: Dict) -> List[Image.Image]:
+        """Render once at master resolution and downsample to every size
+
+        Shape, effects and logo are drawn a single time; each smaller level
+        is reduced from the previous one. Text is drawn per size afterwards
+        so it stays crisp instead of being shrunk with the rest of the icon.
+        Badge and opacity are left to render().
+        """
+        spec = self.spec
+        color = profile_color(profile)
+        sizes = sorted(spec.sizes, reverse=True)
+        scale = max(1, spec.supersample)
+
+        level = self._render_base(profile, color, sizes[0] * scale, scale)
+        frames = {}
+        for size in sizes:
+            if level.size[0] != size:
+                level = level.resize((size, size), Image.Resampling.LANCZOS)
+
+            frame = level
+            if spec.hint_small and size <= HINT_MAX_SIZE:
+                frame = level.filter(ImageFilter.UnsharpMask(radius=1, percent=60, threshold=0))
+            elif self._has_text(size):
+                frame = level.copy()
+
+            self._finish(frame, profile, color, size)
+            frames[size] = frame
+
+        return [frames[size] for size in sorted(spec.sizes)]
+
+    def _render_base(self, profile: Dict, color: str, size: int, scale: int = 1) -> Image.Image:
+        """Draw shape, effects and logo at one resolution
+
+        Without effects the masked fill is the icon. With effects, layers
+        are composited premultiplied on the compositor's scratch canvas:
+        glow and shadow are pre-blended into a cached underlay, so they
+        cost one copy per profile, the fill and logo are each one in-place
+        masked pass, and the canvas is converted back to straight alpha once.
+        """
+        spec = self.spec
+        mask = self._shape_mask(size)
+
+        if not (spec.shadow or spec.glow):
+            img = self._fill(profile, color, size)
+            self._paint_border(img, size)
+            img.putalpha(mask)
+            self._paste_emblem(img, profile, color, size)
+            return img
+
+        canvas = self.compositor.canvas(size, self._underlay(color, size, scale))
+        if spec.fill_mode == "solid" and not spec.border:
+            self.compositor.fill(canvas, color, mask)
+        else:
+            fill = self.compositor.solid(size, color) if spec.fill_mode == "solid" else self._fill(profile, color, size)
+            self._paint_border(fill, size)
+            over(canvas, fill, mask)
+        self._paste_emblem(canvas, profile, color, size)
+        return self.compositor.finish(canvas)
+
+    def _underlay(self, color: str, size: int, scale: int) -> Image.Image:
+        """Premultiplied glow and shadow layers blended beneath the shape"""
+        spec = self.spec
+        glow_color = brighten(color) if spec.glow else None
+
+        def build():
+            underlay = Image.new('RGBa', (size, size), (0, 0, 0, 0))
+            if glow_color:
+                self.compositor.fill(underlay, glow_color, self.layers.get_or_create(
+                    ('glow', spec.shape, size, spec.radius, scale), lambda: glow_mask(self._shape_mask(size), scale)))
+            if spec.shadow:
+                self.compositor.fill(underlay, (0, 0, 0), self.layers.get_or_create(
+                    ('shadow', size, scale), lambda: shadow_mask(size, scale)))
+            return underlay
+
+        return self.layers.get_or_create(
+            ('underlay', spec.shape, size, spec.radius, scale, glow_color, spec.shadow), build)
+
+    def _fill(self, profile: Dict, color: str, size: int) -> Image.Image:
+        """Paint the unmasked background for a profile"""
+        spec = self.spec
+        if spec.fill_mode == "gradient":
+            return gradient_fill(profile_stops(profile), size,
+                                 spec.gradient_type, spec.gradient_angle)
+        if spec.fill_mode == "pattern":
+            scale = max(1, round(spec.pattern_scale * size / 256))
+            return pattern_fill(spec.pattern, scale, profile_stops(profile), size)
+        return Image.new('RGBA', (size, size), color)
+
+    def _fill_key(self, profile: Dict):
+        """Fill inputs beyond the base color, for the cache key"""
+        if self.spec.fill_mode in ("gradient", "pattern"):
+            return list(profile_stops(profile))
+        return None
+
+    def _shape_mask(self, size: int) -> Image.Image:
+        spec = self.spec
+        return self.layers.get_or_create(
+            ('shape', spec.shape, size, spec.radius),
+            lambda: shape_mask(spec.shape, size, spec.radius))
+
+    def _paint_border(self, fill: Image.Image, size: int):
+        """Paint the border stroke onto an opaque, unmasked fill"""
+        spec = self.spec
+        if not spec.border:
+            return
+        width = max(1, round(spec.border_width * size / 256))
+        stroke = self.layers.get_or_create(
+            ('border', spec.shape, size, spec.radius, width),
+            lambda: border_mask(spec.shape, size, spec.radius, width))
+        fill.paste(spec.border_color, (0, 0, size, size), stroke)
+
+    def _has_text(self, size: int) -> bool:
+        """Check whether text is drawn at this size"""
+        return self.spec.show_text and size >= self.spec.min_text_size
+
+    def _finish(self, img: Image.Image, profile: Dict, color: str, size: int):
+        """Apply the per-size layers that must not be downsampled"""
+        if self._has_text(size):
+            self._draw_text(img, profile.get('name', ''), color, size)
+
+    def _overlay(self, img: Image.Image, badge: Optional[str]):
+        """Composite the badge over a finished frame, then apply opacity"""
+        spec = self.spec
+        if badge is not None:
+            size = img.width
+            layer = self.layers.get_or_create(
+                ('badge', badge, size, spec.badge_color, spec.badge_scale, spec.font),
+                lambda: badge_layer(badge, size, spec.badge_color, spec.badge_scale, self.text, spec.font))
+            img.alpha_composite(layer, dest=badge_position(layer.width, layer.height, size, spec.badge_position))
+        if spec.opacity < 100:
+            img.putalpha(img.getchannel('A').point(opacity_table(max(0, self.spec.opacity))))
+
+    def _paste_emblem(self, img: Image.Image, profile: Dict, color: str, size: int):
+        """Composite the profile glyph, or else the browser logo, above the icon center
+
+        img may be straight RGBA or a premultiplied RGBa canvas.
+        """
+        logo_size = int(size * LOGO_SCALE)
+        glyph = self.glyph(profile)
+        if glyph:
+            # Monochrome glyphs contrast with the fill like the label does
+            fill = "black" if is_light_color(color) else "white"
+            key = ('glyph', glyph[0], logo_size, self.spec.font, fill)
+            logo = self.glyphs.get(glyph[0], logo_size, self.spec.font, fill)
+        else:
+            browser = profile.get('browser', 'chrome')
+            key = ('logo', browser, logo_size)
+            logo = self.logos.get(browser, logo_size)
+        if logo is None:
+            return
+
+        logo_pos = ((size - logo_size) // 2, (size - logo_size) // 2 - int(size * 0.1))
+        if img.mode != 'RGBa':
+            img.alpha_composite(logo, dest=logo_pos)
+            return
+
+        # Opaque color plus coverage is what the premultiplied "over" needs
+        opaque = self.layers.get_or_create(key, lambda: opaque_layer(logo))
+        coverage = self.layers.get_or_create(key + ('alpha',), lambda: logo.getchannel('A'))
+        over(img, opaque, coverage, logo_pos)
+
+    def _draw_text(self, img: Image.Image, text: str, color: str, size: int):
+        """Draw the profile name, shrunk or ellipsized to fit the icon width"""
+        if not text:
+            return
+
+        margin = int(size * 0.1)
+        max_px = max(1, int(size * self.spec.font_size / 100))
+        # Shrink to at most half the nominal size, then ellipsize
+        fit = self.text.fit(text, self.spec.font, max_px, size - 2 * margin, max(MIN_FONT_PX, max_px // 2))
+
+        x = (size - fit.width) // 2
+        if self.spec.text_position == "top":
+            y = margin
+        elif self.spec.text_position == "center":
+            y = (size - fit.height) // 2
+        else:
+            y = size - fit.height - margin
+
+        light = is_light_color(color)
+        text_color = "black" if light else "white"
+        outline_color = "white" if light else "black"
+        img.alpha_composite(self.text.strip(fit.text, self.spec.font, fit.size, text_color, outline_color),
+                            dest=(x, y))
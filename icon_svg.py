@@ -0,0 +1,245 @@
+"""
+SVG output for ProfilePop
+Emits resolution-independent profile icons from the same render spec as the rasterizer
+"""
+
+import base64
+import io
+import math
+import os
+import pathlib
+import shutil
+from typing import Dict, Iterable, List, Optional
+from xml.sax.saxutils import escape, quoteattr
+
+from icon_badge import badge_box, badge_position, profile_badge
+from icon_export import unlink_existing
+from icon_fills import normalize_stops, pattern_tile
+from icon_renderer import IconRenderer, brighten, is_light_color, profile_color, profile_stops
+from icon_text import MIN_FONT_PX
+
+# SVG user units match pixels of a 256px raster, so spec percentages and
+# pixel effect sizes translate directly
+VIEWBOX = 256
+
+# Color emoji families named for SVG viewers, ahead of the text font
+EMOJI_FONT_STACK = "'Noto Color Emoji', 'Segoe UI Emoji', 'Apple Color Emoji', 'Twemoji Mozilla'"
+
+
+def _data_uri(data: bytes, mime: str) -> str:
+    return f"data:{mime};base64,{base64.b64encode(data).decode('ascii')}"
+
+
+def _png_uri(image) -> str:
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return _data_uri(buffer.getvalue(), 'image/png')
+
+
+def shape_element(shape: str, radius_pct: int, attrs: str) -> str:
+    """Return the SVG element outlining an icon shape"""
+    size = VIEWBOX
+    if shape == "circle":
+        return f'<circle cx="{size / 2:g}" cy="{size / 2:g}" r="{size / 2:g}" {attrs}/>'
+    if shape == "hexagon":
+        center, radius = size // 2, size // 2 - 2
+        points = " ".join(
+            f"{center + radius * math.cos(math.radians(i * 60)):.2f},"
+            f"{center + radius * math.sin(math.radians(i * 60)):.2f}"
+            for i in range(6))
+        return f'<polygon points="{points}" {attrs}/>'
+    radius = size * radius_pct / 100 if shape in ("rounded", "badge") else 0
+    return f'<rect width="{size}" height="{size}" rx="{radius:g}" {attrs}/>'
+
+
+def _gradient_def(renderer: IconRenderer, profile: Dict) -> str:
+    """Gradient paint server matching the raster gradient fill
+
+    SVG has no conic gradient, so "angle" gradients fall back to a linear
+    gradient along the same angle.
+    """
+    spec = renderer.spec
+    stops = "".join(
+        f'<stop offset="{pos:g}" stop-color="{color}"/>'
+        for pos, color in normalize_stops(profile_stops(profile)))
+    if spec.gradient_type == "radial":
+        return f'<radialGradient id="fill" cx="0.5" cy="0.5" r="0.5">{stops}</radialGradient>'
+
+    # 0 degrees runs left to right and 90 degrees top to bottom, as in the rasterizer
+    dx = math.cos(math.radians(spec.gradient_angle)) / 2
+    dy = math.sin(math.radians(spec.gradient_angle)) / 2
+    return (f'<linearGradient id="fill" x1="{0.5 - dx:.4f}" y1="{0.5 - dy:.4f}" '
+            f'x2="{0.5 + dx:.4f}" y2="{0.5 + dy:.4f}">{stops}</linearGradient>')
+
+
+def _pattern_def(renderer: IconRenderer, profile: Dict) -> str:
+    """Pattern paint server embedding the same tile the rasterizer repeats"""
+    spec = renderer.spec
+    colors = profile_stops(profile)
+    tile = pattern_tile(spec.pattern, max(1, spec.pattern_scale), (colors[0], colors[-1]))
+    width, height = tile.size
+    return (f'<pattern id="fill" width="{width}" height="{height}" patternUnits="userSpaceOnUse">'
+            f'<image width="{width}" height="{height}" href="{_png_uri(tile)}"/></pattern>')
+
+
+def _logo_element(renderer: IconRenderer, browser: str, embed: bool, logo_base: Optional[str]) -> Optional[str]:
+    path = renderer.logos.path(browser)
+    if not path:
+        return None
+
+    if embed:
+        with open(path, 'rb') as f:
+            suffix = pathlib.Path(path).suffix.lower().lstrip('.')
+            href = _data_uri(f.read(), f"image/{'jpeg' if suffix == 'jpg' else suffix}")
+    elif logo_base is not None:
+        href = f"{logo_base}{os.path.basename(path)}"
+    else:
+        href = pathlib.Path(path).resolve().as_uri()
+
+    size = VIEWBOX * 0.5
+    x = (VIEWBOX - size) / 2
+    y = x - VIEWBOX * 0.1
+    return f'<image x="{x:g}" y="{y:g}" width="{size:g}" height="{size:g}" href={quoteattr(href)}/>'
+
+
+def _glyph_element(renderer: IconRenderer, glyph: str, color: str) -> str:
+    # Same box as the logo; viewers pick the first family that has the glyph
+    size = VIEWBOX * 0.5
+    y = VIEWBOX / 2 - VIEWBOX * 0.1
+    fill = "black" if is_light_color(color) else "white"
+    return (f'<text x="{VIEWBOX / 2:g}" y="{y:g}" text-anchor="middle" dominant-baseline="central" '
+            f'font-family={quoteattr(f"{EMOJI_FONT_STACK}, {renderer.spec.font}, sans-serif")} '
+            f'font-size="{size * 0.8:g}" fill="{fill}">{escape(glyph)}</text>')
+
+
+def _text_element(renderer: IconRenderer, text: str, color: str) -> str:
+    spec = renderer.spec
+    margin = VIEWBOX * 0.1
+    if spec.text_position == "top":
+        y, baseline = margin, "text-before-edge"
+    elif spec.text_position == "center":
+        y, baseline = VIEWBOX / 2, "central"
+    else:
+        y, baseline = VIEWBOX - margin, "text-after-edge"
+
+    # Same fit as the rasterizer, measured with the resolved font at 256px
+    max_px = max(1, int(VIEWBOX * spec.font_size / 100))
+    fit = renderer.text.fit(text, spec.font, max_px, int(VIEWBOX - 2 * margin), max(MIN_FONT_PX, max_px // 2))
+
+    light = is_light_color(color)
+    fill, outline = ("black", "white") if light else ("white", "black")
+    return (f'<text x="{VIEWBOX / 2:g}" y="{y:g}" text-anchor="middle" dominant-baseline="{baseline}" '
+            f'font-family={quoteattr(f"{spec.font}, sans-serif")} font-size="{fit.size}" '
+            f'fill="{fill}" stroke="{outline}" stroke-width="2" paint-order="stroke">{escape(fit.text)}</text>')
+
+
+def _badge_element(renderer: IconRenderer, badge: str) -> str:
+    spec = renderer.spec
+    box = badge_box(badge, VIEWBOX, spec.badge_scale, renderer.text, spec.font)
+    x, y = badge_position(box.width, box.height, VIEWBOX, spec.badge_position)
+    radius = box.height / 2
+    parts = [f'<rect x="{x}" y="{y}" width="{box.width}" height="{box.height}" rx="{radius:g}" fill="white"/>',
+             f'<rect x="{x + box.ring}" y="{y + box.ring}" width="{box.width - 2 * box.ring}" '
+             f'height="{box.height - 2 * box.ring}" rx="{radius - box.ring:g}" fill="{spec.badge_color}"/>']
+    if box.fit is not None:
+        parts.append(f'<text x="{x + box.width / 2:g}" y="{y + radius:g}" text-anchor="middle" '
+                     f'dominant-baseline="central" font-family={quoteattr(f"{spec.font}, sans-serif")} '
+                     f'font-size="{box.fit.size}" fill="white">{escape(box.fit.text)}</text>')
+    return f'<g class="badge">{"".join(parts)}</g>'
+
+
+def render_svg(renderer: IconRenderer, profile: Dict, embed_logo: bool = False,
+               logo_base: Optional[str] = None) -> str:
+    """Return a profile icon as an SVG document
+
+    Covers the shape, fill, border, shadow and glow effects, opacity,
+    browser logo or glyph, profile name and badge of the renderer's
+    spec. The logo is linked rather than inlined so each file stays a
+    few kilobytes: relative to logo_base when given (see copy_logos),
+    otherwise by file URI. embed_logo inlines it instead for fully
+    standalone files.
+    """
+    spec = renderer.spec
+    color = profile_color(profile)
+    defs: List[str] = []
+    body: List[str] = []
+
+    if spec.fill_mode == "gradient":
+        defs.append(_gradient_def(renderer, profile))
+        paint = "url(#fill)"
+    elif spec.fill_mode == "pattern":
+        defs.append(_pattern_def(renderer, profile))
+        paint = "url(#fill)"
+    else:
+        paint = color
+
+    if spec.glow:
+        defs.append('<filter id="glow" x="-20%" y="-20%" width="140%" height="140%">'
+                    '<feGaussianBlur stdDeviation="5"/></filter>')
+        r, g, b = brighten(color)
+        body.append(shape_element(spec.shape, spec.radius, f'fill="rgb({r},{g},{b})" filter="url(#glow)"'))
+    if spec.shadow:
+        defs.append('<filter id="shadow" x="-20%" y="-20%" width="140%" height="140%">'
+                    '<feGaussianBlur stdDeviation="3"/></filter>')
+        center = (VIEWBOX + 1) / 2
+        radius = (VIEWBOX - 3) / 2
+        body.append(f'<ellipse cx="{center:g}" cy="{center:g}" rx="{radius:g}" ry="{radius:g}" '
+                    f'fill="black" fill-opacity="{100 / 255:.3f}" filter="url(#shadow)"/>')
+
+    body.append(shape_element(spec.shape, spec.radius, f'fill="{paint}"'))
+    if spec.border:
+        # Strokes are centered on the outline; clipping keeps the inner half
+        defs.append(f'<clipPath id="shape">{shape_element(spec.shape, spec.radius, "")}</clipPath>')
+        body.append(shape_element(spec.shape, spec.radius,
+                                  f'fill="none" stroke="{spec.border_color}" '
+                                  f'stroke-width="{2 * spec.border_width}" clip-path="url(#shape)"'))
+
+    glyph = renderer.glyph(profile)
+    if glyph:
+        body.append(_glyph_element(renderer, glyph[0], color))
+    else:
+        logo = _logo_element(renderer, profile.get('browser', 'chrome'), embed_logo, logo_base)
+        if logo:
+            body.append(logo)
+    if spec.show_text and profile.get('name'):
+        body.append(_text_element(renderer, profile['name'], color))
+    badge = profile_badge(profile, spec.shape)
+    if badge is not None:
+        body.append(_badge_element(renderer, badge))
+
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {VIEWBOX} {VIEWBOX}" '
+             f'width="{VIEWBOX}" height="{VIEWBOX}">']
+    if defs:
+        parts.append(f"<defs>{''.join(defs)}</defs>")
+    if spec.opacity < 100:
+        parts.append(f'<g opacity="{max(0, spec.opacity) / 100:g}">')
+        parts.extend(body)
+        parts.append("</g>")
+    else:
+        parts.extend(body)
+    parts.append("</svg>")
+    return "\n".join(parts) + "\n"
+
+
+def write_svg(renderer: IconRenderer, profile: Dict, output_path: str, embed_logo: bool = False,
+              logo_base: Optional[str] = None) -> str:
+    """Write a profile icon as an SVG file"""
+    unlink_existing(output_path)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(render_svg(renderer, profile, embed_logo, logo_base))
+    return output_path
+
+
+def copy_logos(renderer: IconRenderer, browsers: Iterable[str], output_dir: str,
+               folder: str = "logos") -> str:
+    """Copy the logos for browsers next to SVG output once per batch
+
+    Returns the logo_base to pass to render_svg so icons link the copies.
+    """
+    target = os.path.join(output_dir, folder)
+    for browser in set(browsers):
+        path = renderer.logos.path(browser)
+        if path:
+            os.makedirs(target, exist_ok=True)
+            shutil.copyfile(path, os.path.join(target, os.path.basename(path)))
+    return f"{folder}/"
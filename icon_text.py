@@ -0,0 +1,163 @@
+"""
+Text layout for ProfilePop icons
+Fits profile names to the icon width and renders each label once as a stroked strip
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+from PIL import Image, ImageDraw
+
+from icon_assets import FontResolver
+
+ELLIPSIS = "…"
+
+# Outline width in pixels, drawn by the font rasterizer's stroke
+STROKE_WIDTH = 1
+
+# Labels never shrink below this many pixels; longer names are ellipsized
+MIN_FONT_PX = 8
+
+DEFAULT_STRIP_CACHE_ENTRIES = 512
+
+
+def ellipsize(text: str, width: Callable[[str], int], max_width: int) -> str:
+    """Shorten text with an ellipsis until its width fits max_width
+
+    width measures a string in whatever font will draw it, e.g. a Tk
+    font's measure method for widget labels.
+    """
+    if width(text) <= max_width:
+        return text
+
+    # Longest prefix that still fits once the ellipsis is appended
+    lo, hi = 0, len(text) - 1
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if width(text[:mid].rstrip() + ELLIPSIS) <= max_width:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo].rstrip() + ELLIPSIS
+
+
+class TextFit(NamedTuple):
+    """Result of fitting a label into a width"""
+    text: str
+    size: int
+    width: int
+    height: int
+
+
+class TextLayout:
+    """Measures, fits and renders icon labels with memoization
+
+    Measurements are kept per (text, family, size) and rendered strips
+    per (text, family, size, fill, outline), so a batch that labels the
+    same names at the same sizes rasterizes each label once.
+    """
+
+    def __init__(self, fonts: Optional[FontResolver] = None,
+                 max_strips: int = DEFAULT_STRIP_CACHE_ENTRIES):
+        self.fonts = fonts if fonts is not None else FontResolver()
+        self.max_strips = max_strips
+        self._lock = threading.Lock()
+        self._boxes: Dict[Tuple[str, str, int], Tuple[int, int, int, int]] = {}
+        self._fits: Dict[Tuple[str, str, int, int, int], TextFit] = {}
+        self._strips: "OrderedDict[Tuple, Image.Image]" = OrderedDict()
+
+    def __getstate__(self):
+        # Measurements and strips are rebuilt per process
+        return {'fonts': self.fonts, 'max_strips': self.max_strips}
+
+    def __setstate__(self, state):
+        self.__init__(state['fonts'], state['max_strips'])
+
+    def bbox(self, text: str, family: str, size: int) -> Tuple[int, int, int, int]:
+        """Bounding box of text including its outline stroke"""
+        key = (text, family, size)
+        box = self._boxes.get(key)
+        if box is None:
+            box = self.fonts.font(family, size).getbbox(text, stroke_width=STROKE_WIDTH)
+            self._boxes[key] = box
+        return box
+
+    def measure(self, text: str, family: str, size: int) -> Tuple[int, int]:
+        """Return the (width, height) of text including its outline"""
+        left, top, right, bottom = self.bbox(text, family, size)
+        return right - left, bottom - top
+
+    def ellipsize(self, text: str, family: str, size: int, max_width: int) -> str:
+        """Shorten text with an ellipsis until it fits max_width"""
+        return ellipsize(text, lambda t: self.measure(t, family, size)[0], max_width)
+
+    def fit(self, text: str, family: str, max_size: int, max_width: int,
+            min_size: int = MIN_FONT_PX) -> TextFit:
+        """Find the largest font size up to max_size whose text fits max_width
+
+        Binary searches sizes between min_size and max_size; if the text
+        does not fit even at min_size it is ellipsized at that size.
+        """
+        min_size = max(1, min(min_size, max_size))
+        key = (text, family, max_size, max_width, min_size)
+        fit = self._fits.get(key)
+        if fit is not None:
+            return fit
+
+        lo, hi = min_size, max_size
+        if self.measure(text, family, lo)[0] > max_width:
+            text = self.ellipsize(text, family, lo, max_width)
+            hi = lo
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if self.measure(text, family, mid)[0] <= max_width:
+                lo = mid
+            else:
+                hi = mid - 1
+
+        fit = TextFit(text, lo, *self.measure(text, family, lo))
+        self._fits[key] = fit
+        return fit
+
+    def strip(self, text: str, family: str, size: int, fill, outline) -> Image.Image:
+        """Render text with its outline into a tightly cropped RGBA strip
+
+        The outline comes from one stroked draw instead of four offset
+        draws. Strips are shared; callers must not modify them.
+        """
+        key = (text, family, size, fill, outline)
+        strip = self._strips.get(key)
+        if strip is not None:
+            with self._lock:
+                if key in self._strips:
+                    self._strips.move_to_end(key)
+            return strip
+
+        left, top, right, bottom = self.bbox(text, family, size)
+        dims = (max(1, right - left), max(1, bottom - top))
+        font = self.fonts.font(family, size)
+
+        # Coverage masks keep antialiased edges free of dark fringes when the
+        # strip is later composited; the stroke covers glyph plus outline
+        stroked = Image.new('L', dims, 0)
+        ImageDraw.Draw(stroked).text((-left, -top), text, font=font, fill=255,
+                                     stroke_width=STROKE_WIDTH, stroke_fill=255)
+        glyphs = Image.new('L', dims, 0)
+        ImageDraw.Draw(glyphs).text((-left, -top), text, font=font, fill=255)
+
+        strip = Image.new('RGBA', dims, outline)
+        strip.putalpha(stroked)
+        strip.paste(fill, mask=glyphs)
+        with self._lock:
+            self._strips[key] = strip
+            while len(self._strips) > self.max_strips:
+                self._strips.popitem(last=False)
+        return strip
+
+    def clear(self):
+        """Drop memoized measurements and strips"""
+        with self._lock:
+            self._boxes.clear()
+            self._fits.clear()
+            self._strips.clear()
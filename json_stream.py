@@ -0,0 +1,239 @@
+"""
+Streaming JSON member extraction for ProfilePop
+Reads one nested value out of a large JSON file without building the rest of the document
+"""
+
+import json
+import re
+from typing import Any, Dict, Sequence, TextIO
+
+DEFAULT_CHUNK_CHARS = 64 * 1024
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# A complete string literal, as an unrolled loop for speed
+_STRING_PATTERN = r'"[^"\\]*(?:\\.[^"\\]*)*"'
+# A container holding no other containers, unrolled so a failed match
+# (one cut off by the buffer end) stays linear
+_LEAF_BODY = r'[^"{}\[\]]*(?:' + _STRING_PATTERN + r'[^"{}\[\]]*)*'
+_LEAF_PATTERN = r'\{' + _LEAF_BODY + r'\}|\[' + _LEAF_BODY + r'\]'
+# Everything up to the next bracket that needs tracking: strings and
+# leaf containers are consumed whole inside the regex engine
+_BETWEEN_BRACKETS = re.compile(r'(?:[^"{}\[\]]+|' + _STRING_PATTERN + '|' + _LEAF_PATTERN + ')*')
+_STRING = re.compile(_STRING_PATTERN)
+_SCALAR = re.compile(r'[^,}\] \t\n\r]*')
+_DECODER = json.JSONDecoder()
+_NUMBER_CHARS = frozenset('0123456789+-.eE')
+# A member name with its colon, and the comma or brace after a member
+_MEMBER_NAME = re.compile(r'[ \t\n\r]*(' + _STRING_PATTERN + r')[ \t\n\r]*:[ \t\n\r]*')
+_MEMBER_END = re.compile(r'[ \t\n\r]*([,}])')
+
+
+class MemberNotFound(KeyError):
+    """The requested member path does not exist in the document"""
+
+
+class _Scanner:
+    """Cursor over a file read in chunks
+
+    Consumed text is dropped as the cursor moves, unless a capture is in
+    progress, so memory stays bounded by the chunk size plus the value
+    being extracted.
+    """
+
+    def __init__(self, f: TextIO, chunk_chars: int):
+        self.f = f
+        self.chunk_chars = chunk_chars
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.capturing = False
+
+    def fill(self, min_chars: int = 0) -> bool:
+        """Append the next chunk of at least min_chars, returning False at end of file"""
+        if self.eof:
+            return False
+        chunk = self.f.read(max(self.chunk_chars, min_chars))
+        if not chunk:
+            self.eof = True
+            return False
+        if not self.capturing and self.pos:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        self.buf += chunk
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character, without consuming it"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                raise ValueError("Unexpected end of JSON document")
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos}")
+        self.pos += 1
+
+    def skip_string(self) -> int:
+        """Move past a string whose opening quote is at the cursor
+
+        Returns where the string starts in the buffer, which may have
+        been compacted while reading more of it.
+        """
+        while True:
+            match = _STRING.match(self.buf, self.pos)
+            if match is not None:
+                self.pos = match.end()
+                return match.start()
+            if not self.fill():
+                raise ValueError("Unterminated string")
+
+    def read_string(self) -> str:
+        start = self.skip_string()
+        return json.loads(self.buf[start:self.pos])
+
+    def skip_value(self):
+        """Move past the value at the cursor without decoding it
+
+        Containers cost one regex scan per nesting bracket: strings, leaf
+        containers and all other text between brackets are consumed
+        inside the regex engine.
+        """
+        char = self.peek()
+        if char == '"':
+            self.skip_string()
+        elif char in '{[':
+            # The outer bracket is counted here so a leaf value is not consumed whole
+            self.pos += 1
+            depth = 1
+            while True:
+                self.pos = _BETWEEN_BRACKETS.match(self.buf, self.pos).end()
+                char = self.buf[self.pos] if self.pos < len(self.buf) else '"'
+                if char == '"':
+                    # Buffer ends here or inside a string
+                    if not self.fill():
+                        raise ValueError("Unterminated container")
+                    continue
+                self.pos += 1
+                depth += 1 if char in '{[' else -1
+                if depth == 0:
+                    return
+        else:
+            while True:
+                self.pos = _SCALAR.match(self.buf, self.pos).end()
+                if self.pos < len(self.buf) or not self.fill():
+                    return
+
+    def read_value(self) -> Any:
+        """Decode only the value at the cursor"""
+        self.peek()
+        start = self.pos
+        self.capturing = True
+        try:
+            self.skip_value()
+        finally:
+            self.capturing = False
+        return _DECODER.raw_decode(self.buf, start)[0]
+
+    def decode_value(self) -> Any:
+        """Decode the value at the cursor straight from the buffer
+
+        Suited to values well below the chunk size: a value cut off by
+        the buffer end is decoded again once more text is read, and each
+        retry reads at least as much as is buffered, so a large value is
+        not re-decoded many times.
+        """
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            try:
+                value, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill(len(self.buf) - self.pos):
+                    raise
+                continue
+            # A number cut off by the buffer end decodes as a shorter one, e.g. "12" of "12.5"
+            complete = end < len(self.buf) and self.buf[end] not in _NUMBER_CHARS
+            if complete or not self.fill(len(self.buf) - self.pos):
+                self.pos = end
+                return value
+
+    def read_object(self) -> Dict[str, Any]:
+        """Decode the object at the cursor one member at a time
+
+        Only the member being decoded is held as text, so the buffer
+        stays near the chunk size however large the object is.
+        """
+        self.expect('{')
+        result: Dict[str, Any] = {}
+        names: Dict[str, str] = {}
+        if self.peek() == '}':
+            self.pos += 1
+            return result
+        while True:
+            match = _MEMBER_NAME.match(self.buf, self.pos)
+            if match is not None and '\\' not in match.group(1):
+                self.pos = match.end()
+                name = match.group(1)[1:-1]
+            else:
+                # Cut off by the buffer end, escaped, or not a member name
+                if self.peek() != '"':
+                    raise ValueError(f"Expected a member name at offset {self.pos}")
+                name = self.read_string()
+                self.expect(':')
+            value = self.decode_value()
+            if isinstance(value, dict):
+                # Entries decoded one by one do not share key strings the way json.load's do
+                value = {names.setdefault(key, key): item for key, item in value.items()}
+            result[name] = value
+            match = _MEMBER_END.match(self.buf, self.pos)
+            if match is not None:
+                char = match.group(1)
+                self.pos = match.end()
+            else:
+                char = self.peek()
+                self.pos += 1
+            if char == '}':
+                return result
+            if char != ',':
+                raise ValueError(f"Expected ',' or '}}' at offset {self.pos - 1}")
+
+    def find_member(self, key: str):
+        """Position the cursor on the value of key in the object at the cursor"""
+        self.expect('{')
+        if self.peek() == '}':
+            raise MemberNotFound(key)
+        while True:
+            if self.peek() != '"':
+                raise ValueError(f"Expected a member name at offset {self.pos}")
+            name = self.read_string()
+            self.expect(':')
+            if name == key:
+                self.peek()
+                return
+            self.skip_value()
+            char = self.peek()
+            self.pos += 1
+            if char == '}':
+                raise MemberNotFound(key)
+            if char != ',':
+                raise ValueError(f"Expected ',' or '}}' at offset {self.pos - 1}")
+
+
+def read_member(f: TextIO, keys: Sequence[str], chunk_chars: int = DEFAULT_CHUNK_CHARS) -> Any:
+    """Decode the value at a path of object keys, e.g. ("profile", "info_cache")
+
+    Sibling values are skipped with regex scans and never decoded, so
+    time and memory go to the requested subtree only. An object found
+    there is decoded member by member. Raises MemberNotFound if a key is
+    missing and ValueError on malformed input.
+    """
+    scanner = _Scanner(f, chunk_chars)
+    for key in keys:
+        if scanner.peek() != '{':
+            raise MemberNotFound(key)
+        scanner.find_member(key)
+    if scanner.peek() == '{':
+        return scanner.read_object()
+    return scanner.read_value()
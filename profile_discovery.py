@@ -0,0 +1,402 @@
+"""
+Browser profile discovery for ProfilePop
+Scans every installed browser concurrently into one indexed profile catalog
+"""
+
+import configparser
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from json_stream import MemberNotFound, read_member
+from profile_record import Profile, profiles_from_json
+from render_cache import default_cache_dir
+
+logger = logging.getLogger(__name__)
+
+# Browsers whose profiles are not listed in a Chromium "Local State" file
+FIREFOX_BROWSERS = ("firefox",)
+UNSUPPORTED_BROWSERS = ("safari",)
+
+CHROMIUM_SOURCE = "Local State"
+FIREFOX_SOURCE = "profiles.ini"
+
+PARSE_CACHE_VERSION = 1
+
+
+def read_info_cache(local_state_path: str) -> Dict:
+    """Read profile.info_cache from a Local State file
+
+    The file is streamed and only the info_cache subtree is decoded; the
+    rest of Local State, often megabytes of unrelated browser state, is
+    skipped. Anything the streaming reader rejects is retried with a
+    plain json.load.
+    """
+    try:
+        with open(local_state_path, 'r', encoding='utf-8') as f:
+            info_cache = read_member(f, ("profile", "info_cache"))
+    except MemberNotFound:
+        return {}
+    except ValueError as e:
+        logger.debug(f"Streaming read of {local_state_path} failed, parsing whole file: {e}")
+        with open(local_state_path, 'r', encoding='utf-8') as f:
+            info_cache = json.load(f).get('profile', {}).get('info_cache', {})
+    return info_cache if isinstance(info_cache, dict) else {}
+
+
+def load_chromium_profiles(browser: str, browser_path: str) -> List[Dict]:
+    """Read the profiles listed in a Chromium user data directory"""
+    local_state_path = os.path.join(browser_path, CHROMIUM_SOURCE)
+    if not os.path.exists(local_state_path):
+        return []
+
+    profile_info = read_info_cache(local_state_path)
+    return [{
+        'id': profile_id,
+        'name': profile_data.get('name', profile_id),
+        'path': os.path.join(browser_path, profile_id),
+        'browser': browser
+    } for profile_id, profile_data in profile_info.items()]
+
+
+def load_firefox_profiles(firefox_path: str) -> List[Dict]:
+    """Read the profiles listed in a Firefox profiles.ini"""
+    profiles_ini = os.path.join(firefox_path, FIREFOX_SOURCE)
+    if not os.path.exists(profiles_ini):
+        return []
+
+    config = configparser.ConfigParser()
+    config.read(profiles_ini, encoding='utf-8')
+
+    profiles = []
+    for section in config.sections():
+        if section.startswith("Profile"):
+            profile_path = config.get(section, "Path", fallback="")
+            if profile_path:
+                profiles.append({
+                    'id': section,
+                    'name': config.get(section, "Name", fallback="Unknown"),
+                    'path': os.path.join(firefox_path, profile_path),
+                    'browser': 'firefox'
+                })
+    return profiles
+
+
+def source_path(browser: str, browser_path: str) -> str:
+    """The file listing a browser's profiles"""
+    return os.path.join(browser_path, FIREFOX_SOURCE if browser in FIREFOX_BROWSERS else CHROMIUM_SOURCE)
+
+
+def load_profiles(browser: str, browser_path: str, cache: Optional["ParseCache"] = None) -> List[Profile]:
+    """Read the profiles of one browser from its profile directory as records
+
+    With a cache, an unchanged profile list is not parsed again.
+    """
+    if browser in UNSUPPORTED_BROWSERS:
+        return []
+    if browser in FIREFOX_BROWSERS:
+        parse = partial(load_firefox_profiles, browser_path)
+    else:
+        parse = partial(load_chromium_profiles, browser, browser_path)
+    records = parse() if cache is None else cache.load(source_path(browser, browser_path), browser, parse)
+    return profiles_from_json(records)
+
+
+def file_signature(path: str) -> Optional[List[int]]:
+    """Identify a version of a file by mtime, size and inode, None if missing"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size, st.st_ino]
+
+
+class ParseCache:
+    """Profile records extracted from profile list files, persisted across runs
+
+    Entries are keyed by file path and browser and validated against the
+    file's mtime, size and inode, so an unchanged Local State or
+    profiles.ini is never read or parsed. Only the extracted records are
+    stored, not the (often multi-megabyte) file contents.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(default_cache_dir(), "profile_sources.json")
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict]] = None
+        self._dirty = False
+
+    def _load(self) -> Dict[str, Dict]:
+        if self._entries is None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self._entries = data["entries"] if data.get("version") == PARSE_CACHE_VERSION else {}
+            except FileNotFoundError:
+                self._entries = {}
+            except (OSError, ValueError, KeyError, AttributeError) as e:
+                logger.warning(f"Ignoring unreadable parse cache {self.path}: {e}")
+                self._entries = {}
+        return self._entries
+
+    def load(self, source: str, browser: str, parse: Callable[[], List[Dict]]) -> List[Dict]:
+        """Return the records parsed from source, calling parse only if it changed
+
+        Records are returned as fresh dicts the caller may modify.
+        """
+        key = f"{browser}:{source}"
+        signature = file_signature(source)
+        with self._lock:
+            entry = self._load().get(key)
+        if signature is not None and entry is not None and entry["signature"] == signature:
+            self.hits += 1
+            return [dict(record) for record in entry["records"]]
+
+        self.misses += 1
+        records = parse()
+        # Only keep the result if the file did not change while it was read
+        if signature is not None and file_signature(source) == signature:
+            with self._lock:
+                self._load()[key] = {"signature": signature, "records": [dict(r) for r in records]}
+                self._dirty = True
+        return records
+
+    def save(self):
+        """Write the cache atomically if it changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({"version": PARSE_CACHE_VERSION, "entries": self._entries}, f)
+                os.replace(tmp_path, self.path)
+                self._dirty = False
+            except OSError as e:
+                logger.warning(f"Could not save parse cache: {e}")
+
+    def clear(self):
+        """Forget every parsed file"""
+        with self._lock:
+            self._entries = {}
+            self._dirty = True
+        self.save()
+
+
+class ProfileDelta(NamedTuple):
+    """One change to a browser's profile list"""
+    kind: str  # "added", "removed" or "renamed"
+    profile: Dict
+    old_name: Optional[str] = None
+
+
+def path_key(path: str) -> str:
+    """Normalize a profile path for lookups"""
+    return os.path.normcase(os.path.abspath(path))
+
+
+class ProfileCatalog:
+    """Every discovered profile, indexed by browser, name and path
+
+    Profiles are the same dicts the UI edits, so colors and renames made
+    while browsing one browser survive switching to another. Lookups are
+    dictionary reads; renames must go through update() to keep the name
+    index current.
+    """
+
+    def __init__(self, profiles: Optional[List[Dict]] = None):
+        self._lock = threading.RLock()
+        self._profiles: Dict[Tuple[str, str], Dict] = {}
+        self._by_browser: Dict[str, Dict[str, Dict]] = {}
+        self._by_name: Dict[str, Dict[Tuple[str, str], Dict]] = {}
+        self._by_path: Dict[str, Dict] = {}
+        # Name each profile had in its browser's profile list at the last
+        # scan, so a rescan can tell a browser rename from a user rename
+        self._source_names: Dict[Tuple[str, str], str] = {}
+        for profile in profiles or []:
+            self.add(profile)
+
+    def __len__(self):
+        return len(self._profiles)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(list(self._profiles.values()))
+
+    def __contains__(self, profile: Dict) -> bool:
+        return self.key(profile) in self._profiles
+
+    @staticmethod
+    def key(profile: Dict) -> Tuple[str, str]:
+        """Identity of a profile within the catalog"""
+        return profile.get('browser', 'chrome'), str(profile.get('id') or profile.get('name', ''))
+
+    def add(self, profile: Dict) -> Dict:
+        """Insert or replace a profile, returning it"""
+        with self._lock:
+            key = self.key(profile)
+            if key in self._profiles:
+                self._unindex(self._profiles[key])
+            self._profiles[key] = profile
+            self._by_browser.setdefault(key[0], {})[key[1]] = profile
+            self._by_name.setdefault(profile.get('name', '').lower(), {})[key] = profile
+            if profile.get('path'):
+                self._by_path[path_key(profile['path'])] = profile
+            return profile
+
+    def remove(self, profile: Dict) -> Optional[Dict]:
+        """Drop a profile, returning the catalog's copy if it was present"""
+        with self._lock:
+            existing = self._profiles.pop(self.key(profile), None)
+            if existing is not None:
+                self._unindex(existing)
+            return existing
+
+    def _unindex(self, profile: Dict):
+        browser, profile_id = self.key(profile)
+        self._by_browser.get(browser, {}).pop(profile_id, None)
+        names = self._by_name.get(profile.get('name', '').lower(), {})
+        names.pop((browser, profile_id), None)
+        if not names:
+            self._by_name.pop(profile.get('name', '').lower(), None)
+        if profile.get('path') and self._by_path.get(path_key(profile['path'])) is profile:
+            del self._by_path[path_key(profile['path'])]
+
+    def update(self, profile: Dict, **changes) -> Dict:
+        """Change fields of a profile and reindex it"""
+        with self._lock:
+            self.remove(profile)
+            profile.update(changes)
+            return self.add(profile)
+
+    def replace_browser(self, browser: str, profiles: List[Dict], keep: Tuple[str, ...] = ()) -> List[Dict]:
+        """Swap in a fresh scan of one browser
+
+        Fields named in keep (e.g. user-assigned colors) are carried over
+        from the previous entry of each profile. Returns the new entries.
+        """
+        with self._lock:
+            previous = self._by_browser.pop(browser, {})
+            for profile in previous.values():
+                self._profiles.pop(self.key(profile), None)
+                self._source_names.pop(self.key(profile), None)
+                self._unindex(profile)
+            for profile in profiles:
+                old = previous.get(self.key(profile)[1])
+                if old is not None:
+                    profile.update({field: old[field] for field in keep if field in old})
+                self._source_names[self.key(profile)] = profile.get('name', '')
+                self.add(profile)
+            return profiles
+
+    def sync_browser(self, browser: str, profiles: List[Dict]) -> List[ProfileDelta]:
+        """Apply a rescan of one browser and return what changed
+
+        Unlike replace_browser, profiles that still exist keep their
+        catalog dicts (and every UI edit on them); only paths and names
+        renamed in the browser itself are refreshed, so a name set in the
+        app survives the browser rewriting its profile list. New profiles
+        are added as given.
+        """
+        deltas = []
+        with self._lock:
+            previous = dict(self._by_browser.get(browser, {}))
+            for profile in profiles:
+                key = self.key(profile)
+                existing = previous.pop(key[1], None)
+                source_name = profile.get('name', '')
+                if existing is None:
+                    self._source_names[key] = source_name
+                    deltas.append(ProfileDelta("added", self.add(profile)))
+                    continue
+                old_name = existing.get('name')
+                changes = {}
+                if 'path' in profile and existing.get('path') != profile['path']:
+                    changes['path'] = profile['path']
+                if 'name' in profile and source_name != self._source_names.get(key, old_name):
+                    self._source_names[key] = source_name
+                    if source_name != old_name:
+                        changes['name'] = source_name
+                if changes:
+                    self.update(existing, **changes)
+                if 'name' in changes:
+                    deltas.append(ProfileDelta("renamed", existing, old_name))
+            for profile in previous.values():
+                self.remove(profile)
+                self._source_names.pop(self.key(profile), None)
+                deltas.append(ProfileDelta("removed", profile))
+        return deltas
+
+    def browsers(self) -> List[str]:
+        """Browsers with at least one profile"""
+        return sorted(browser for browser, profiles in self._by_browser.items() if profiles)
+
+    def by_browser(self, browser: str) -> List[Dict]:
+        """Profiles of one browser, in discovery order"""
+        return list(self._by_browser.get(browser, {}).values())
+
+    def by_name(self, name: str) -> List[Dict]:
+        """Profiles with a name, ignoring case"""
+        return list(self._by_name.get(name.lower(), {}).values())
+
+    def by_path(self, path: str) -> Optional[Dict]:
+        """The profile stored at a directory"""
+        return self._by_path.get(path_key(path))
+
+    def get(self, browser: str, profile_id: str) -> Optional[Dict]:
+        """A profile by browser and profile id"""
+        return self._profiles.get((browser, profile_id))
+
+
+class ProfileDiscovery:
+    """Loads the profiles of every browser in parallel
+
+    Each browser directory is read on its own thread, so the scan takes
+    as long as the slowest browser rather than the sum of all of them.
+    A browser that fails to load is logged and left out. With a
+    ParseCache, unchanged browsers are not parsed at all.
+    """
+
+    def __init__(self, browser_paths: Dict[str, str], max_workers: Optional[int] = None,
+                 assign_color: Optional[Callable[[Dict], str]] = None, cache: Optional[ParseCache] = None):
+        self.browser_paths = dict(browser_paths)
+        self.max_workers = max_workers
+        self.assign_color = assign_color
+        self.cache = cache
+        self.errors: Dict[str, str] = {}
+
+    def load(self, browser: str) -> List[Profile]:
+        """Read one browser's profiles, assigning colors to new ones"""
+        profiles = load_profiles(browser, self.browser_paths[browser], self.cache)
+        if self.assign_color is not None:
+            for profile in profiles:
+                profile.setdefault('color', self.assign_color(profile))
+        return profiles
+
+    def scan(self, catalog: Optional[ProfileCatalog] = None) -> ProfileCatalog:
+        """Scan every browser concurrently into catalog (a new one by default)"""
+        catalog = catalog if catalog is not None else ProfileCatalog()
+        browsers = list(self.browser_paths)
+        if not browsers:
+            return catalog
+
+        self.errors = {}
+        workers = self.max_workers or len(browsers)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="discovery") as executor:
+            futures = {browser: executor.submit(self.load, browser) for browser in browsers}
+            # Merged in browser order so catalogs are deterministic
+            for browser, future in futures.items():
+                try:
+                    catalog.replace_browser(browser, future.result(), keep=('color',))
+                except Exception as e:
+                    logger.error(f"Error loading {browser} profiles: {e}")
+                    self.errors[browser] = str(e)
+        if self.cache is not None:
+            self.cache.save()
+        return catalog
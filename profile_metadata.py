@@ -0,0 +1,246 @@
+"""
+Profile metadata enrichment for ProfilePop
+Loads accounts, activity, theme colors and avatars per profile in the background
+"""
+
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from profile_discovery import (FIREFOX_BROWSERS, UNSUPPORTED_BROWSERS, ProfileCatalog, file_signature,
+                               read_info_cache, source_path)
+
+logger = logging.getLogger(__name__)
+
+# Lower loads first; within a priority, profiles load in request order
+VISIBLE_PRIORITY = 0
+BACKGROUND_PRIORITY = 1
+
+DEFAULT_METADATA_WORKERS = 4
+
+_STOP_PRIORITY = -1  # Ahead of all work, so workers exit promptly
+
+
+class ProfileMetadata(NamedTuple):
+    """Details a browser keeps about a profile, each None when unknown"""
+    account: Optional[str] = None  # Signed-in e-mail address
+    active_time: Optional[float] = None  # Last use, Unix seconds
+    created: Optional[float] = None  # Unix seconds
+    theme_color: Optional[str] = None  # "#rrggbb"
+    avatar: Optional[str] = None  # Picture file, or the browser's built-in avatar id
+
+
+def skia_color(value) -> Optional[str]:
+    """Convert a signed ARGB integer as stored by Chromium to "#rrggbb\""""
+    if isinstance(value, bool) or not isinstance(value, int):
+        return None
+    return f"#{value & 0xFFFFFF:06x}"
+
+
+def _seconds(value) -> Optional[float]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return float(value)
+
+
+def _read_json(path: str) -> Dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+class InfoCacheReader:
+    """Local State info_cache per browser, read again only when the file changes
+
+    Every profile of a browser shares one parse; concurrent requests for
+    the same file wait for the thread already reading it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._file_locks: Dict[str, threading.Lock] = {}
+        self._entries: Dict[str, Tuple[List[int], Dict]] = {}
+
+    def get(self, local_state_path: str) -> Dict:
+        with self._lock:
+            file_lock = self._file_locks.setdefault(local_state_path, threading.Lock())
+        with file_lock:
+            signature = file_signature(local_state_path)
+            if signature is None:
+                return {}
+            entry = self._entries.get(local_state_path)
+            if entry is None or entry[0] != signature:
+                entry = (signature, read_info_cache(local_state_path))
+                self._entries[local_state_path] = entry
+            return entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def chromium_metadata(profile: Dict, info: Dict) -> ProfileMetadata:
+    """Metadata from a profile's Local State info_cache entry"""
+    avatar = info.get('avatar_icon') or None
+    picture = info.get('gaia_picture_file_name')
+    if picture and not info.get('is_using_default_avatar', False):
+        picture_path = os.path.join(profile['path'], picture)
+        if os.path.exists(picture_path):
+            avatar = picture_path
+    return ProfileMetadata(
+        account=info.get('user_name') or None,
+        active_time=_seconds(info.get('active_time')),
+        theme_color=skia_color(info.get('profile_highlight_color', info.get('default_avatar_fill_color'))),
+        avatar=avatar,
+    )
+
+
+def firefox_metadata(profile: Dict) -> ProfileMetadata:
+    """Metadata from the files in a Firefox profile directory"""
+    profile_path = profile['path']
+    times = _read_json(os.path.join(profile_path, "times.json"))
+    account = _read_json(os.path.join(profile_path, "signedInUser.json")).get('accountData')
+    # Firefox rewrites prefs.js on every shutdown, which makes it the best last-use marker
+    signature = file_signature(os.path.join(profile_path, "prefs.js"))
+    created = _seconds(times.get('created'))
+    return ProfileMetadata(
+        account=(account.get('email') or None) if isinstance(account, dict) else None,
+        active_time=signature[0] / 1e9 if signature else None,
+        created=created / 1000 if created is not None else None,  # times.json stores milliseconds
+    )
+
+
+def load_metadata(profile: Dict, info_caches: InfoCacheReader) -> ProfileMetadata:
+    """Read the metadata of one profile"""
+    browser = profile.get('browser')
+    if browser in UNSUPPORTED_BROWSERS or not profile.get('path'):
+        return ProfileMetadata()
+    if browser in FIREFOX_BROWSERS:
+        return firefox_metadata(profile)
+    # Chromium profile directories sit next to the Local State that lists them
+    info_cache = info_caches.get(source_path(browser, os.path.dirname(profile['path'])))
+    info = info_cache.get(profile.get('id'))
+    return chromium_metadata(profile, info if isinstance(info, dict) else {})
+
+
+def format_age(seconds: float) -> str:
+    """Short relative time such as "3 days ago\""""
+    if seconds < 60:
+        return "just now"
+    for unit, length in (("year", 365 * 86400), ("month", 30 * 86400), ("day", 86400),
+                         ("hour", 3600), ("minute", 60)):
+        if seconds >= length:
+            count = int(seconds // length)
+            return f"{count} {unit}{'s' if count > 1 else ''} ago"
+    return "just now"
+
+
+def describe_metadata(metadata: ProfileMetadata, now: Optional[float] = None) -> str:
+    """One line summary for a profile card"""
+    now = time.time() if now is None else now
+    parts = []
+    if metadata.account:
+        parts.append(metadata.account)
+    if metadata.active_time:
+        parts.append(f"active {format_age(max(0.0, now - metadata.active_time))}")
+    elif metadata.created:
+        parts.append(f"created {format_age(max(0.0, now - metadata.created))}")
+    return " · ".join(parts)
+
+
+class MetadataLoader:
+    """Loads profile metadata on demand with a bounded pool of worker threads
+
+    Nothing is read until profiles are requested. Requests are served in
+    priority order, so profiles on screen can jump ahead of a background
+    sweep of the whole catalog. Each profile is loaded once; on_loaded is
+    called from a worker thread with the profile and its metadata.
+    """
+
+    def __init__(self, on_loaded: Callable[[Dict, ProfileMetadata], None],
+                 max_workers: int = DEFAULT_METADATA_WORKERS):
+        self.on_loaded = on_loaded
+        self.max_workers = max(1, max_workers)
+        self.info_caches = InfoCacheReader()
+        self._lock = threading.Lock()
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._queued: Dict[Tuple[str, str], Tuple[int, int]] = {}  # Key -> rank of its live queue entry
+        self._results: Dict[Tuple[str, str], ProfileMetadata] = {}
+        self._workers: List[threading.Thread] = []
+        self._stopped = False
+
+    def request(self, profiles: Iterable[Dict], priority: int = BACKGROUND_PRIORITY):
+        """Queue profiles that are not loaded yet
+
+        A profile already queued at a lower priority is moved ahead.
+        """
+        with self._lock:
+            if self._stopped:
+                return
+            for profile in profiles:
+                key = ProfileCatalog.key(profile)
+                if key in self._results:
+                    continue
+                queued = self._queued.get(key)
+                if queued is not None and queued[0] <= priority:
+                    continue
+                rank = (priority, next(self._order))
+                self._queued[key] = rank
+                # Ranks are unique, so entries never compare past them
+                self._queue.put((rank, key, profile))
+            if len(self._workers) < self.max_workers and self._queued:
+                for _ in range(min(self.max_workers - len(self._workers), len(self._queued))):
+                    worker = threading.Thread(target=self._run, name="profile-metadata", daemon=True)
+                    self._workers.append(worker)
+                    worker.start()
+
+    def get(self, profile: Dict) -> Optional[ProfileMetadata]:
+        """Metadata loaded so far for a profile"""
+        return self._results.get(ProfileCatalog.key(profile))
+
+    def load_metadata(self, profile: Dict) -> ProfileMetadata:
+        return load_metadata(profile, self.info_caches)
+
+    def _run(self):
+        while True:
+            rank, key, profile = self._queue.get()
+            if rank[0] == _STOP_PRIORITY:
+                return
+            with self._lock:
+                if self._queued.get(key) != rank:
+                    continue  # Superseded by a higher priority entry, or already loaded
+            try:
+                metadata = self.load_metadata(profile)
+            except Exception as e:
+                logger.warning(f"Could not read metadata of {profile.get('name')}: {e}")
+                metadata = ProfileMetadata()
+            with self._lock:
+                self._results[key] = metadata
+                self._queued.pop(key, None)
+            self.on_loaded(profile, metadata)
+
+    def clear(self):
+        """Forget loaded metadata so the next request reads it again"""
+        with self._lock:
+            self._results.clear()
+        self.info_caches.clear()
+
+    def stop(self):
+        """Drop queued work and stop the workers"""
+        with self._lock:
+            self._stopped = True
+            self._queued.clear()
+            workers = list(self._workers)
+        for _ in workers:
+            self._queue.put(((_STOP_PRIORITY, next(self._order)), None, None))
+        for worker in workers:
+            worker.join()
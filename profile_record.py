@@ -0,0 +1,138 @@
+"""
+Profile records for ProfilePop
+Compact slotted profiles with a pre-normalized color, readable like the export JSON dicts
+"""
+
+import sys
+from collections.abc import MutableMapping
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+from icon_fills import gradient_stops
+
+# Keys stored in their own slot, in export order; any other key lives in extra
+FIELDS = ('id', 'name', 'path', 'browser', 'color', 'badge', 'icon')
+
+_INTERNED = ('id', 'browser')  # Repeated across thousands of profiles
+
+_MISSING = object()
+
+
+@lru_cache(maxsize=1024)
+def _plain_stops(color: Optional[str]) -> Tuple[str, ...]:
+    # Shared by every profile using the same palette color
+    return gradient_stops(color)
+
+
+def _normalize(color: Union[str, Dict, None]) -> Tuple[Optional[str], Tuple[str, ...]]:
+    """Hex and gradient stops of a hex string or palette dict"""
+    if isinstance(color, dict):
+        if color.get('gradient'):
+            return color.get('hex'), tuple(color['gradient'])
+        color = color.get('hex')
+    return color or None, _plain_stops(color or None)
+
+
+class Profile(MutableMapping):
+    """One browser profile, stored in slots instead of a dict
+
+    Behaves as a mutable mapping with the keys of the export JSON, so
+    code written against profile dicts keeps working. The color is kept
+    in the form it was given (hex string or palette dict) for lossless
+    export, and its hex and gradient stops are resolved once on
+    assignment instead of on every render. Unknown keys go to extra.
+    """
+
+    __slots__ = FIELDS + ('hex', 'stops', 'extra')
+
+    def __init__(self, fields: Optional[Mapping] = None, **kwargs):
+        self.hex, self.stops = _normalize(None)
+        self.extra: Optional[Dict] = None
+        for source in (fields or {}, kwargs):
+            for key, value in source.items():
+                self[key] = value
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "Profile":
+        """Build a record from a profile dict of the export JSON"""
+        return cls(data)
+
+    def to_dict(self) -> Dict:
+        """The profile as a plain dict for the export JSON"""
+        return dict(self.items())
+
+    def __getitem__(self, key: str) -> Any:
+        if key in FIELDS:
+            value = getattr(self, key, _MISSING)
+            if value is not _MISSING:
+                return value
+        elif self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        # Overridden for speed: the mixin would raise and catch KeyError
+        if key in FIELDS:
+            return getattr(self, key, default)
+        return self.extra.get(key, default) if self.extra is not None else default
+
+    def __setitem__(self, key: str, value: Any):
+        if key == 'color':
+            self.hex, self.stops = _normalize(value)
+        elif key in _INTERNED and isinstance(value, str):
+            value = sys.intern(value)
+        if key in FIELDS:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __delitem__(self, key: str):
+        if key in FIELDS:
+            if not hasattr(self, key):
+                raise KeyError(key)
+            delattr(self, key)
+            if key == 'color':
+                self.hex, self.stops = _normalize(None)
+        else:
+            if self.extra is None or key not in self.extra:
+                raise KeyError(key)
+            del self.extra[key]
+            if not self.extra:
+                self.extra = None
+
+    def __contains__(self, key: object) -> bool:
+        if key in FIELDS:
+            return hasattr(self, key)
+        return self.extra is not None and key in self.extra
+
+    def __iter__(self) -> Iterator[str]:
+        for key in FIELDS:
+            if hasattr(self, key):
+                yield key
+        if self.extra is not None:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def copy(self) -> "Profile":
+        return Profile(self)
+
+    def __reduce__(self):
+        # Picklable on every supported Python, e.g. for batch worker processes
+        return Profile.from_dict, (self.to_dict(),)
+
+    def __repr__(self) -> str:
+        return f"Profile({self.to_dict()!r})"
+
+
+def profiles_from_json(items: Iterable[Mapping]) -> List[Profile]:
+    """Records for the "profiles" list of an export file"""
+    return [Profile.from_dict(item) for item in items]
+
+
+def profiles_to_json(profiles: Iterable[Mapping]) -> List[Dict]:
+    """The "profiles" list of an export file, from records or dicts"""
+    return [profile.to_dict() if isinstance(profile, Profile) else dict(profile) for profile in profiles]
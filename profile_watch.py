@@ -0,0 +1,248 @@
+"""
+Live profile watching for ProfilePop
+Watches browsers' profile lists and reports added, removed and renamed profiles
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import platform
+import select
+import struct
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from profile_discovery import (UNSUPPORTED_BROWSERS, ProfileCatalog, ProfileDelta, ProfileDiscovery,
+                               file_signature, source_path)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEBOUNCE_SECONDS = 0.5
+DEFAULT_POLL_SECONDS = 2.0
+
+# inotify event bits (linux/inotify.h)
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+
+# Browsers replace their files by renaming a temporary one into place, so
+# parent directories are watched for moves as well as writes
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+_EVENT = struct.Struct("iIII")
+
+
+class PollingWatcher:
+    """Portable watcher comparing file signatures every interval seconds"""
+
+    def __init__(self, paths: Iterable[str], on_change: Callable[[str], None],
+                 interval: float = DEFAULT_POLL_SECONDS):
+        self.paths = list(paths)
+        self.on_change = on_change
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Record current signatures and begin polling"""
+        signatures = {path: file_signature(path) for path in self.paths}
+        self._thread = threading.Thread(target=self._run, args=(signatures,), name="profile-poll", daemon=True)
+        self._thread.start()
+
+    def _run(self, signatures: Dict[str, Optional[List[int]]]):
+        while not self._stop.wait(self.interval):
+            for path in self.paths:
+                signature = file_signature(path)
+                if signature != signatures[path]:
+                    signatures[path] = signature
+                    self.on_change(path)
+
+    def stop(self):
+        """Stop polling and wait for the thread to exit"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+class InotifyWatcher:
+    """Linux watcher blocking on inotify events, with no polling delay"""
+
+    def __init__(self, paths: Iterable[str], on_change: Callable[[str], None]):
+        self.paths = list(paths)
+        self.on_change = on_change
+        self._libc = load_libc()
+        self._fd = -1
+        self._wake_r, self._wake_w = -1, -1
+        self._dirs: Dict[int, Dict[str, str]] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Watch the parent directory of every path and begin reading events"""
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        watched: Dict[str, Dict[str, str]] = {}
+        for path in self.paths:
+            watched.setdefault(os.path.dirname(path), {})[os.path.basename(path)] = path
+        for directory, names in watched.items():
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                logger.warning(f"Cannot watch {directory}: {os.strerror(ctypes.get_errno())}")
+                continue
+            self._dirs[wd] = names
+        self._wake_r, self._wake_w = os.pipe()
+        self._thread = threading.Thread(target=self._run, name="profile-inotify", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            while True:
+                ready, _, _ = select.select([self._fd, self._wake_r], [], [])
+                if self._wake_r in ready:
+                    return
+                for path in self._read_events():
+                    self.on_change(path)
+        finally:
+            os.close(self._fd)
+            os.close(self._wake_r)
+
+    def _read_events(self) -> Set[str]:
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        changed = set()
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            name = os.fsdecode(data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0"))
+            offset += _EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped; treat every watched file as changed
+                changed.update(path for names in self._dirs.values() for path in names.values())
+            elif name in self._dirs.get(wd, {}):
+                changed.add(self._dirs[wd][name])
+        return changed
+
+    def stop(self):
+        """Wake the reader thread and wait for it to exit"""
+        if self._thread is not None:
+            os.write(self._wake_w, b"x")
+            self._thread.join()
+            os.close(self._wake_w)
+
+
+def load_libc() -> ctypes.CDLL:
+    """Load the C library exposing inotify"""
+    libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    libc.inotify_init1.argtypes = [ctypes.c_int]
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
+
+
+def inotify_available() -> bool:
+    """Check whether inotify can be used on this system"""
+    if platform.system() != "Linux":
+        return False
+    try:
+        return hasattr(load_libc(), "inotify_init1")
+    except OSError:
+        return False
+
+
+def create_watcher(paths: Iterable[str], on_change: Callable[[str], None],
+                   poll_interval: float = DEFAULT_POLL_SECONDS):
+    """Return an inotify watcher on Linux, otherwise a polling one"""
+    if inotify_available():
+        return InotifyWatcher(paths, on_change)
+    return PollingWatcher(paths, on_change, poll_interval)
+
+
+class Debouncer:
+    """Collects keys and hands them over once no new key arrived for delay seconds"""
+
+    def __init__(self, delay: float, callback: Callable[[Set[str]], None]):
+        self.delay = delay
+        self.callback = callback
+        self._lock = threading.Lock()
+        self._pending: Set[str] = set()
+        self._timer: Optional[threading.Timer] = None
+
+    def trigger(self, key: str):
+        """Add key and restart the quiet period"""
+        with self._lock:
+            self._pending.add(key)
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.delay, self._fire)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _fire(self):
+        with self._lock:
+            pending, self._pending = self._pending, set()
+            self._timer = None
+        if pending:
+            self.callback(pending)
+
+    def cancel(self):
+        """Drop pending keys without calling back"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = None
+            self._pending.clear()
+
+
+class ProfileWatcher:
+    """Keeps a catalog in step with the browsers' profile lists
+
+    Each browser's Local State or profiles.ini is watched. A burst of
+    writes is debounced into one reload of that browser, and the result
+    is diffed against the catalog so on_deltas only receives real
+    additions, removals and renames. Callbacks run on a worker thread.
+    """
+
+    def __init__(self, discovery: ProfileDiscovery, catalog: ProfileCatalog,
+                 on_deltas: Callable[[str, List[ProfileDelta]], None],
+                 debounce: float = DEFAULT_DEBOUNCE_SECONDS, poll_interval: float = DEFAULT_POLL_SECONDS,
+                 watcher_factory: Callable = create_watcher):
+        self.discovery = discovery
+        self.catalog = catalog
+        self.on_deltas = on_deltas
+        self.sources = {source_path(browser, path): browser for browser, path in discovery.browser_paths.items()
+                        if browser not in UNSUPPORTED_BROWSERS}
+        self._reload_lock = threading.Lock()  # Keeps an older scan from landing after a newer one
+        self._debouncer = Debouncer(debounce, self._reload)
+        self._watcher = watcher_factory(list(self.sources), self._debouncer.trigger, poll_interval)
+
+    def start(self):
+        """Begin watching"""
+        self._watcher.start()
+
+    def stop(self):
+        """Stop watching and persist the parse cache"""
+        self._watcher.stop()
+        self._debouncer.cancel()
+        if self.discovery.cache is not None:
+            self.discovery.cache.save()
+
+    def _reload(self, paths: Set[str]):
+        with self._reload_lock:
+            for browser in sorted({self.sources[path] for path in paths}):
+                self._sync(browser)
+
+    def _sync(self, browser: str):
+        try:
+            profiles = self.discovery.load(browser)
+        except Exception as e:
+            # Mid-write files are retried on the next change event
+            logger.warning(f"Could not reload {browser} profiles: {e}")
+            return
+        deltas = self.catalog.sync_browser(browser, profiles)
+        if deltas:
+            self.on_deltas(browser, deltas)
@@ -0,0 +1,133 @@
+"""
+Tests for shared render assets (logos and fonts)
+"""
+
+import os
+import pickle
+import shutil
+
+import pytest
+from PIL import Image
+
+from icon_assets import FontResolver, LogoIndex, system_font_dirs
+from icon_renderer import IconRenderer, RenderSpec
+
+
+class TestLogoIndex:
+    """Test browser logo discovery and scaling"""
+
+    def test_shipped_logos_resolved(self):
+        """Test the bundled logo files map to browser keys"""
+        index = LogoIndex()
+        for browser in ("chrome", "edge", "firefox"):
+            assert index.path(browser) is not None
+
+    def test_unknown_browser(self):
+        """Test browsers without a logo return None"""
+        index = LogoIndex()
+        assert index.get("safari", 32) is None
+        assert index.digest("safari") == ""
+
+    def test_fallback_name_match(self, tmp_path):
+        """Test legacy <browser>-logo.png files are picked up"""
+        Image.new('RGBA', (8, 8), (255, 0, 0, 255)).save(tmp_path / "brave-logo.png")
+        index = LogoIndex(str(tmp_path))
+        assert index.get("brave", 4).size == (4, 4)
+
+    def test_scaled_logo_reused(self):
+        """Test each size is resized once and then served from memory"""
+        index = LogoIndex()
+        first = index.get("chrome", 64)
+        assert first.mode == 'RGBA'
+        assert index.get("chrome", 64) is first
+
+    def test_pickle_drops_decoded_images(self):
+        """Test workers receive only the path map"""
+        index = LogoIndex()
+        index.get("chrome", 64)
+        clone = pickle.loads(pickle.dumps(index))
+        assert clone.paths == index.paths
+        assert clone._scaled == {}
+
+    def test_logo_drawn_into_icon(self):
+        """Test the renderer composites the browser logo"""
+        spec = RenderSpec(shadow=False, show_text=False, sizes=(64,))
+        profile = {'name': 'Work', 'color': '#000000', 'browser': 'chrome'}
+        with_logo = IconRenderer(spec).render(profile)[0]
+        without_logo = IconRenderer(spec).render({**profile, 'browser': 'safari'})[0]
+        assert with_logo.tobytes() != without_logo.tobytes()
+
+    @pytest.mark.parametrize("pyramid", [True, False])
+    def test_preload_covers_render(self, pyramid):
+        """Test preloaded logos serve a render without decoding again"""
+        spec = RenderSpec(shadow=False, show_text=False, sizes=(16, 64), pyramid=pyramid)
+        profile = {'name': 'Work', 'color': '#000000', 'browser': 'chrome'}
+        renderer = IconRenderer(spec)
+        renderer.preload_logos(['chrome', 'chrome'])
+        renderer.logos.paths = {}  # Nothing left to decode from
+        expected = IconRenderer(spec).render(profile)
+        assert [f.tobytes() for f in renderer.render(profile)] == [f.tobytes() for f in expected]
+
+
+def find_system_font():
+    for font_dir in system_font_dirs():
+        for root, _, files in os.walk(font_dir):
+            for filename in sorted(files):
+                if filename.lower().endswith(".ttf"):
+                    return os.path.join(root, filename)
+    return None
+
+
+@pytest.fixture
+def font_dir(tmp_path):
+    source = find_system_font()
+    if source is None:
+        pytest.skip("No TrueType fonts installed")
+    fonts = tmp_path / "fonts"
+    fonts.mkdir()
+    shutil.copy(source, fonts)
+    return str(fonts)
+
+
+class TestFontResolver:
+    """Test font discovery, fallback and memoization"""
+
+    def test_resolves_installed_family(self, font_dir, tmp_path):
+        """Test a scanned family resolves to its file"""
+        resolver = FontResolver([font_dir], str(tmp_path / "fonts.json"))
+        family = resolver.families()[0]
+        assert resolver.resolve(family).startswith(font_dir)
+
+    def test_missing_family_falls_back(self, font_dir, tmp_path):
+        """Test unknown families fall back to an installed font"""
+        resolver = FontResolver([font_dir], str(tmp_path / "fonts.json"))
+        family = resolver.families()[0]
+        resolver.resolve("No Such Family")
+        assert resolver.font("No Such Family", 12) is not None
+        assert resolver.resolve(family) is not None
+
+    def test_index_reused_between_launches(self, font_dir, tmp_path, monkeypatch):
+        """Test the persisted index skips rescanning"""
+        index_path = str(tmp_path / "fonts.json")
+        FontResolver([font_dir], index_path).families()
+
+        resolver = FontResolver([font_dir], index_path)
+        monkeypatch.setattr(resolver, "_scan", lambda: pytest.fail("rescanned fonts"))
+        assert resolver.families()
+
+    def test_font_objects_memoized(self, font_dir, tmp_path):
+        """Test fonts are parsed once per family and size"""
+        resolver = FontResolver([font_dir], str(tmp_path / "fonts.json"))
+        family = resolver.families()[0]
+        assert resolver.font(family, 14) is resolver.font(family, 14)
+        assert resolver.font(family, 14) is not resolver.font(family, 16)
+
+    def test_no_fonts_uses_default(self, tmp_path):
+        """Test rendering still works with no fonts installed"""
+        resolver = FontResolver([str(tmp_path / "empty")], str(tmp_path / "fonts.json"))
+        assert resolver.resolve("Arial") is None
+        assert resolver.font("Arial", 12) is not None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
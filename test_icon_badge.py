@@ -0,0 +1,125 @@
+"""
+Tests for badge overlays
+"""
+
+import pytest
+from PIL import Image
+
+from icon_assets import FontResolver
+from icon_badge import MIN_BADGE_TEXT_SIZE, badge_layer, badge_position, badge_text, profile_badge
+from icon_batch import BatchIconGenerator
+from icon_renderer import IconRenderer, RenderSpec, pack_frames, unpack_frames
+from icon_text import TextLayout
+from render_cache import RenderCache
+
+PROFILE = {'id': 'Default', 'name': 'Work', 'color': '#2196F3', 'browser': 'safari'}
+
+
+class TestBadgeText:
+    """Test normalization of profile badge values"""
+
+    @pytest.mark.parametrize("value,expected", [
+        (None, None), ("", None), (False, None), (True, ""),
+        (7, "7"), (150, "99+"), ("VIP!", "VIP"), ("🔥", "🔥")])
+    def test_badge_text(self, value, expected):
+        """Test counts, labels and flags map to badge labels"""
+        assert badge_text(value) == expected
+
+    def test_badge_shape_always_badged(self):
+        """Test the badge shape falls back to a status dot"""
+        assert profile_badge({}, "badge") == ""
+        assert profile_badge({}, "rounded") is None
+
+
+class TestBadgeLayer:
+    """Test badge layer geometry"""
+
+    def test_small_sizes_draw_dots(self):
+        """Test labels are dropped below the minimum text size"""
+        layout = TextLayout()
+        dot = badge_layer("", 256, "#e53935", 40, layout, "Segoe UI")
+        small = badge_layer("12", MIN_BADGE_TEXT_SIZE - 1, "#e53935", 40, layout, "Segoe UI")
+        assert dot.width == dot.height
+        assert small.width == small.height
+
+    def test_long_labels_widen(self):
+        """Test longer labels become pills"""
+        layer = badge_layer("99+", 256, "#e53935", 40, TextLayout(), "Segoe UI")
+        assert layer.width >= layer.height
+
+    @pytest.mark.parametrize("position,expected", [
+        ("top-right", (206, 0)), ("top-left", (0, 0)), ("bottom-right", (206, 226)), ("bottom-left", (0, 226))])
+    def test_positions(self, position, expected):
+        """Test badges sit flush in the requested corner"""
+        assert badge_position(50, 30, 256, position) == expected
+
+
+class TestBadgeRendering:
+    """Test badges composited over cached base icons"""
+
+    def test_badge_drawn_in_corner(self):
+        """Test the overlay changes only the badge corner"""
+        renderer = IconRenderer(RenderSpec(shadow=False, show_text=False, sizes=(256,)))
+        plain = renderer.render(PROFILE)[0]
+        badged = renderer.render({**PROFILE, 'badge': 3})[0]
+        assert badged.getpixel((230, 30)) != plain.getpixel((230, 30))
+        assert badged.getpixel((30, 230)) == plain.getpixel((30, 230))
+
+    def test_badge_change_reuses_base(self):
+        """Test a new badge re-renders only the overlay"""
+        renderer = IconRenderer(RenderSpec(shadow=True))
+        renderer.render({**PROFILE, 'badge': 1})
+        bases = renderer.layers.misses
+        renderer.render({**PROFILE, 'badge': 2})
+        assert renderer.layers.misses == bases + len(renderer.spec.sizes)
+
+    def test_cached_base_unchanged(self):
+        """Test badges and opacity never leak into the cached base frames"""
+        renderer = IconRenderer(RenderSpec(opacity=50, shadow=False, show_text=False, sizes=(64,)))
+        first = renderer.render({**PROFILE, 'badge': 1})[0]
+        second = renderer.render({**PROFILE, 'badge': 1})[0]
+        assert first.tobytes() == second.tobytes()
+        assert second.getpixel((32, 40))[3] == 127
+
+    def test_badge_in_cache_key(self):
+        """Test badge content changes the output digest but not the base key"""
+        renderer = IconRenderer(RenderSpec())
+        one, two = {**PROFILE, 'badge': 1}, {**PROFILE, 'badge': 2}
+        assert renderer.cache_key(one) != renderer.cache_key(two)
+        assert renderer.base_key(one) == renderer.base_key(two)
+
+
+class TestPersistentBase:
+    """Test base frames shared through the render cache"""
+
+    def test_pack_round_trip(self, tmp_path):
+        """Test frames survive serialization pixel for pixel"""
+        renderer = IconRenderer(RenderSpec(sizes=(16, 48)), fonts=FontResolver(index_path=str(tmp_path / "fonts.json")))
+        frames = renderer.render(PROFILE)
+        assert [f.tobytes() for f in unpack_frames(pack_frames(frames))] == [f.tobytes() for f in frames]
+
+    def test_batch_workers_reuse_bases(self, tmp_path):
+        """Test a badge update in the process pool composites over stored bases"""
+        cache = RenderCache(str(tmp_path / "cache"))
+        renderer = IconRenderer(RenderSpec(sizes=(16, 32), show_text=False),
+                                fonts=FontResolver(index_path=str(tmp_path / "fonts.json")), base_cache=cache)
+        profiles = [{'id': f'P{i}', 'name': f'Work {i}', 'color': f'#2196F{i}', 'browser': 'safari', 'badge': 1}
+                    for i in range(6)]
+        generator = BatchIconGenerator(renderer, max_workers=2)
+        assert all(r.error is None for r in generator.generate(profiles, str(tmp_path / "out")))
+
+        # Replace every stored base with solid magenta: only reuse can show it
+        base_keys = [renderer.base_key(p) for p in profiles]
+        for key in base_keys:
+            cache.put(f"{key}.base", pack_frames([Image.new('RGBA', (s, s), (255, 0, 255, 255)) for s in (16, 32)]))
+        for profile in profiles:
+            profile['badge'] = 2
+        results = list(generator.generate(profiles, str(tmp_path / "out")))
+        assert all(r.error is None for r in results)
+        for result in results:
+            with Image.open(result.path) as ico:
+                assert ico.convert('RGBA').getpixel((2, 28)) == (255, 0, 255, 255)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,209 @@
+"""
+Tests for parallel batch icon generation
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from icon_batch import BatchIconGenerator, icon_filename, spawn_pool, unique_stems
+from icon_renderer import IconRenderer, RenderSpec
+
+
+def make_profiles(count):
+    return [
+        {'id': f'Profile {i}', 'name': f'Profile {i}', 'color': '#2196F3', 'browser': 'chrome'}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def renderer():
+    return IconRenderer(RenderSpec(sizes=(16, 32), show_text=False))
+
+
+class TestBatchIconGenerator:
+    """Test batch generation engine"""
+
+    def test_icon_filename(self):
+        """Test spaces are replaced in icon file names"""
+        assert icon_filename({'name': 'My Work'}) == 'My_Work.ico'
+
+    def test_serial_small_batch(self, renderer, tmp_path):
+        """Test small batches render in-process"""
+        results = list(BatchIconGenerator(renderer, max_workers=1).generate(make_profiles(2), str(tmp_path)))
+        assert sorted(r.index for r in results) == [0, 1]
+        assert all(os.path.exists(r.path) for r in results)
+
+    def test_process_pool_batch(self, renderer, tmp_path):
+        """Test profiles fan out across worker processes"""
+        profiles = make_profiles(6)
+        results = list(BatchIconGenerator(renderer, max_workers=2).generate(profiles, str(tmp_path)))
+        assert sorted(r.index for r in results) == list(range(6))
+        assert all(r.error is None for r in results)
+        assert len(os.listdir(tmp_path)) == 6
+
+    def test_logos_preloaded(self, renderer, tmp_path, monkeypatch):
+        """Test a batch decodes each browser's logos before rendering"""
+        calls = []
+        monkeypatch.setattr(renderer.logos, "preload", lambda browsers, sizes: calls.append((browsers, sizes)))
+        profiles = make_profiles(2) + [{'id': 'P', 'name': 'Fox', 'browser': 'firefox'}]
+        list(BatchIconGenerator(renderer, max_workers=1).generate(profiles, str(tmp_path)))
+        assert calls == [(['chrome', 'firefox'], [16])]
+
+    def test_workers_spawned(self):
+        """Test the default pool starts workers fresh instead of forking the app"""
+        with spawn_pool(max_workers=1) as pool:
+            assert pool._mp_context.get_start_method() == "spawn"
+        assert BatchIconGenerator(None).executor_factory is spawn_pool
+
+    def test_errors_reported_per_profile(self, renderer, tmp_path):
+        """Test a failing profile does not abort the batch"""
+        profiles = make_profiles(4)
+        profiles[2]['color'] = 'not-a-color'
+        generator = BatchIconGenerator(renderer, max_workers=2, executor_factory=ThreadPoolExecutor)
+        results = {r.index: r for r in generator.generate(profiles, str(tmp_path))}
+        assert results[2].error is not None
+        assert results[2].path is None
+        assert results[0].error is None
+
+    def test_multi_format_batch(self, renderer, tmp_path):
+        """Test each profile is exported to every requested format"""
+        generator = BatchIconGenerator(renderer, max_workers=1, formats=["ico", "webp"])
+        results = list(generator.generate(make_profiles(2), str(tmp_path)))
+        assert all(r.path.endswith(".ico") for r in results)
+        assert all(os.path.exists(r.outputs["webp"][0]) for r in results)
+
+    def test_ico_with_large_frames(self, tmp_path):
+        """Test ICO output keeps to 256px when the spec also renders larger frames"""
+        renderer = IconRenderer(RenderSpec(sizes=(16, 256, 512), show_text=False))
+        results = list(BatchIconGenerator(renderer, max_workers=1).generate(make_profiles(1), str(tmp_path)))
+        assert results[0].error is None
+        assert os.path.exists(results[0].path)
+
+
+class TestDeduplication:
+    """Test identical icons are rendered once per batch"""
+
+    def test_unique_stems(self):
+        """Test profiles sharing a name get distinct files"""
+        profiles = [{'id': 'Default', 'name': 'Work'}, {'id': 'Profile 2', 'name': 'Work'}]
+        assert unique_stems(profiles) == ['Work', 'Work_Profile_2']
+        # Stems from the last run win over list order while the name still matches
+        assert unique_stems(profiles, ['Work_Profile_1', 'Work']) == ['Work_Profile_1', 'Work']
+        assert unique_stems(profiles, ['Home', None]) == ['Work', 'Work_Profile_2']
+
+    def test_identical_profiles_rendered_once(self, renderer, tmp_path, monkeypatch):
+        """Test duplicates are linked instead of rendered"""
+        profiles = [{'id': f'Profile {i}', 'name': 'Work', 'color': '#2196F3', 'browser': 'chrome'}
+                    for i in range(5)]
+        calls = []
+        render = renderer.render
+        monkeypatch.setattr(renderer, "render", lambda profile: calls.append(profile) or render(profile))
+
+        generator = BatchIconGenerator(renderer, max_workers=1)
+        results = list(generator.generate(profiles, str(tmp_path)))
+        assert len(calls) == 1
+        assert generator.renders_saved == 4
+        assert sum(r.deduplicated for r in results) == 4
+        assert len({r.path for r in results}) == 5
+        data = {open(r.path, 'rb').read() for r in results}
+        assert len(data) == 1
+
+    def test_multi_format_duplicates(self, renderer, tmp_path):
+        """Test every format's files are mapped to the duplicate"""
+        profiles = [{'id': 'A', 'name': 'Work', 'color': '#2196F3'}, {'id': 'B', 'name': 'Work', 'color': '#2196F3'}]
+        generator = BatchIconGenerator(renderer, max_workers=1, formats=["ico", "png"])
+        results = sorted(generator.generate(profiles, str(tmp_path)), key=lambda r: r.index)
+        assert results[1].path == str(tmp_path / 'Work_B.ico')
+        assert all(path.endswith('Work_B.png') and os.path.exists(path) for path in results[1].outputs["png"])
+
+    def test_duplicate_keeps_shared_folders(self, renderer, tmp_path):
+        """Test a profile named like an export folder only renames its own files"""
+        profiles = [{'id': 'A', 'name': 'hicolor', 'color': '#2196F3'},
+                    {'id': 'B', 'name': 'hicolor', 'color': '#2196F3'}]
+        generator = BatchIconGenerator(renderer, max_workers=1, formats=["png", "favicon"])
+        results = sorted(generator.generate(profiles, str(tmp_path)), key=lambda r: r.index)
+        assert results[1].deduplicated
+        assert str(tmp_path / 'hicolor' / '16x16' / 'apps' / 'hicolor_B.png') in results[1].outputs["png"]
+        assert str(tmp_path / 'favicon' / 'hicolor_B' / 'favicon.ico') in results[1].outputs["favicon"]
+        assert all(os.path.exists(path) for paths in results[1].outputs.values() for path in paths)
+
+    def test_rewrite_does_not_touch_linked_copy(self, renderer, tmp_path):
+        """Test rewriting one linked icon leaves its twin intact"""
+        profiles = [{'id': 'A', 'name': 'Work', 'color': '#2196F3'}, {'id': 'B', 'name': 'Work', 'color': '#2196F3'}]
+        generator = BatchIconGenerator(renderer, max_workers=1)
+        list(generator.generate(profiles, str(tmp_path), incremental=True))
+        before = (tmp_path / 'Work_B.ico').read_bytes()
+
+        profiles[0]['color'] = '#FF5722'
+        list(generator.generate(profiles, str(tmp_path), incremental=True))
+        assert (tmp_path / 'Work_B.ico').read_bytes() == before
+        assert (tmp_path / 'Work.ico').read_bytes() != before
+
+
+class TestIncrementalGeneration:
+    """Test manifest-driven regeneration"""
+
+    def test_unchanged_profiles_skipped(self, renderer, tmp_path):
+        """Test a rerun only renders profiles whose inputs changed"""
+        profiles = make_profiles(3)
+        generator = BatchIconGenerator(renderer, max_workers=1)
+        list(generator.generate(profiles, str(tmp_path), incremental=True))
+
+        profiles[1]['color'] = '#FF5722'
+        results = {r.index: r for r in generator.generate(profiles, str(tmp_path), incremental=True)}
+        assert results[0].unchanged and results[2].unchanged
+        assert not results[1].unchanged
+
+    def test_removed_profiles_deleted(self, renderer, tmp_path):
+        """Test outputs of profiles that disappeared are deleted"""
+        profiles = make_profiles(3)
+        generator = BatchIconGenerator(renderer, max_workers=1)
+        list(generator.generate(profiles, str(tmp_path), incremental=True))
+
+        list(generator.generate(profiles[:2], str(tmp_path), incremental=True))
+        assert generator.removed == [str(tmp_path / 'Profile_2.ico')]
+        assert not (tmp_path / 'Profile_2.ico').exists()
+
+    def test_renamed_profile_replaces_file(self, renderer, tmp_path):
+        """Test a renamed profile's old file is removed"""
+        profiles = make_profiles(1)
+        generator = BatchIconGenerator(renderer, max_workers=1)
+        list(generator.generate(profiles, str(tmp_path), incremental=True))
+
+        profiles[0]['name'] = 'Renamed'
+        list(generator.generate(profiles, str(tmp_path), incremental=True))
+        assert (tmp_path / 'Renamed.ico').exists()
+        assert not (tmp_path / 'Profile_0.ico').exists()
+
+    def test_same_name_inserted_ahead(self, renderer, tmp_path):
+        """Test a new same-name profile at the front does not take over existing files"""
+        a = {'id': 'P1', 'name': 'Work', 'color': '#F44336', 'browser': 'chrome'}
+        b = {'id': 'P2', 'name': 'Work', 'color': '#2196F3', 'browser': 'chrome'}
+        generator = BatchIconGenerator(renderer, max_workers=1)
+        list(generator.generate([a, b], str(tmp_path), incremental=True))
+        before = {name: (tmp_path / name).read_bytes() for name in ('Work.ico', 'Work_P2.ico')}
+
+        c = {'id': 'P0', 'name': 'Work', 'color': '#4CAF50', 'browser': 'chrome'}
+        results = {r.profile['id']: r for r in generator.generate([c, a, b], str(tmp_path), incremental=True)}
+        assert results['P1'].unchanged and results['P2'].unchanged
+        assert results['P0'].path == str(tmp_path / 'Work_P0.ico')
+        assert {name: (tmp_path / name).read_bytes() for name in before} == before
+        assert generator.removed == []
+
+    def test_deleted_output_regenerated(self, renderer, tmp_path):
+        """Test missing files are rebuilt even when inputs match"""
+        profiles = make_profiles(1)
+        generator = BatchIconGenerator(renderer, max_workers=1)
+        list(generator.generate(profiles, str(tmp_path), incremental=True))
+
+        os.remove(tmp_path / 'Profile_0.ico')
+        results = list(generator.generate(profiles, str(tmp_path), incremental=True))
+        assert not results[0].unchanged
+        assert (tmp_path / 'Profile_0.ico').exists()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
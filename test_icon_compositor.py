@@ -0,0 +1,70 @@
+"""
+Tests for premultiplied-alpha compositing
+"""
+
+import pickle
+
+import pytest
+from PIL import Image
+
+from icon_compositor import Compositor, over
+from icon_renderer import IconRenderer, RenderSpec
+
+
+def close(a, b, tolerance=2):
+    return all(abs(x - y) <= tolerance for x, y in zip(a, b))
+
+
+class TestBlendOps:
+    """Test blend formulas against straight-alpha references"""
+
+    def test_over_matches_alpha_composite(self):
+        """Test masked paste equals Pillow's straight-alpha over"""
+        dst = Image.new('RGBA', (1, 1), (0, 0, 255, 128))
+        src = Image.new('RGBA', (1, 1), (255, 0, 0, 96))
+        expected = Image.alpha_composite(dst, src).getpixel((0, 0))
+
+        canvas = dst.convert('RGBa')
+        opaque = Image.new('RGBa', (1, 1), (255, 0, 0, 255))
+        over(canvas, opaque, src.getchannel('A'))
+        assert close(canvas.convert('RGBA').getpixel((0, 0)), expected)
+
+
+class TestCompositor:
+    """Test scratch buffer reuse"""
+
+    def test_canvas_reused_and_cleared(self):
+        """Test each size keeps one canvas that is cleared on reuse"""
+        compositor = Compositor()
+        canvas = compositor.canvas(16)
+        compositor.fill(canvas, (255, 0, 0), Image.new('L', (16, 16), 255))
+        again = compositor.canvas(16)
+        assert again is canvas
+        assert again.getpixel((0, 0)) == (0, 0, 0, 0)
+
+    def test_fill_is_premultiplied(self):
+        """Test color fills blend premultiplied, not straight"""
+        compositor = Compositor()
+        canvas = compositor.canvas(4)
+        compositor.fill(canvas, (200, 100, 50), Image.new('L', (4, 4), 128))
+        assert close(canvas.getpixel((0, 0)), (100, 50, 25, 128))
+        assert close(compositor.finish(canvas).getpixel((0, 0)), (200, 100, 50, 128))
+
+    def test_pickle_drops_buffers(self):
+        """Test workers allocate their own scratch buffers"""
+        compositor = Compositor()
+        compositor.canvas(32)
+        assert pickle.loads(pickle.dumps(compositor))._canvases == {}
+
+    def test_effects_render_without_sharing_canvas(self):
+        """Test frames do not alias the reused scratch canvas"""
+        renderer = IconRenderer(RenderSpec(shadow=True, glow=True, show_text=False, sizes=(64,)))
+        first = renderer.render({'name': 'A', 'color': '#ff0000', 'browser': 'safari'})[0]
+        before = first.tobytes()
+        renderer.render({'name': 'B', 'color': '#0000ff', 'browser': 'safari'})
+        assert first.tobytes() == before
+        assert first.getpixel((32, 32))[:3] == (255, 0, 0)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,101 @@
+"""
+Tests for icon file encoders
+"""
+
+import io
+import os
+import struct
+
+import pytest
+from PIL import Image
+
+from icon_export import FORMAT_SIZES, FrameSet, encode_ico, export_frames, required_sizes, write_ico
+from icon_renderer import IconRenderer, RenderSpec
+
+
+@pytest.fixture(scope="module")
+def frames():
+    profile = {'name': 'Work', 'color': '#2196F3', 'browser': 'chrome'}
+    return IconRenderer(RenderSpec()).render(profile)
+
+
+class TestIcoEncoder:
+    """Test multi-size ICO output"""
+
+    def test_directory_entries(self, frames):
+        """Test the header lists every frame with its size"""
+        data = encode_ico(frames)
+        reserved, kind, count = struct.unpack_from('<HHH', data)
+        assert (reserved, kind, count) == (0, 1, len(frames))
+        widths = [data[6 + 16 * i] or 256 for i in range(count)]
+        assert widths == [f.size[0] for f in frames]
+
+    def test_png_for_large_bmp_for_small(self, frames):
+        """Test 256 is PNG compressed and small sizes are BMP"""
+        data = encode_ico(frames)
+        for i, frame in enumerate(frames):
+            _, offset = struct.unpack_from('<II', data, 6 + 16 * i + 8)
+            is_png = data[offset:offset + 8] == b'\x89PNG\r\n\x1a\n'
+            assert is_png == (frame.size[0] >= 256)
+
+    def test_frames_embedded_unchanged(self, frames):
+        """Test every size decodes to the frame that was rendered"""
+        with Image.open(io.BytesIO(encode_ico(frames))) as ico:
+            for frame in frames:
+                decoded = ico.ico.getimage(frame.size).convert('RGBA')
+                assert decoded.tobytes() == frame.tobytes()
+
+    def test_write_to_path(self, frames, tmp_path):
+        """Test writing straight to a file path"""
+        path = tmp_path / "icon.ico"
+        written = write_ico(frames, str(path))
+        assert path.stat().st_size == written
+
+    def test_rejects_oversized_frames(self):
+        """Test frames larger than 256px are refused"""
+        with pytest.raises(ValueError):
+            encode_ico([Image.new('RGBA', (512, 512))])
+
+    def test_rejects_empty(self):
+        """Test an icon needs frames"""
+        with pytest.raises(ValueError):
+            encode_ico([])
+
+
+class TestExportFrames:
+    """Test multi-format export from one set of frames"""
+
+    def test_required_sizes(self):
+        """Test sizes are merged across formats"""
+        assert required_sizes(["ico", "webp"]) == FORMAT_SIZES["ico"]
+        assert 1024 in required_sizes(["icns"])
+
+    def test_frame_set_derives_sizes(self, frames):
+        """Test missing sizes are reduced from the next larger frame"""
+        frame_set = FrameSet(frames)
+        assert frame_set.get(64).size == (64, 64)
+        assert frame_set.get(64) is frame_set.get(64)
+        assert frame_set.get(256) is frames[-1]
+
+    def test_all_formats(self, frames, tmp_path):
+        """Test every format is written from the same frames"""
+        outputs = export_frames(frames, str(tmp_path), "Work", ["ico", "icns", "png", "webp", "favicon"])
+        assert all(os.path.exists(path) for paths in outputs.values() for path in paths)
+        assert len(outputs["png"]) == len(FORMAT_SIZES["png"])
+        with Image.open(outputs["png"][0]) as img:
+            assert img.size == (16, 16)
+        with Image.open(outputs["icns"][0]) as img:
+            assert img.format == "ICNS"
+        with Image.open(outputs["webp"][0]) as img:
+            assert img.size == (256, 256)
+        assert any(path.endswith("apple-touch-icon.png") for path in outputs["favicon"])
+
+    def test_unknown_format_rejected(self, frames, tmp_path):
+        """Test unsupported formats fail before anything is written"""
+        with pytest.raises(ValueError):
+            export_frames(frames, str(tmp_path / "out"), "Work", ["bmp"])
+        assert not (tmp_path / "out").exists()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,141 @@
+"""
+Tests for gradient and pattern fills
+"""
+
+import pytest
+
+from icon_fills import (
+    gradient_fill,
+    gradient_ramp,
+    gradient_stops,
+    normalize_stops,
+    pattern_fill,
+    pattern_tile,
+    stops_palette,
+    tile_image,
+    PATTERN_TYPES,
+)
+from icon_renderer import IconRenderer, RenderSpec
+
+
+class TestGradientStops:
+    """Test stop normalization"""
+
+    def test_palette_gradient_used(self):
+        """Test palette dicts provide their own gradient"""
+        color = {'name': 'Sky', 'hex': '#3388de', 'gradient': ['#3388de', '#5ca3f0']}
+        assert gradient_stops(color) == ('#3388de', '#5ca3f0')
+
+    def test_hex_color_derives_gradient(self):
+        """Test plain colors get a lighter second stop"""
+        stops = gradient_stops('#204060')
+        assert stops[0] == '#204060'
+        assert stops[1] != '#204060'
+
+    def test_even_spacing(self):
+        """Test bare colors are spaced evenly"""
+        assert normalize_stops(['#000000', '#808080', '#ffffff']) == (
+            (0.0, '#000000'), (0.5, '#808080'), (1.0, '#ffffff'))
+
+    def test_palette_endpoints(self):
+        """Test palette starts and ends on the outer stops"""
+        palette = stops_palette(normalize_stops(['#ff0000', '#0000ff']))
+        assert palette[:3] == [255, 0, 0]
+        assert palette[-3:] == [0, 0, 255]
+
+    def test_empty_stops_rejected(self):
+        """Test a gradient needs a color"""
+        with pytest.raises(ValueError):
+            normalize_stops([])
+
+
+class TestGradientFill:
+    """Test gradient rendering"""
+
+    def test_linear_horizontal(self):
+        """Test 0 degrees runs left to right"""
+        fill = gradient_fill(['#000000', '#ffffff'], 64, "linear", 0)
+        assert fill.getpixel((1, 32))[0] < 40
+        assert fill.getpixel((62, 32))[0] > 215
+
+    def test_linear_vertical(self):
+        """Test 90 degrees runs top to bottom"""
+        fill = gradient_fill(['#000000', '#ffffff'], 64, "linear", 90)
+        assert fill.getpixel((32, 1))[0] < 40
+        assert fill.getpixel((32, 62))[0] > 215
+
+    def test_radial(self):
+        """Test radial gradients start at the center"""
+        fill = gradient_fill(['#000000', '#ffffff'], 64, "radial")
+        assert fill.getpixel((32, 32))[0] < 20
+        assert fill.getpixel((0, 32))[0] > 230
+
+    def test_angle(self):
+        """Test conic gradients sweep around the center"""
+        fill = gradient_fill(['#000000', '#ffffff'], 64, "angle", 0)
+        assert fill.getpixel((60, 34))[0] < fill.getpixel((60, 28))[0]
+
+    def test_multi_stop(self):
+        """Test a middle stop is reached halfway"""
+        fill = gradient_fill(['#000000', '#ff0000', '#000000'], 64, "linear", 0)
+        assert fill.getpixel((32, 32))[0] > 230
+
+    def test_ramp_cached(self):
+        """Test ramps are built once per geometry"""
+        assert gradient_ramp("linear", 45, 32) is gradient_ramp("linear", 45, 32)
+
+    def test_renderer_gradient_mode(self):
+        """Test the renderer paints gradients through the shape mask"""
+        spec = RenderSpec(fill_mode="gradient", shape="circle", shadow=False, show_text=False, sizes=(64,))
+        profile = {'name': 'Work', 'color': {'hex': '#000000', 'gradient': ['#000000', '#ffffff']}, 'browser': 'safari'}
+        frame = IconRenderer(spec).render(profile)[0]
+        assert frame.getpixel((32, 4))[0] < frame.getpixel((32, 60))[0]
+        assert frame.getpixel((0, 0))[3] == 0
+
+
+class TestPatternFill:
+    """Test tiled pattern fills"""
+
+    @pytest.mark.parametrize("pattern", PATTERN_TYPES)
+    def test_patterns_use_both_colors(self, pattern):
+        """Test every pattern renders at full size with both colors"""
+        fill = pattern_fill(pattern, 4, ('#000000', '#ffffff'), 64)
+        assert fill.size == (64, 64)
+        lo, hi = fill.convert('L').getextrema()
+        assert lo < 64 and hi > 192
+
+    def test_tile_cached(self):
+        """Test tiles are generated once per pattern, scale and colors"""
+        assert pattern_tile("dots", 4, ('#000000', '#ffffff')) is pattern_tile("dots", 4, ('#000000', '#ffffff'))
+
+    def test_noise_deterministic(self):
+        """Test noise tiles are reproducible for cache keys"""
+        a = pattern_tile.__wrapped__("noise", 2, ('#000000', '#ffffff'))
+        b = pattern_tile.__wrapped__("noise", 2, ('#000000', '#ffffff'))
+        assert a.tobytes() == b.tobytes()
+
+    def test_tile_image_repeats(self):
+        """Test tiling repeats the tile across the canvas"""
+        tile = pattern_tile("checks", 2, ('#000000', '#ffffff'))
+        canvas = tile_image(tile, 37)
+        assert canvas.size == (37, 37)
+        assert canvas.getpixel((0, 0)) == canvas.getpixel((4, 8)) == canvas.getpixel((32, 36))
+
+    def test_fill_returns_copy(self):
+        """Test callers can mutate a fill without touching the cache"""
+        a = pattern_fill("stripes", 4, ('#000000', '#ffffff'), 16)
+        a.putalpha(0)
+        b = pattern_fill("stripes", 4, ('#000000', '#ffffff'), 16)
+        assert b.getpixel((0, 0))[3] == 255
+
+    def test_renderer_pattern_mode(self):
+        """Test the renderer paints patterns in pattern mode"""
+        spec = RenderSpec(fill_mode="pattern", pattern="checks", shadow=False, show_text=False, sizes=(64,))
+        profile = {'name': 'Work', 'color': '#000000', 'browser': 'safari'}
+        frame = IconRenderer(spec).render(profile)[0]
+        lo, hi = frame.crop((16, 40, 48, 60)).convert('L').getextrema()
+        assert lo < hi
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
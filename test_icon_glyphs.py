@@ -0,0 +1,73 @@
+"""
+Tests for glyph rasterizing
+"""
+
+import pytest
+
+from icon_glyphs import GlyphCache
+from icon_renderer import IconRenderer, RenderSpec
+
+# Symbol glyph mapped by common text fonts, so tests run without emoji fonts
+GLYPH = "★"
+# Private-use code point no font maps
+MISSING = "\U000F0001"
+
+
+class TestGlyphCache:
+    """Test glyph lookup and memoization"""
+
+    def test_glyph_rasterized_square(self):
+        """Test glyphs are fitted into a square RGBA image"""
+        cache = GlyphCache()
+        if cache.font_for(GLYPH, "Segoe UI") is None:
+            pytest.skip("no installed font maps the test glyph")
+        image = cache.get(GLYPH, 64, "Segoe UI")
+        assert image.size == (64, 64)
+        assert image.mode == 'RGBA'
+        assert image.getbbox() is not None
+
+    def test_glyph_rasterized_once_per_size(self):
+        """Test repeated requests reuse the raster"""
+        cache = GlyphCache()
+        for _ in range(50):
+            for size in (32, 64):
+                cache.get(GLYPH, size, "Segoe UI")
+        assert cache.rasterized <= 2
+
+    def test_missing_glyph(self):
+        """Test glyphs no font maps are reported, not drawn as boxes"""
+        cache = GlyphCache()
+        assert cache.font_for(MISSING, "Segoe UI") is None
+        assert cache.get(MISSING, 64, "Segoe UI") is None
+
+
+class TestGlyphRendering:
+    """Test profile glyphs in rendered icons"""
+
+    def test_glyph_replaces_logo(self):
+        """Test a mapped glyph is drawn instead of the browser logo"""
+        renderer = IconRenderer(RenderSpec(shadow=False, show_text=False, sizes=(128,)))
+        if renderer.glyph({'icon': GLYPH}) is None:
+            pytest.skip("no installed font maps the test glyph")
+        profile = {'name': 'Work', 'color': '#2196F3', 'browser': 'chrome'}
+        logo = renderer.render(profile)[0]
+        glyph = renderer.render({**profile, 'icon': GLYPH})[0]
+        assert glyph.tobytes() != logo.tobytes()
+        assert renderer.cache_key(profile) != renderer.cache_key({**profile, 'icon': GLYPH})
+
+    def test_missing_glyph_keeps_logo(self):
+        """Test an unmapped glyph falls back to the browser logo"""
+        renderer = IconRenderer(RenderSpec(shadow=False, show_text=False, sizes=(128,)))
+        profile = {'name': 'Work', 'color': '#2196F3', 'browser': 'chrome'}
+        assert renderer.render({**profile, 'icon': MISSING})[0].tobytes() == renderer.render(profile)[0].tobytes()
+
+    def test_batch_rasterizes_glyph_once_per_size(self):
+        """Test many profiles sharing a template glyph share its raster"""
+        renderer = IconRenderer(RenderSpec(pyramid=False, shadow=True))
+        for i in range(20):
+            renderer.render({'name': f'Work {i}', 'color': '#2196F3', 'icon': GLYPH})
+        assert renderer.glyphs.rasterized <= len(renderer.spec.sizes)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
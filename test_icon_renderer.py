@@ -0,0 +1,205 @@
+"""
+Unit tests for the headless icon renderer
+"""
+
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from PIL import Image
+
+from icon_renderer import (
+    IconRenderer,
+    LayerCache,
+    RenderSpec,
+    shape_mask,
+    is_light_color,
+    normalize_color,
+    DEFAULT_SIZES,
+)
+
+
+PROFILES = [
+    {'id': 'Default', 'name': 'Work', 'color': '#2196F3', 'browser': 'chrome'},
+    {'id': 'Profile 1', 'name': 'Personal', 'color': {'hex': '#ffffff'}, 'browser': 'edge'},
+]
+
+
+class TestColorHelpers:
+    """Test color normalization helpers"""
+
+    def test_normalize_hex_string(self):
+        """Test hex strings pass through unchanged"""
+        assert normalize_color('#2196F3') == '#2196F3'
+
+    def test_normalize_palette_dict(self):
+        """Test palette dicts resolve to their hex value"""
+        assert normalize_color({'name': 'Sky', 'hex': '#3388de'}) == '#3388de'
+
+    def test_light_color_detection(self):
+        """Test luminance based light/dark detection"""
+        assert is_light_color('#ffffff')
+        assert not is_light_color('#000000')
+        assert is_light_color({'hex': '#ffffff'})
+
+
+class TestIconRenderer:
+    """Test icon rendering without a GUI"""
+
+    def test_render_all_sizes(self):
+        """Test one frame is produced per configured size"""
+        frames = IconRenderer().render(PROFILES[0])
+        assert [f.size for f in frames] == [(s, s) for s in DEFAULT_SIZES]
+        assert all(f.mode == 'RGBA' for f in frames)
+
+    def test_render_many_preserves_order(self):
+        """Test batch rendering returns one frame list per profile"""
+        results = IconRenderer(RenderSpec(sizes=(32,))).render_many(PROFILES)
+        assert len(results) == len(PROFILES)
+        assert results[0][0].getpixel((16, 16))[:3] != results[1][0].getpixel((16, 16))[:3]
+
+    @pytest.mark.parametrize("shape", ["rounded", "circle", "square", "hexagon", "badge"])
+    def test_shapes_render(self, shape):
+        """Test every advertised shape renders an opaque center"""
+        spec = RenderSpec(shape=shape, shadow=False, show_text=False, sizes=(64,))
+        frame = IconRenderer(spec).render(PROFILES[0])[0]
+        assert frame.getpixel((32, 32))[3] == 255
+
+    @pytest.mark.parametrize("shape", ["rounded", "badge"])
+    def test_largest_radius(self, shape):
+        """Test the slider's top radius renders at every size with round corners"""
+        frames = IconRenderer(RenderSpec(shape=shape, radius=50)).render(PROFILES[0])
+        assert [frame.size[0] for frame in frames] == list(DEFAULT_SIZES)
+        assert frames[-1].getpixel((0, 0))[3] == 0
+
+    def test_circle_corners_transparent(self):
+        """Test circle shape leaves corners transparent"""
+        spec = RenderSpec(shape="circle", shadow=False, show_text=False, sizes=(64,))
+        frame = IconRenderer(spec).render(PROFILES[0])[0]
+        assert frame.getpixel((0, 0))[3] == 0
+
+    def test_effects_render(self):
+        """Test shadow, glow and text together"""
+        spec = RenderSpec(shadow=True, glow=True, show_text=True, sizes=(128,))
+        frame = IconRenderer(spec).render(PROFILES[1])[0]
+        assert isinstance(frame, Image.Image)
+
+    def test_spec_is_immutable(self):
+        """Test render specs cannot be mutated"""
+        spec = RenderSpec()
+        with pytest.raises(Exception):
+            spec.shape = "circle"
+
+    def test_renderer_is_picklable(self):
+        """Test renderer can be shipped to worker processes"""
+        renderer = IconRenderer(RenderSpec(sizes=(48,)))
+        renderer.render(PROFILES[0])
+        clone = pickle.loads(pickle.dumps(renderer))
+        assert clone.spec == renderer.spec
+        assert clone.render(PROFILES[0])[0].size == (48, 48)
+
+
+class TestBorderAndOpacity:
+    """Test the border stroke and opacity effects"""
+
+    def test_border_stroke(self):
+        """Test the border paints the shape edge and leaves the interior"""
+        spec = RenderSpec(border=True, border_color="#ffffff", shadow=False, show_text=False, sizes=(256,))
+        frame = IconRenderer(spec).render({'name': 'Work', 'color': '#000000', 'browser': 'safari'})[0]
+        assert frame.getpixel((128, 2)) == (255, 255, 255, 255)
+        assert frame.getpixel((128, 128)) == (0, 0, 0, 255)
+
+    def test_border_mask_cached(self):
+        """Test stroke masks are built once per shape, size and width"""
+        renderer = IconRenderer(RenderSpec(border=True, shadow=True, show_text=False, sizes=(64,)))
+        renderer.render({'name': 'A', 'color': '#000000', 'browser': 'safari'})
+        misses = renderer.layers.misses
+        renderer.render({'name': 'B', 'color': '#000000', 'browser': 'safari'})
+        assert renderer.layers.misses == misses
+
+    def test_opacity_scales_alpha(self):
+        """Test opacity fades every frame once, including pyramid levels"""
+        spec = RenderSpec(opacity=50, shadow=False, show_text=False, sizes=(32, 64, 128))
+        frames = IconRenderer(spec).render({'name': 'Work', 'color': '#000000', 'browser': 'safari'})
+        assert [f.getpixel((f.width // 2, f.height // 2))[3] for f in frames] == [127, 127, 127]
+
+
+class TestPyramidRendering:
+    """Test master-resolution rendering with downsampled sizes"""
+
+    def test_pyramid_sizes(self):
+        """Test pyramid mode produces every configured size"""
+        frames = IconRenderer(RenderSpec(pyramid=True, supersample=2, hint_small=True)).render(PROFILES[0])
+        assert [f.size for f in frames] == [(s, s) for s in DEFAULT_SIZES]
+
+    def test_pyramid_draws_base_once(self):
+        """Test shape and shadow are built once instead of once per size"""
+        renderer = IconRenderer(RenderSpec(pyramid=True))
+        renderer.render(PROFILES[0])
+        per_size = renderer.layers.misses
+
+        renderer = IconRenderer(RenderSpec(pyramid=False))
+        renderer.render(PROFILES[0])
+        assert renderer.layers.misses == per_size * len(DEFAULT_SIZES)
+
+    def test_pyramid_matches_direct_color(self):
+        """Test downsampled frames keep the profile fill color"""
+        spec = RenderSpec(shadow=False, show_text=False, sizes=(16, 256))
+        small = IconRenderer(spec).render(PROFILES[0])[0]
+        assert small.getpixel((8, 14)) == (0x21, 0x96, 0xF3, 255)
+
+
+class TestLayerCache:
+    """Test reuse of color independent layers"""
+
+    def test_layers_shared_across_profiles(self):
+        """Test a second profile reuses masks and effect layers"""
+        renderer = IconRenderer(RenderSpec(shadow=True, sizes=(64,)))
+        renderer.render(PROFILES[0])
+        misses = renderer.layers.misses
+        renderer.render({**PROFILES[1], 'browser': PROFILES[0].get('browser')})
+        assert renderer.layers.misses == misses
+        assert renderer.layers.hits > 0
+
+    def test_glow_underlay_per_color(self):
+        """Test glow only adds one pre-blended underlay per new color"""
+        renderer = IconRenderer(RenderSpec(shadow=True, glow=True, sizes=(64,)))
+        renderer.render(PROFILES[0])
+        misses = renderer.layers.misses
+        renderer.render({**PROFILES[1], 'browser': PROFILES[0].get('browser')})
+        assert renderer.layers.misses == misses + 1
+
+    def test_bounded_memory(self):
+        """Test least recently used layers are evicted over budget"""
+        cache = LayerCache(max_bytes=64 * 64 * 2)
+        for size in (64, 64, 32):
+            cache.get_or_create(('shape', 'circle', size, 0), lambda s=size: shape_mask('circle', s, 0))
+        cache.get_or_create(('shape', 'square', 64, 0), lambda: shape_mask('square', 64, 0))
+        assert cache._bytes <= cache.max_bytes
+        assert len(cache) == 2
+
+    def test_shared_between_threads(self):
+        """Test concurrent lookups and evictions keep the byte count exact"""
+        cache = LayerCache(max_bytes=16 * 16 * 8)
+        keys = [('shape', 'square', 16, radius) for radius in range(20)]
+
+        def lookup():
+            for key in keys * 20:
+                cache.get_or_create(key, lambda r=key[3]: shape_mask('square', 16, r))
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            for future in [pool.submit(lookup) for _ in range(4)]:
+                future.result()
+        assert cache._bytes == 16 * 16 * len(cache) <= cache.max_bytes
+        assert pickle.loads(pickle.dumps(cache)).max_bytes == cache.max_bytes
+
+    def test_shape_mask(self):
+        """Test shape masks are single channel"""
+        mask = shape_mask('circle', 32, 0)
+        assert mask.mode == 'L'
+        assert mask.getpixel((16, 16)) == 255
+        assert mask.getpixel((0, 0)) == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,104 @@
+"""
+Tests for SVG icon output
+"""
+
+import os
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from icon_batch import BatchIconGenerator
+from icon_renderer import IconRenderer, RenderSpec
+from icon_svg import copy_logos, render_svg
+
+SVG_NS = "{http://www.w3.org/2000/svg}"
+
+
+def parse(renderer, profile, **kwargs):
+    return ET.fromstring(render_svg(renderer, profile, **kwargs))
+
+
+class TestRenderSvg:
+    """Test SVG documents mirror the render spec"""
+
+    @pytest.mark.parametrize("shape,tag", [
+        ("circle", "circle"), ("rounded", "rect"), ("square", "rect"), ("hexagon", "polygon")])
+    def test_shapes(self, shape, tag):
+        """Test every shape maps to an SVG element"""
+        renderer = IconRenderer(RenderSpec(shape=shape, shadow=False))
+        root = parse(renderer, {'name': 'Work', 'color': '#2196F3', 'browser': 'safari'})
+        assert root.find(f"{SVG_NS}{tag}") is not None
+
+    def test_gradient_fill(self):
+        """Test gradient specs define a gradient paint server"""
+        renderer = IconRenderer(RenderSpec(fill_mode="gradient", shadow=False))
+        profile = {'name': 'Work', 'color': {'hex': '#000000', 'gradient': ['#000000', '#ffffff']}}
+        root = parse(renderer, profile)
+        stops = root.findall(f".//{SVG_NS}stop")
+        assert [s.get("stop-color") for s in stops] == ['#000000', '#ffffff']
+
+    def test_border_and_opacity(self):
+        """Test borders become clipped strokes and opacity wraps the icon"""
+        renderer = IconRenderer(RenderSpec(border=True, opacity=40, shadow=False))
+        root = parse(renderer, {'name': 'Work', 'color': '#2196F3'})
+        group = root.find(f"{SVG_NS}g")
+        assert group.get("opacity") == "0.4"
+        assert group.find(f"{SVG_NS}rect[@stroke='#ffffff']") is not None
+
+    def test_badge(self):
+        """Test badges are drawn as a labelled group above the icon"""
+        renderer = IconRenderer(RenderSpec(shadow=False))
+        root = parse(renderer, {'name': 'Work', 'color': '#2196F3', 'badge': 5})
+        badge = root.find(f"{SVG_NS}g[@class='badge']")
+        assert badge.find(f"{SVG_NS}text").text == "5"
+
+    def test_pattern_fill(self):
+        """Test pattern specs embed the raster tile"""
+        renderer = IconRenderer(RenderSpec(fill_mode="pattern", pattern="dots"))
+        root = parse(renderer, {'name': 'Work', 'color': '#2196F3'})
+        assert root.find(f".//{SVG_NS}pattern/{SVG_NS}image").get("href").startswith("data:image/png")
+
+    def test_text_escaped(self):
+        """Test profile names are escaped as XML text"""
+        renderer = IconRenderer(RenderSpec())
+        root = parse(renderer, {'name': 'R&D <Team>', 'color': '#ffffff', 'browser': 'safari'})
+        text = root.find(f"{SVG_NS}text")
+        assert text.text == 'R&D <Team>'
+        assert text.get("fill") == "black"
+
+    def test_logo_linked_by_default(self):
+        """Test logos are referenced, keeping files small"""
+        renderer = IconRenderer(RenderSpec())
+        svg = render_svg(renderer, {'name': 'Work', 'color': '#2196F3', 'browser': 'chrome'}, logo_base="logos/")
+        assert 'href="logos/google-chrome-logo-main-icon.png"' in svg
+        assert len(svg) < 4096
+
+    def test_logo_embedded(self):
+        """Test logos can be inlined for standalone files"""
+        renderer = IconRenderer(RenderSpec())
+        root = parse(renderer, {'name': 'Work', 'browser': 'chrome'}, embed_logo=True)
+        assert root.find(f"{SVG_NS}image").get("href").startswith("data:image/png;base64,")
+
+
+class TestSvgExport:
+    """Test SVG output through the batch generator"""
+
+    def test_copy_logos(self, tmp_path):
+        """Test each browser logo is copied once for linking"""
+        renderer = IconRenderer(RenderSpec())
+        base = copy_logos(renderer, ["chrome", "chrome", "safari"], str(tmp_path))
+        assert os.listdir(tmp_path / base.rstrip("/")) == ["google-chrome-logo-main-icon.png"]
+
+    def test_svg_only_batch_skips_rasterizing(self, tmp_path, monkeypatch):
+        """Test SVG-only batches never rasterize a profile"""
+        renderer = IconRenderer(RenderSpec())
+        monkeypatch.setattr(renderer, "render", lambda profile: pytest.fail("rasterized"))
+        generator = BatchIconGenerator(renderer, max_workers=1, formats=["svg"])
+        results = list(generator.generate([{'name': 'My Work', 'browser': 'chrome'}], str(tmp_path)))
+        assert results[0].error is None
+        assert results[0].path.endswith("My_Work.svg")
+        assert os.path.exists(tmp_path / "logos" / "google-chrome-logo-main-icon.png")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
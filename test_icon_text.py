@@ -0,0 +1,96 @@
+"""
+Tests for icon text layout
+"""
+
+import pickle
+
+import pytest
+
+from icon_renderer import IconRenderer, RenderSpec
+from icon_text import ELLIPSIS, TextLayout, ellipsize
+
+
+@pytest.fixture
+def layout():
+    return TextLayout()
+
+
+class TestTextFit:
+    """Test fitting labels into the icon width"""
+
+    def test_short_text_keeps_max_size(self, layout):
+        """Test text that fits is drawn at the requested size"""
+        fit = layout.fit("Work", "Segoe UI", 20, 200)
+        assert fit.size == 20
+        assert fit.text == "Work"
+
+    def test_long_text_shrinks(self, layout):
+        """Test the largest fitting size is chosen"""
+        text = "Personal Projects"
+        fit = layout.fit(text, "Segoe UI", 40, 120, min_size=4)
+        assert fit.width <= 120
+        assert fit.size < 40
+        assert layout.measure(text, "Segoe UI", fit.size + 1)[0] > 120
+
+    def test_ellipsized_at_min_size(self, layout):
+        """Test names too long at the minimum size are ellipsized"""
+        fit = layout.fit("An extremely long profile name for testing", "Segoe UI", 20, 60, min_size=10)
+        assert fit.size == 10
+        assert fit.text.endswith(ELLIPSIS)
+        assert fit.width <= 60
+
+    def test_ellipsize_short_text_untouched(self, layout):
+        """Test ellipsize leaves fitting text alone"""
+        assert layout.ellipsize("Work", "Segoe UI", 10, 500) == "Work"
+
+    def test_ellipsize_any_font(self):
+        """Test ellipsizing with another font's measure, as Tk labels use"""
+        def width(text):
+            return 6 * len(text)
+        assert ellipsize("Personal Projects", width, 60) == "Personal…"
+        assert ellipsize("Work", width, 60) == "Work"
+
+    def test_fit_memoized(self, layout):
+        """Test repeated fits are served from memory"""
+        assert layout.fit("Work", "Segoe UI", 20, 100) is layout.fit("Work", "Segoe UI", 20, 100)
+
+
+class TestTextStrip:
+    """Test pre-rendered label strips"""
+
+    def test_strip_has_fill_and_outline(self, layout):
+        """Test the strip contains both the fill and outline colors"""
+        strip = layout.strip("Work", "Segoe UI", 24, "white", "black")
+        colors = {color for _, color in strip.getcolors(strip.width * strip.height)}
+        assert (255, 255, 255, 255) in colors
+        assert (0, 0, 0, 255) in colors
+
+    def test_strip_memoized(self, layout):
+        """Test each label is rasterized once"""
+        assert layout.strip("Work", "Segoe UI", 24, "white", "black") is \
+            layout.strip("Work", "Segoe UI", 24, "white", "black")
+
+    def test_strip_cache_bounded(self):
+        """Test least recently used strips are dropped"""
+        layout = TextLayout(max_strips=2)
+        for name in ("a", "b", "c"):
+            layout.strip(name, "Segoe UI", 12, "white", "black")
+        assert len(layout._strips) == 2
+
+    def test_pickle_drops_caches(self, layout):
+        """Test workers start with empty caches"""
+        layout.strip("Work", "Segoe UI", 24, "white", "black")
+        assert pickle.loads(pickle.dumps(layout))._strips == {}
+
+    def test_renderer_fits_long_names(self):
+        """Test long names stay inside the icon"""
+        spec = RenderSpec(shadow=False, sizes=(128,), font_size=30)
+        profile = {'name': 'A very long profile name', 'color': '#000000', 'browser': 'safari'}
+        frame = IconRenderer(spec).render(profile)[0]
+        # Text is white on black; the side margins stay free of it
+        assert frame.crop((0, 64, 10, 128)).convert('L').getextrema()[1] < 128
+        assert frame.crop((20, 64, 108, 128)).convert('L').getextrema()[1] > 200
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,112 @@
+"""
+Tests for streaming JSON member extraction
+"""
+
+import io
+import json
+
+import pytest
+
+import json_stream
+from json_stream import MemberNotFound, read_member
+from profile_discovery import read_info_cache
+
+PATH = ("profile", "info_cache")
+
+DOCUMENTS = [
+    {'profile': {'info_cache': {}}},
+    {'browser': {'windows': [{'x': 1}, [], {}], 'flag': True, 'n': None},
+     'profile': {'last_used': 'Default', 'info_cache': {'Default': {'name': 'Work'}}},
+     'tail': [1.5e3, -2, "x"]},
+    {'a': 'quote " and brace } and \\ slash', 'profile': {
+        'b': [[["{"]], {'c': '[]'}], 'info_cache': {'é"': {'name': 'ü\\"', 'l': [[1], [2, [3]]]}}}},
+    {'profile': {'info_cache': {'n': 1234567890, 'f': -1.25e-07, 's': 'x', 'l': [1, {'k': 2}], 't': True,
+                                'z': None, 'o': {'name': 'A'}}}},
+]
+
+
+class TestReadMember:
+    """Test extracting one value from a document"""
+
+    @pytest.mark.parametrize("doc", DOCUMENTS)
+    @pytest.mark.parametrize("chunk_chars", [1, 2, 7, 4096])
+    def test_matches_json_load(self, doc, chunk_chars):
+        """Test every chunk size yields the same value as a full parse"""
+        text = json.dumps(doc, ensure_ascii=False, indent=1)
+        assert read_member(io.StringIO(text), PATH, chunk_chars) == doc['profile']['info_cache']
+
+    @pytest.mark.parametrize("chunk_chars", range(1, 9))
+    def test_numbers_split(self, chunk_chars):
+        """Test a number cut off by a chunk end is not decoded short"""
+        info_cache = {'a': 12.5, 'b': -1.25e-07, 'c': 1000, 'd': [3.75]}
+        text = json.dumps({'profile': {'info_cache': info_cache}}, separators=(',', ':'))
+        assert read_member(io.StringIO(text), PATH, chunk_chars) == info_cache
+
+    def test_missing_member(self):
+        """Test a missing key is reported as such"""
+        with pytest.raises(MemberNotFound):
+            read_member(io.StringIO('{"profile": {"other": 1}}'), PATH)
+        with pytest.raises(MemberNotFound):
+            read_member(io.StringIO('{"profile": []}'), PATH)
+
+    def test_malformed(self):
+        """Test truncated documents raise ValueError"""
+        with pytest.raises(ValueError):
+            read_member(io.StringIO('{"browser": {"a": [1, 2'), PATH)
+
+    def test_bounded_buffer(self, monkeypatch):
+        """Test a large object is decoded without buffering all of its text"""
+        info_cache = {f"Profile {i}": {'name': f"Person {i}", 'active_time': i + 0.5} for i in range(5000)}
+        text = json.dumps({'profile': {'info_cache': info_cache}})
+        sizes = []
+        fill = json_stream._Scanner.fill
+
+        def record(scanner, *args):
+            sizes.append(len(scanner.buf))
+            return fill(scanner, *args)
+
+        monkeypatch.setattr("json_stream._Scanner.fill", record)
+        result = read_member(io.StringIO(text), PATH, 4096)
+        assert result == info_cache
+        assert max(sizes) < 2 * 4096 < len(text)
+        first, second = result['Profile 0'], result['Profile 1']
+        assert all(a is b for a, b in zip(first, second))  # Key strings are shared between entries
+
+    def test_deeply_nested_siblings(self):
+        """Test skipped values are not limited by recursion depth"""
+        text = '{"browser": ' + '[' * 5000 + ']' * 5000 + ', "profile": {"info_cache": {"a": 1}}}'
+        assert read_member(io.StringIO(text), PATH, 64) == {'a': 1}
+
+
+class TestReadInfoCache:
+    """Test reading profile.info_cache from Local State files"""
+
+    def test_large_local_state(self, tmp_path):
+        """Test 10k profiles are read past megabytes of unrelated state"""
+        info_cache = {f"Profile {i}": {'name': f"Person {i}"} for i in range(10000)}
+        state = {'browser': {'history': [{'url': 'x' * 40, 'n': i} for i in range(20000)]},
+                 'profile': {'info_cache': info_cache}}
+        path = tmp_path / "Local State"
+        path.write_text(json.dumps(state), encoding='utf-8')
+        assert read_info_cache(str(path)) == info_cache
+
+    def test_fallback_to_json_load(self, tmp_path, monkeypatch):
+        """Test documents the streaming reader rejects are parsed whole"""
+        path = tmp_path / "Local State"
+        path.write_text(json.dumps(DOCUMENTS[1]), encoding='utf-8')
+
+        def reject(*args):
+            raise ValueError("unsupported")
+
+        monkeypatch.setattr("profile_discovery.read_member", reject)
+        assert read_info_cache(str(path)) == {'Default': {'name': 'Work'}}
+
+    def test_missing_info_cache(self, tmp_path):
+        """Test a Local State without profiles yields none"""
+        path = tmp_path / "Local State"
+        path.write_text('{"browser": {}}', encoding='utf-8')
+        assert read_info_cache(str(path)) == {}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,179 @@
+"""
+Tests for browser profile discovery and the profile catalog
+"""
+
+import json
+import os
+import threading
+
+import pytest
+
+from profile_discovery import (
+    ParseCache,
+    ProfileCatalog,
+    ProfileDiscovery,
+    load_chromium_profiles,
+    load_firefox_profiles,
+    load_profiles,
+)
+
+
+def make_chromium(root, names):
+    root.mkdir(parents=True, exist_ok=True)
+    info_cache = {f"Profile {i}": {'name': name} for i, name in enumerate(names)}
+    (root / "Local State").write_text(json.dumps({'profile': {'info_cache': info_cache}}), encoding='utf-8')
+    return str(root)
+
+
+def make_firefox(root, names):
+    root.mkdir(parents=True, exist_ok=True)
+    sections = [f"[Profile{i}]\nName={name}\nPath=Profiles/{name.lower()}\n" for i, name in enumerate(names)]
+    (root / "profiles.ini").write_text("[General]\nVersion=2\n\n" + "\n".join(sections), encoding='utf-8')
+    return str(root)
+
+
+class TestLoaders:
+    """Test per-browser profile loaders"""
+
+    def test_chromium(self, tmp_path):
+        """Test Local State info_cache entries become profiles"""
+        path = make_chromium(tmp_path / "chrome", ["Work", "Personal"])
+        profiles = load_chromium_profiles("chrome", path)
+        assert [(p['id'], p['name']) for p in profiles] == [("Profile 0", "Work"), ("Profile 1", "Personal")]
+        assert profiles[0]['path'] == os.path.join(path, "Profile 0")
+
+    def test_firefox(self, tmp_path):
+        """Test profiles.ini sections become profiles"""
+        path = make_firefox(tmp_path / "firefox", ["default", "Dev"])
+        profiles = load_firefox_profiles(path)
+        assert [p['name'] for p in profiles] == ["default", "Dev"]
+        assert profiles[1]['path'] == os.path.join(path, "Profiles/dev")
+
+    def test_missing_files(self, tmp_path):
+        """Test directories without profile lists yield nothing"""
+        assert load_chromium_profiles("chrome", str(tmp_path)) == []
+        assert load_firefox_profiles(str(tmp_path)) == []
+
+
+class TestParseCache:
+    """Test skipping unchanged profile list files"""
+
+    def test_unchanged_file_not_parsed(self, tmp_path, monkeypatch):
+        """Test a second load reuses the stored records"""
+        path = make_chromium(tmp_path / "chrome", ["Work"])
+        cache = ParseCache(str(tmp_path / "cache.json"))
+        first = load_profiles("chrome", path, cache)
+        monkeypatch.setattr("profile_discovery.load_chromium_profiles",
+                            lambda *args: pytest.fail("parsed an unchanged file"))
+        assert load_profiles("chrome", path, cache) == first
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_persisted(self, tmp_path):
+        """Test records survive into a new cache instance"""
+        path = make_firefox(tmp_path / "firefox", ["default"])
+        cache = ParseCache(str(tmp_path / "cache.json"))
+        load_profiles("firefox", path, cache)
+        cache.save()
+        reloaded = ParseCache(str(tmp_path / "cache.json"))
+        assert [p['name'] for p in load_profiles("firefox", path, reloaded)] == ["default"]
+        assert reloaded.hits == 1
+
+    def test_changed_file_reparsed(self, tmp_path):
+        """Test a rewritten file is parsed again"""
+        root = tmp_path / "chrome"
+        path = make_chromium(root, ["Work"])
+        cache = ParseCache(str(tmp_path / "cache.json"))
+        load_profiles("chrome", path, cache)
+        make_chromium(root, ["Work", "Personal"])
+        os.utime(root / "Local State", ns=(1, 1))
+        assert [p['name'] for p in load_profiles("chrome", path, cache)] == ["Work", "Personal"]
+        assert cache.misses == 2
+
+    def test_records_are_copies(self, tmp_path):
+        """Test callers may edit returned profiles without touching the cache"""
+        path = make_chromium(tmp_path / "chrome", ["Work"])
+        cache = ParseCache(str(tmp_path / "cache.json"))
+        load_profiles("chrome", path, cache)[0]['color'] = '#000000'
+        assert 'color' not in load_profiles("chrome", path, cache)[0]
+
+
+class TestProfileCatalog:
+    """Test catalog indexes"""
+
+    def test_lookups(self):
+        """Test profiles are found by browser, name and path"""
+        work = {'id': 'Default', 'name': 'Work', 'path': '/p/chrome/Default', 'browser': 'chrome'}
+        dev = {'id': 'Profile0', 'name': 'work', 'path': '/p/ff/dev', 'browser': 'firefox'}
+        catalog = ProfileCatalog([work, dev])
+        assert catalog.by_browser('chrome') == [work]
+        assert catalog.by_name('WORK') == [work, dev]
+        assert catalog.by_path('/p/ff/dev') is dev
+        assert catalog.get('firefox', 'Profile0') is dev
+        assert catalog.browsers() == ['chrome', 'firefox']
+
+    def test_update_reindexes(self):
+        """Test renames move a profile in the name index"""
+        profile = {'id': 'Default', 'name': 'Work', 'browser': 'chrome'}
+        catalog = ProfileCatalog([profile])
+        catalog.update(profile, name='Play')
+        assert catalog.by_name('work') == []
+        assert catalog.by_name('play') == [profile]
+
+    def test_replace_browser_keeps_fields(self):
+        """Test a rescan keeps user colors and drops vanished profiles"""
+        catalog = ProfileCatalog([
+            {'id': 'Default', 'name': 'Work', 'color': '#123456', 'browser': 'chrome'},
+            {'id': 'Gone', 'name': 'Old', 'browser': 'chrome'},
+        ])
+        catalog.replace_browser('chrome', [{'id': 'Default', 'name': 'Work', 'color': '#ffffff', 'browser': 'chrome'}],
+                                keep=('color',))
+        assert [p['color'] for p in catalog.by_browser('chrome')] == ['#123456']
+        assert catalog.by_name('old') == []
+        assert len(catalog) == 1
+
+
+class TestProfileDiscovery:
+    """Test concurrent scanning of every browser"""
+
+    def test_scan_all_browsers(self, tmp_path):
+        """Test every browser is merged into one catalog"""
+        paths = {
+            'chrome': make_chromium(tmp_path / "chrome", ["Work", "Personal"]),
+            'edge': make_chromium(tmp_path / "edge", ["Work"]),
+            'firefox': make_firefox(tmp_path / "firefox", ["default"]),
+        }
+        discovery = ProfileDiscovery(paths, assign_color=lambda profile: '#3388de')
+        catalog = discovery.scan()
+        assert len(catalog) == 4
+        assert len(catalog.by_name('work')) == 2
+        assert all(p['color'] == '#3388de' for p in catalog)
+
+    def test_scan_runs_concurrently(self, tmp_path, monkeypatch):
+        """Test browsers are loaded on separate threads at the same time"""
+        paths = {name: make_chromium(tmp_path / name, ["Work"]) for name in ('chrome', 'edge', 'brave')}
+        barrier = threading.Barrier(len(paths), timeout=5)
+        discovery = ProfileDiscovery(paths)
+        load = discovery.load
+
+        def wait_for_all(browser):
+            barrier.wait()  # Breaks, failing the scan, unless every load overlaps
+            return load(browser)
+
+        monkeypatch.setattr(discovery, "load", wait_for_all)
+        assert len(discovery.scan()) == 3
+        assert discovery.errors == {}
+
+    def test_failed_browser_skipped(self, tmp_path):
+        """Test one unreadable browser does not block the others"""
+        broken = tmp_path / "edge"
+        broken.mkdir()
+        (broken / "Local State").write_text("{not json", encoding='utf-8')
+        paths = {'chrome': make_chromium(tmp_path / "chrome", ["Work"]), 'edge': str(broken)}
+        discovery = ProfileDiscovery(paths)
+        catalog = discovery.scan()
+        assert catalog.browsers() == ['chrome']
+        assert 'edge' in discovery.errors
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
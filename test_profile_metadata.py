@@ -0,0 +1,166 @@
+"""
+Tests for background profile metadata enrichment
+"""
+
+import json
+import threading
+
+import pytest
+
+from profile_metadata import (
+    BACKGROUND_PRIORITY,
+    VISIBLE_PRIORITY,
+    InfoCacheReader,
+    MetadataLoader,
+    ProfileMetadata,
+    describe_metadata,
+    format_age,
+    load_metadata,
+    skia_color,
+)
+
+
+def make_chromium(root, info_cache):
+    root.mkdir(parents=True, exist_ok=True)
+    (root / "Local State").write_text(json.dumps({'profile': {'info_cache': info_cache}}), encoding='utf-8')
+    return str(root)
+
+
+class TestReaders:
+    """Test reading metadata from browser files"""
+
+    def test_chromium(self, tmp_path):
+        """Test info_cache fields and the account picture are used"""
+        root = tmp_path / "chrome"
+        make_chromium(root, {'Default': {
+            'name': 'Work', 'user_name': 'me@example.com', 'active_time': 1700000000.5,
+            'profile_highlight_color': -16744448, 'avatar_icon': 'chrome://theme/IDR_PROFILE_AVATAR_26',
+            'gaia_picture_file_name': 'Google Profile Picture.png', 'is_using_default_avatar': False}})
+        (root / "Default").mkdir()
+        (root / "Default" / "Google Profile Picture.png").write_bytes(b"")
+        profile = {'id': 'Default', 'name': 'Work', 'path': str(root / "Default"), 'browser': 'chrome'}
+        assert load_metadata(profile, InfoCacheReader()) == ProfileMetadata(
+            account='me@example.com', active_time=1700000000.5, theme_color='#008000',
+            avatar=str(root / "Default" / "Google Profile Picture.png"))
+
+    def test_chromium_defaults(self, tmp_path):
+        """Test missing fields stay None and the built-in avatar is kept"""
+        root = tmp_path / "edge"
+        make_chromium(root, {'Default': {'name': 'Work', 'avatar_icon': 'chrome://theme/IDR_PROFILE_AVATAR_0'}})
+        profile = {'id': 'Default', 'path': str(root / "Default"), 'browser': 'edge'}
+        assert load_metadata(profile, InfoCacheReader()) == ProfileMetadata(
+            avatar='chrome://theme/IDR_PROFILE_AVATAR_0')
+
+    def test_firefox(self, tmp_path):
+        """Test times.json, signedInUser.json and prefs.js are read"""
+        (tmp_path / "times.json").write_text('{"created": 1600000000000, "firstUse": null}', encoding='utf-8')
+        (tmp_path / "signedInUser.json").write_text('{"accountData": {"email": "fox@example.com"}}',
+                                                    encoding='utf-8')
+        (tmp_path / "prefs.js").write_text("", encoding='utf-8')
+        metadata = load_metadata({'id': 'Profile0', 'path': str(tmp_path), 'browser': 'firefox'}, InfoCacheReader())
+        assert metadata.account == 'fox@example.com'
+        assert metadata.created == 1600000000.0
+        assert metadata.active_time > metadata.created
+
+    def test_local_state_read_once(self, tmp_path, monkeypatch):
+        """Test profiles of one browser share a Local State parse until it changes"""
+        path = make_chromium(tmp_path / "chrome", {'Default': {}, 'Profile 1': {}})
+        reads = []
+        monkeypatch.setattr("profile_metadata.read_info_cache", lambda p: reads.append(p) or {})
+        reader = InfoCacheReader()
+        for profile_id in ('Default', 'Profile 1'):
+            load_metadata({'id': profile_id, 'path': f"{path}/{profile_id}", 'browser': 'chrome'}, reader)
+        assert len(reads) == 1
+
+    def test_skia_color(self):
+        """Test signed ARGB integers become hex colors"""
+        assert skia_color(-1) == '#ffffff'
+        assert skia_color(0xFF3388DE) == '#3388de'
+        assert skia_color(True) is None and skia_color("red") is None
+
+
+class TestDescribe:
+    """Test card summaries"""
+
+    def test_summary(self):
+        """Test account and activity are joined"""
+        metadata = ProfileMetadata(account='me@example.com', active_time=1000.0)
+        assert describe_metadata(metadata, now=1000.0 + 3 * 86400) == "me@example.com · active 3 days ago"
+
+    def test_created_fallback(self):
+        """Test creation time is shown when last use is unknown"""
+        assert describe_metadata(ProfileMetadata(created=1.0), now=7201.0) == "created 2 hours ago"
+        assert describe_metadata(ProfileMetadata()) == ""
+
+    def test_format_age(self):
+        """Test units and plurals"""
+        assert format_age(5) == "just now"
+        assert format_age(60) == "1 minute ago"
+        assert format_age(400 * 86400) == "1 year ago"
+
+
+class TestMetadataLoader:
+    """Test prioritized background loading"""
+
+    def test_visible_profiles_first(self):
+        """Test a visible request overtakes queued background work"""
+        profiles = {name: {'id': name, 'browser': 'chrome'} for name in "abcd"}
+        started = threading.Event()
+        gate = threading.Event()
+        done = threading.Event()
+        order = []
+
+        def on_loaded(profile, metadata):
+            if len(order) == 4:
+                done.set()
+
+        loader = MetadataLoader(on_loaded, max_workers=1)
+
+        def load(profile):
+            if profile['id'] == 'a':
+                started.set()
+                gate.wait(5)  # Hold the only worker while the queue fills
+            order.append(profile['id'])
+            return ProfileMetadata(account=profile['id'])
+
+        loader.load_metadata = load
+        loader.request([profiles['a']], BACKGROUND_PRIORITY)
+        assert started.wait(5)
+        loader.request([profiles['b'], profiles['c']], BACKGROUND_PRIORITY)
+        loader.request([profiles['c'], profiles['d']], VISIBLE_PRIORITY)
+        gate.set()
+        assert done.wait(5)
+        loader.stop()
+        assert order == ['a', 'c', 'd', 'b']
+        assert loader.get(profiles['c']) == ProfileMetadata(account='c')
+
+    def test_loaded_once(self):
+        """Test requesting a loaded profile again reads nothing"""
+        profile = {'id': 'Default', 'browser': 'chrome'}
+        loaded = threading.Event()
+        loader = MetadataLoader(lambda p, m: loaded.set())
+        calls = []
+        loader.load_metadata = lambda p: calls.append(p) or ProfileMetadata()
+        loader.request([profile])
+        assert loaded.wait(5)
+        loader.request([profile], VISIBLE_PRIORITY)
+        loader.stop()
+        assert len(calls) == 1
+
+    def test_errors_recorded_empty(self):
+        """Test a failing profile yields empty metadata instead of stopping the worker"""
+        loaded = threading.Event()
+        loader = MetadataLoader(lambda p, m: loaded.set())
+
+        def fail(profile):
+            raise OSError("unreadable")
+
+        loader.load_metadata = fail
+        loader.request([{'id': 'Default', 'browser': 'chrome'}])
+        assert loaded.wait(5)
+        loader.stop()
+        assert loader.get({'id': 'Default', 'browser': 'chrome'}) == ProfileMetadata()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,128 @@
+"""
+Tests for slotted profile records
+"""
+
+import json
+import os
+import pickle
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from icon_batch import BatchIconGenerator
+from icon_renderer import IconRenderer, RenderSpec, profile_color, profile_stops
+from profile_discovery import ProfileCatalog
+from profile_record import Profile, profiles_from_json, profiles_to_json
+
+PALETTE_COLOR = {'name': 'Sky', 'hex': '#3388de', 'gradient': ['#3388de', '#5ca3f0']}
+
+EXPORTED = [
+    {'id': 'Default', 'name': 'Work', 'path': '/p/Default', 'browser': 'chrome', 'color': '#2196F3'},
+    {'id': 'Profile 1', 'name': 'Play', 'path': '/p/Profile 1', 'browser': 'chrome', 'color': PALETTE_COLOR,
+     'badge': 3, 'icon': '🎮'},
+    {'id': 'Profile0', 'name': 'Dev', 'browser': 'firefox', 'color': {'hex': '#ffffff'}, 'template': 'code',
+     'badge': None},
+    {'name': 'Bare'},
+]
+
+
+class TestConversion:
+    """Test lossless conversion to and from the export JSON"""
+
+    @pytest.mark.parametrize("data", EXPORTED)
+    def test_round_trip(self, data):
+        """Test every field, including unknown ones and nulls, survives"""
+        profile = Profile.from_dict(data)
+        assert profile.to_dict() == data
+        assert json.loads(json.dumps(profiles_to_json([profile]))) == [data]
+        assert pickle.loads(pickle.dumps(profile)) == data
+
+    def test_lists(self):
+        """Test export lists may mix records and dicts"""
+        profiles = profiles_from_json(EXPORTED)
+        assert all(isinstance(profile, Profile) for profile in profiles)
+        assert profiles_to_json(profiles[:2] + EXPORTED[2:]) == EXPORTED
+
+    def test_compact(self):
+        """Test records carry no per-instance dict"""
+        profile = Profile.from_dict(EXPORTED[0])
+        assert not hasattr(profile, '__dict__')
+        assert sys.getsizeof(profile) < sys.getsizeof(dict(EXPORTED[0]))
+
+
+class TestMapping:
+    """Test dict-style access used across the app"""
+
+    def test_access(self):
+        """Test get, setdefault, pop, update and membership"""
+        profile = Profile(id='Default', name='Work', browser='chrome')
+        assert profile['name'] == 'Work' and profile.get('icon') is None and 'icon' not in profile
+        assert profile.setdefault('color', '#123456') == '#123456'
+        profile.update(name='Home', note='x')
+        assert profile.pop('note') == 'x' and profile.extra is None
+        del profile['color']
+        assert dict(profile, badge=None) == {'id': 'Default', 'name': 'Home', 'browser': 'chrome', 'badge': None}
+        with pytest.raises(KeyError):
+            profile['path']
+
+    def test_interned_browser(self):
+        """Test browser keys share one string object"""
+        a = Profile(browser=''.join(['chr', 'ome']))
+        b = Profile(browser=''.join(['chro', 'me']))
+        assert a['browser'] is b['browser']
+
+    def test_catalog(self):
+        """Test the catalog indexes and updates records in place"""
+        profile = Profile.from_dict(EXPORTED[0])
+        catalog = ProfileCatalog([profile])
+        catalog.update(profile, name='Office')
+        assert catalog.by_name('office') == [profile]
+        deltas = catalog.sync_browser('chrome', [Profile.from_dict(EXPORTED[0])])
+        assert [(d.kind, d.profile is profile) for d in deltas] == [("renamed", True)]
+
+
+class TestColor:
+    """Test colors are normalized once per assignment"""
+
+    def test_normalized(self):
+        """Test hex and stops for hex strings, palette dicts and missing colors"""
+        profile = Profile.from_dict(EXPORTED[1])
+        assert (profile.hex, profile.stops) == ('#3388de', ('#3388de', '#5ca3f0'))
+        profile['color'] = '#000000'
+        assert (profile.hex, profile.stops) == ('#000000', ('#000000', '#404040'))
+        del profile['color']
+        assert profile_color(profile) == profile_color({})
+
+    @pytest.mark.parametrize("data", EXPORTED)
+    def test_same_as_dicts(self, data):
+        """Test records resolve colors exactly like the dicts they came from"""
+        profile = Profile.from_dict(data)
+        assert profile_color(profile) == profile_color(data)
+        assert profile_stops(profile) == profile_stops(data)
+
+    @pytest.mark.parametrize("fill_mode", ["solid", "gradient"])
+    def test_renders_like_dicts(self, fill_mode):
+        """Test a record renders and keys exactly like its dict"""
+        renderer = IconRenderer(RenderSpec(sizes=(32,), fill_mode=fill_mode))
+        for data in EXPORTED[:3]:
+            profile = Profile.from_dict(data)
+            assert renderer.cache_key(profile) == renderer.cache_key(data)
+            assert renderer.render(profile)[0].tobytes() == renderer.render(data)[0].tobytes()
+
+
+class TestBatch:
+    """Test records cross into batch worker processes"""
+
+    def test_process_pool(self, tmp_path):
+        """Test a batch of records renders in worker processes"""
+        profiles = profiles_from_json(EXPORTED[:2])
+        generator = BatchIconGenerator(IconRenderer(RenderSpec(sizes=(16,))), max_workers=1,
+                                       executor_factory=ProcessPoolExecutor)
+        results = list(generator.generate(profiles, str(tmp_path)))
+        assert all(result.error is None for result in results)
+        assert sorted(os.listdir(tmp_path)) == ["Play.ico", "Work.ico"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,147 @@
+"""
+Tests for live profile list watching
+"""
+
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from profile_discovery import ProfileCatalog, ProfileDiscovery
+from profile_watch import Debouncer, InotifyWatcher, PollingWatcher, ProfileWatcher, inotify_available
+
+
+def write_local_state(root, names):
+    """Rewrite Local State the way Chromium does, via rename into place"""
+    root.mkdir(parents=True, exist_ok=True)
+    info_cache = {profile_id: {'name': name} for profile_id, name in names.items()}
+    temp = root / "Local State.tmp"
+    temp.write_text(json.dumps({'profile': {'info_cache': info_cache}}), encoding='utf-8')
+    os.replace(temp, root / "Local State")
+    return str(root)
+
+
+def wait_for(event, timeout=5):
+    assert event.wait(timeout), "timed out waiting for a change"
+
+
+class TestDebouncer:
+    """Test coalescing bursts of change events"""
+
+    def test_burst_coalesced(self):
+        """Test rapid triggers produce one callback with every key"""
+        calls = []
+        done = threading.Event()
+        debouncer = Debouncer(0.1, lambda keys: (calls.append(keys), done.set()))
+        for key in ("a", "b", "a"):
+            debouncer.trigger(key)
+        wait_for(done)
+        time.sleep(0.2)
+        assert calls == [{"a", "b"}]
+
+    def test_cancel(self):
+        """Test cancelled keys are never delivered"""
+        calls = []
+        debouncer = Debouncer(0.05, calls.append)
+        debouncer.trigger("a")
+        debouncer.cancel()
+        time.sleep(0.15)
+        assert calls == []
+
+
+class TestWatchers:
+    """Test file change detection"""
+
+    def watch(self, watcher_class, tmp_path, **kwargs):
+        root = tmp_path / "chrome"
+        write_local_state(root, {'Default': 'Work'})
+        path = str(root / "Local State")
+        changed = threading.Event()
+        seen = []
+        watcher = watcher_class([path], lambda p: (seen.append(p), changed.set()), **kwargs)
+        watcher.start()
+        try:
+            write_local_state(root, {'Default': 'Home'})
+            wait_for(changed)
+        finally:
+            watcher.stop()
+        assert seen[0] == path
+
+    def test_polling(self, tmp_path):
+        """Test a replaced file is noticed by polling"""
+        self.watch(PollingWatcher, tmp_path, interval=0.05)
+
+    @pytest.mark.skipif(not inotify_available(), reason="inotify not available")
+    def test_inotify(self, tmp_path):
+        """Test a file renamed into place raises an inotify event"""
+        self.watch(InotifyWatcher, tmp_path)
+
+
+class TestSyncBrowser:
+    """Test diffing a rescan against the catalog"""
+
+    def test_deltas(self):
+        """Test additions, removals and renames are reported"""
+        work = {'id': 'Default', 'name': 'Work', 'color': '#123456', 'browser': 'chrome'}
+        old = {'id': 'Profile 1', 'name': 'Old', 'browser': 'chrome'}
+        catalog = ProfileCatalog([work, old])
+        deltas = catalog.sync_browser('chrome', [
+            {'id': 'Default', 'name': 'Home', 'browser': 'chrome'},
+            {'id': 'Profile 2', 'name': 'New', 'browser': 'chrome'},
+        ])
+        assert [(d.kind, d.profile['name'], d.old_name) for d in deltas] == [
+            ("renamed", "Home", "Work"), ("added", "New", None), ("removed", "Old", None)]
+        assert deltas[0].profile is work and work['color'] == '#123456'
+        assert catalog.by_name('work') == [] and catalog.by_name('home') == [work]
+
+    def test_user_rename_kept(self):
+        """Test rewriting an unchanged source keeps a name set in the app"""
+        catalog = ProfileCatalog()
+        catalog.replace_browser('chrome', [{'id': 'Default', 'name': 'Work', 'browser': 'chrome'}])
+        profile = catalog.get('chrome', 'Default')
+        catalog.update(profile, name='Office')
+        assert catalog.sync_browser('chrome', [{'id': 'Default', 'name': 'Work', 'browser': 'chrome'}]) == []
+        assert profile['name'] == 'Office'
+
+        # A rename in the browser itself still comes through
+        deltas = catalog.sync_browser('chrome', [{'id': 'Default', 'name': 'Home', 'browser': 'chrome'}])
+        assert [(d.kind, d.old_name) for d in deltas] == [("renamed", "Office")]
+        assert profile['name'] == 'Home'
+
+    def test_unchanged(self):
+        """Test an identical rescan reports nothing"""
+        catalog = ProfileCatalog([{'id': 'Default', 'name': 'Work', 'browser': 'chrome'}])
+        assert catalog.sync_browser('chrome', [{'id': 'Default', 'name': 'Work', 'browser': 'chrome'}]) == []
+
+
+class TestProfileWatcher:
+    """Test end-to-end catalog updates from file changes"""
+
+    def test_rename_delivered(self, tmp_path):
+        """Test renaming a profile in the browser reaches on_deltas"""
+        root = tmp_path / "chrome"
+        discovery = ProfileDiscovery({'chrome': write_local_state(root, {'Default': 'Work'})})
+        catalog = discovery.scan()
+        received = []
+        done = threading.Event()
+        watcher = ProfileWatcher(discovery, catalog, lambda browser, deltas: (received.append((browser, deltas)),
+                                                                             done.set()),
+                                 debounce=0.05, poll_interval=0.05,
+                                 watcher_factory=lambda paths, on_change, interval: PollingWatcher(
+                                     paths, on_change, interval))
+        watcher.start()
+        try:
+            write_local_state(root, {'Default': 'Home'})
+            wait_for(done)
+        finally:
+            watcher.stop()
+        browser, deltas = received[0]
+        assert browser == 'chrome'
+        assert [(d.kind, d.profile['name'], d.old_name) for d in deltas] == [("renamed", "Home", "Work")]
+        assert catalog.get('chrome', 'Default')['name'] == 'Home'
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,115 @@
+"""
+Tests for the persistent render cache
+"""
+
+import os
+import pickle
+
+import pytest
+
+from icon_batch import BatchIconGenerator
+from icon_renderer import IconRenderer, RenderSpec
+from render_cache import RenderCache
+
+
+PROFILE = {'id': 'Default', 'name': 'Work', 'color': '#2196F3', 'browser': 'chrome'}
+
+
+class TestRenderCache:
+    """Test byte store, LRU eviction and counters"""
+
+    def test_put_and_get(self, tmp_path):
+        """Test stored bytes are returned on a hit"""
+        cache = RenderCache(str(tmp_path))
+        assert cache.get("abc.ico") is None
+        cache.put("abc.ico", b"data")
+        assert cache.get("abc.ico") == b"data"
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_lru_eviction(self, tmp_path):
+        """Test least recently used entries are evicted over budget"""
+        cache = RenderCache(str(tmp_path), max_bytes=10)
+        cache.put("a", b"1234")
+        cache.put("b", b"1234")
+        cache.get("a")
+        cache.put("c", b"1234")
+        assert cache.get("b") is None
+        assert cache.get("a") == b"1234"
+        assert cache.stats()["bytes"] <= 10
+
+    def test_index_survives_restart(self, tmp_path):
+        """Test a new cache instance sees entries on disk"""
+        RenderCache(str(tmp_path)).put("a", b"1234")
+        assert RenderCache(str(tmp_path)).get("a") == b"1234"
+
+    def test_shared_directory(self, tmp_path):
+        """Test entries written by another instance after indexing are found"""
+        reader = RenderCache(str(tmp_path))
+        assert reader.get("a") is None
+        pickle.loads(pickle.dumps(reader)).put("a", b"1234")
+        assert reader.get("a") == b"1234"
+        assert reader.stats()["bytes"] == 4
+
+    def test_clear(self, tmp_path):
+        """Test clear removes entries and files"""
+        cache = RenderCache(str(tmp_path))
+        cache.put("a", b"1234")
+        cache.clear()
+        assert cache.get("a") is None
+        assert os.listdir(tmp_path) == []
+
+
+class TestCacheKeys:
+    """Test render digests cover every input"""
+
+    def test_key_stable(self):
+        """Test identical inputs give identical keys"""
+        assert IconRenderer().cache_key(PROFILE) == IconRenderer().cache_key(dict(PROFILE))
+
+    @pytest.mark.parametrize("change", [
+        {'name': 'Home'}, {'color': '#000000'}, {'browser': 'edge'},
+    ])
+    def test_key_changes_with_profile(self, change):
+        """Test profile inputs change the key"""
+        assert IconRenderer().cache_key(PROFILE) != IconRenderer().cache_key({**PROFILE, **change})
+
+    def test_key_ignores_name_without_text(self, tmp_path):
+        """Test names only affect the key when they are drawn"""
+        renderer = IconRenderer(RenderSpec(show_text=False, sizes=(32,)))
+        home = {**PROFILE, 'name': 'Home'}
+        assert renderer.cache_key(PROFILE) == renderer.cache_key(home)
+        assert renderer.render(PROFILE)[0].tobytes() == renderer.render(home)[0].tobytes()
+
+        generator = BatchIconGenerator(renderer, max_workers=1)
+        assert all(r.error is None for r in generator.generate([PROFILE, home], str(tmp_path)))
+        assert generator.renders_saved == 1
+
+    def test_key_changes_with_spec(self):
+        """Test spec changes change the key"""
+        assert IconRenderer().cache_key(PROFILE) != IconRenderer(RenderSpec(shape="circle")).cache_key(PROFILE)
+
+    def test_key_ignores_color_format(self):
+        """Test palette dicts and hex strings hash the same"""
+        assert IconRenderer().cache_key(PROFILE) == IconRenderer().cache_key({**PROFILE, 'color': {'hex': '#2196F3'}})
+
+
+class TestBatchCaching:
+    """Test batch generation serves repeat renders from cache"""
+
+    def test_second_batch_hits_cache(self, tmp_path):
+        """Test unchanged profiles are copied from the cache"""
+        cache = RenderCache(str(tmp_path / "cache"))
+        generator = BatchIconGenerator(IconRenderer(RenderSpec(sizes=(16, 32))), max_workers=1, cache=cache)
+
+        first = list(generator.generate([PROFILE], str(tmp_path / "out1")))
+        second = list(generator.generate([PROFILE], str(tmp_path / "out2")))
+
+        assert not first[0].cached
+        assert second[0].cached
+        with open(first[0].path, 'rb') as a, open(second[0].path, 'rb') as b:
+            assert a.read() == b.read()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])